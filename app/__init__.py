@@ -3,6 +3,7 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_cors import CORS # Import CORS to allow Cross Origin Resource Sharing
 from config import Config
+from .token_cache import TokenCache
 
 
 # Create an instance of Flask called app which will be the central object
@@ -13,10 +14,19 @@ app.config.from_object(Config)
 CORS(app)
 
 
+# GET requests read from the replicas in SQLALCHEMY_BINDS when there are any (see replicas.py)
+from .replicas import RoutingSession
 #create an instance of SQLAlchemy called db which will be the central object for our database
-db = SQLAlchemy(app)
+db = SQLAlchemy(app, session_options={'class_': RoutingSession})
+# Tables created with raw SQL instead of models (the full text search table and sqlite's fts5 shadow tables)
+# so alembic autogenerate does not try to drop them
+def include_name(name, type_, parent_names):
+    return not (type_ == 'table' and name.startswith('teetime_search'))
+
 # Create an instance of Migrate with the app and db
-migrate = Migrate(app, db)
+migrate = Migrate(app, db, include_name=include_name)
+# Cache of bearer token -> golfer so token auth does not hit the database on every request
+token_cache = TokenCache(app.config['TOKEN_CACHE_SIZE'], app.config['TOKEN_CACHE_TTL'])
 
 #import the routes and models to the app -- need this below the app or else will cause circular import because when it goes over to routes to look for app, app will not yet be defined
-from . import routes, models
\ No newline at end of file
+from . import instrumentation, engine, routes, models, search, summary, archive, unit_of_work, cli, versions
\ No newline at end of file
@@ -0,0 +1,162 @@
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timezone, timedelta
+import click
+from sqlalchemy import event, exc
+from . import app, db
+from .models import Teetime, Golfer_comment, Booking, Teetime_archive, Golfer_comment_archive, Booking_archive, Job_lease
+from .schedule import now
+from .unit_of_work import unit_of_work, bulk_delete
+
+
+# Archival of past tee times. Tee times that started more than ARCHIVE_AFTER_DAYS ago are moved, with their
+# comments and bookings, from the hot tables to teetime_archive, golfer_comment_archive and booking_archive, so
+# the tables every listing reads only hold recent and upcoming tee times however old the deployment is.
+# Listings read the archive with ?include_archived=1.
+#
+# Tee times are moved ARCHIVE_BATCH_SIZE at a time, oldest first, each batch in its own short transaction: copy
+# into the archive, then bulk_delete from the hot tables (its listeners keep the summary, search and
+# recommendation indexes in sync, the table versions drop the cached responses). Tee times whose start does not
+# parse (null starts_at) are never archived.
+#
+# Only one run at a time: a run first takes the "archive" row of job_lease (a single conditional UPDATE, so two
+# processes can not both win) and extends it before each batch. Two runs copying the same tee times would
+# otherwise collide on the archive primary keys. A run that can not take the lease does nothing, a run that
+# loses it (it stalled for longer than ARCHIVE_LEASE_SECONDS) stops after its current batch.
+#
+# `flask archive` runs it once. ARCHIVE_INTERVAL_SECONDS > 0 also starts a background thread in each worker,
+# and at every interval the first of them to take the lease runs it while the others skip that round.
+
+# hot model -> its archive, copied in this order (archived comments and bookings reference the archived teetime)
+ARCHIVES = {
+    Teetime: Teetime_archive,
+    Golfer_comment: Golfer_comment_archive,
+    Booking: Booking_archive,
+}
+
+
+lease_table = Job_lease.__table__
+LEASE = 'archive'
+
+
+@event.listens_for(lease_table, 'after_create')
+def seed_lease(target, connection, **kw):
+    connection.execute(lease_table.insert(), [{'name': LEASE}])
+
+
+def lease_holder():
+    return f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+
+
+def take_lease():
+    # claim the lease when it is free or expired, or extend it when it is already ours -> True when we hold it
+    moment = datetime.now(timezone.utc)
+    holder = lease_holder()
+    with db.engine.begin() as connection:
+        return connection.execute(lease_table.update().where(
+            lease_table.c.name == LEASE,
+            db.or_(lease_table.c.holder.is_(None), lease_table.c.holder == holder, lease_table.c.expires_at < moment),
+        ).values(holder=holder, expires_at=moment + timedelta(seconds=app.config['ARCHIVE_LEASE_SECONDS']))).rowcount == 1
+
+
+def drop_lease():
+    with db.engine.begin() as connection:
+        connection.execute(lease_table.update().where(lease_table.c.name == LEASE, lease_table.c.holder == lease_holder())
+                           .values(holder=None, expires_at=None))
+
+
+def horizon(days=None):
+    # tee times that started before this are archived
+    return now() - timedelta(days=app.config['ARCHIVE_AFTER_DAYS'] if days is None else days)
+
+
+def copy_statement(model, condition, archived_at):
+    # INSERT INTO <archive> SELECT <model's rows matching condition> RETURNING their primary keys
+    archive_table = ARCHIVES[model].__table__
+    key = model.__mapper__.primary_key[0]
+    select_stmt = db.select(
+        *model.__table__.columns,
+        db.literal(archived_at, db.DateTime(timezone=True)).label('archived_at'),
+    ).where(condition)
+    columns = [column.name for column in model.__table__.columns] + ['archived_at']
+    return archive_table.insert().from_select(columns, select_stmt).returning(archive_table.c[key.name])
+
+
+def move(teetime_ids, cutoff):
+    # one transaction: archive these teetimes (the ones still there and still before cutoff) with their comments
+    # and bookings, returns how many were moved
+    archived_at = datetime.now(timezone.utc)
+    with unit_of_work() as session:
+        teetime_ids = session.execute(copy_statement(Teetime, db.and_(Teetime.teetime_id.in_(teetime_ids), Teetime.starts_at < cutoff), archived_at)).scalars().all()
+        if not teetime_ids:
+            return 0
+        comment_ids = session.execute(copy_statement(Golfer_comment, Golfer_comment.teetime_id.in_(teetime_ids), archived_at)).scalars().all()
+        booking_ids = session.execute(copy_statement(Booking, Booking.teetime_id.in_(teetime_ids), archived_at)).scalars().all()
+        bulk_delete(Golfer_comment, comment_ids)
+        bulk_delete(Booking, booking_ids)
+        bulk_delete(Teetime, teetime_ids)
+    return len(teetime_ids)
+
+
+def archive(cutoff, batch_size):
+    # archive every teetime that started before cutoff, batch_size per transaction, returns how many were moved
+    # (None when another run holds the lease)
+    if not take_lease():
+        return None
+    oldest = db.select(Teetime.teetime_id).where(Teetime.starts_at < cutoff).order_by(Teetime.starts_at).limit(batch_size)
+    moved = 0
+    try:
+        while True:
+            with db.engine.connect() as connection:
+                candidates = connection.execute(oldest).scalars().all()
+            if candidates:
+                moved += move(candidates, cutoff)
+            if len(candidates) < batch_size or not take_lease():
+                return moved
+    finally:
+        drop_lease()
+
+
+@app.cli.command('archive')
+@click.option('--days', type=float, default=None, help='Archive tee times that started more than this many days ago (default ARCHIVE_AFTER_DAYS).')
+@click.option('--batch-size', type=int, default=None, help='Tee times per transaction (default ARCHIVE_BATCH_SIZE).')
+def archive_command(days, batch_size):
+    """Move tee times that started long ago, with their comments and bookings, to the archive tables."""
+    cutoff = horizon(days)
+    moved = archive(cutoff, batch_size or app.config['ARCHIVE_BATCH_SIZE'])
+    if moved is None:
+        raise click.ClickException('Another archive run holds the lease, try again when it is done')
+    click.echo(f"Archived {moved} teetimes that started before {cutoff.isoformat()}")
+
+
+def run_scheduler(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            with app.app_context():
+                cutoff = horizon()
+                moved = archive(cutoff, app.config['ARCHIVE_BATCH_SIZE'])
+            if moved:
+                app.logger.info('archived %d teetimes that started before %s', moved, cutoff.isoformat())
+        except exc.SQLAlchemyError:
+            app.logger.exception('could not archive teetimes')
+
+
+_scheduler_pid = None
+_scheduler_lock = threading.Lock()
+
+
+@app.before_request
+def start_scheduler():
+    # started by the first request of each worker process (gunicorn forks after import, threads do not survive it),
+    # the lease keeps all but one of them from running at once
+    global _scheduler_pid
+    interval = app.config['ARCHIVE_INTERVAL_SECONDS']
+    if interval <= 0 or _scheduler_pid == os.getpid():
+        return
+    with _scheduler_lock:
+        if _scheduler_pid != os.getpid():
+            _scheduler_pid = os.getpid()
+            threading.Thread(target=run_scheduler, args=(interval,), daemon=True, name='archive-scheduler').start()
@@ -0,0 +1,206 @@
+import io
+import re
+import sys
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgiInstance
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from . import app, db
+from .engine import apply_sqlite_pragmas
+from .models import Teetime, Course, Teetime_summary, Golfer_comment
+from .pagination import list_query, list_body, wants_stream, wants_archived
+from .schedule import time_conditions, clock
+from .versions import versions_select, etag_for, cached_response, store_response, add_cache_headers
+
+
+# ASGI serving mode: uvicorn app.asgi:application --workers 4 (pip install -r requirements-asgi.txt)
+#
+# The read heavy routes (GET /teetimes, /teetimes/<id>, /teetimes/<id>/golfer_comments, /teetimes/summary and
+# /courses) are served on the event loop with an async engine, so a request waiting on the database only holds a
+# coroutine instead of a worker and one process can keep thousands of connections open. They go through the
+# same before/after request hooks, ETags and response cache as the Flask views. The hooks and the response cache
+# are sync code that may block (a redis rate limiter or cache, the database), so they run on the event loop's
+# thread pool and never on the event loop itself; they are thread safe already, gthread workers run them from
+# several threads at once. Everything else (writes, auth, search, NDJSON streams) is handed to the Flask app
+# through asgiref's WSGI adapter on the same thread pool.
+
+ASYNC_DRIVERS = {'sqlite': 'sqlite+aiosqlite', 'postgresql': 'postgresql+asyncpg'}
+
+
+def create_engine():
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(f"No async driver for {backend} databases, use the WSGI app")
+    # same pool settings as the sync engine, statement_timeout is a server setting for asyncpg
+    options = {key: value for key, value in app.config['SQLALCHEMY_ENGINE_OPTIONS'].items() if key != 'connect_args'}
+    if backend == 'postgresql' and app.config['DB_STATEMENT_TIMEOUT_MS']:
+        options['connect_args'] = {'server_settings': {'statement_timeout': str(app.config['DB_STATEMENT_TIMEOUT_MS'])}}
+    if backend == 'sqlite' and options:
+        # aiosqlite would default to a NullPool, which takes no pool settings
+        options['poolclass'] = AsyncAdaptedQueuePool
+    engine = create_async_engine(url.set(drivername=ASYNC_DRIVERS[backend]), **options)
+    if backend == 'sqlite':
+        event.listen(engine.sync_engine, 'connect', lambda dbapi_connection, connection_record: apply_sqlite_pragmas(dbapi_connection))
+    return engine
+
+
+engine = create_engine()
+async_session = async_sessionmaker(engine, expire_on_commit=False)
+
+
+async def get_teetimes(session):
+    try:
+        conditions = time_conditions(Teetime.starts_at)
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    return await list_view(session, db.select(Teetime).where(*conditions), Teetime)
+
+
+async def get_teetime(session, teetime_id):
+    teetime = await session.get(Teetime, int(teetime_id), options=Teetime.eager_options())
+    if teetime:
+        return teetime.to_dict()
+    return {'error': f"Tee Time with an ID of {teetime_id} does not exist"}, 404
+
+
+async def get_comments(session, teetime_id):
+    # the teetime must exist (archived ones are only read with ?include_archived=1, which Flask serves)
+    if await session.scalar(db.select(Teetime.teetime_id).where(Teetime.teetime_id == int(teetime_id))) is None:
+        return {'error': f"Teetime with ID {teetime_id} does not exist"}, 404
+    return await list_view(session, db.select(Golfer_comment).where(Golfer_comment.teetime_id == int(teetime_id)), Golfer_comment)
+
+
+async def get_teetime_summaries(session):
+    try:
+        conditions = time_conditions(Teetime_summary.starts_at)
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    return await list_view(session, db.select(Teetime_summary).where(*conditions), Teetime_summary)
+
+
+async def get_courses(session):
+    return await list_view(session, db.select(Course), Course)
+
+
+async def list_view(session, select_stmt, model):
+    # pagination.list_response without the streaming (those requests go to Flask)
+    try:
+        select_stmt, fields, limit = list_query(select_stmt, model)
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    if limit is not None:
+        select_stmt = select_stmt.limit(limit + 1)
+    rows = (await session.execute(select_stmt)).scalars().all()
+    return list_body(rows, model, fields, limit)
+
+
+# path -> (tables the response is built from and vary, same as the @conditional of the Flask view, view)
+ROUTES = [
+    (re.compile(r'/teetimes'), ('teetime', 'course', 'golfer', 'golfer_comment', 'teetime_archive', 'golfer_comment_archive'), clock, get_teetimes),
+    (re.compile(r'/teetimes/summary'), ('teetime', 'course', 'golfer', 'golfer_comment'), clock, get_teetime_summaries),
+    (re.compile(r'/teetimes/(\d+)'), ('teetime', 'course', 'golfer', 'golfer_comment', 'teetime_archive', 'golfer_comment_archive'), None, get_teetime),
+    (re.compile(r'/teetimes/(\d+)/golfer_comments'), ('teetime', 'golfer', 'golfer_comment', 'teetime_archive', 'golfer_comment_archive'), None, get_comments),
+    (re.compile(r'/courses'), ('course',), None, get_courses),
+]
+
+
+def match(scope):
+    if scope['type'] != 'http' or scope['method'] not in ('GET', 'HEAD'):
+        return None
+    for pattern, tables, vary, view in ROUTES:
+        found = pattern.fullmatch(scope['path'])
+        if found:
+            return tables, vary, view, found.groups()
+    return None
+
+
+def handled_by_flask():
+    # full text search, NDJSON streams and history (?include_archived=1) stay on the sync code path
+    return bool(request.args.get('search')) or wants_stream() or wants_archived()
+
+
+# off the event loop, with the request context (a contextvar asgiref carries over to the thread), not all on
+# asgiref's one thread_sensitive thread where every request would wait for the others
+preprocess_request = sync_to_async(app.preprocess_request, thread_sensitive=False)
+finalize_request = sync_to_async(app.finalize_request, thread_sensitive=False)
+cached_response_async = sync_to_async(cached_response, thread_sensitive=False)
+store_response_async = sync_to_async(store_response, thread_sensitive=False)
+
+
+async def conditional_view(tables, vary, view, args):
+    # versions.conditional, awaiting the version lookup and the view
+    async with async_session() as session:
+        etag = etag_for((await session.execute(versions_select(tables))).all(), vary)
+        response = await cached_response_async(etag)
+        if response is None:
+            response = app.make_response(await view(session, *args))
+            if response.status_code != 200:
+                return response
+            await store_response_async(etag, tables, response)
+        return add_cache_headers(response, etag)
+
+
+async def dispatch(tables, vary, view, args):
+    # Flask.full_dispatch_request for an async view: before_request hooks, the view, error handlers, after_request hooks
+    try:
+        try:
+            rv = await preprocess_request()
+            if rv is None:
+                rv = await conditional_view(tables, vary, view, args)
+        except Exception as e:
+            rv = app.handle_user_exception(e)
+        return await finalize_request(rv)
+    except Exception as e:
+        return app.handle_exception(e)
+
+
+class WsgiInstance(WsgiToAsgiInstance):
+    # asgiref runs every WSGI call on one shared thread (thread_sensitive), use the loop's thread pool instead
+    run_wsgi_app = sync_to_async(WsgiToAsgiInstance.__dict__['run_wsgi_app'].func, thread_sensitive=False)
+
+    def build_environ(self, scope, body):
+        environ = super().build_environ(scope, body)
+        # asgiref's is a BytesIO, Flask's default log handler writes str to it
+        environ['wsgi.errors'] = sys.stderr
+        return environ
+
+
+def build_environ(scope):
+    # the same WSGI environ the adapter builds, so request, url_for and the hooks behave the same
+    adapter = WsgiInstance(app)
+    adapter.scope = scope
+    return adapter.build_environ(scope, io.BytesIO())
+
+
+async def send_response(send, response, head):
+    headers = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in response.headers.items()]
+    await send({'type': 'http.response.start', 'status': response.status_code, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': b'' if head else response.get_data()})
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await engine.dispose()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    route = match(scope)
+    if route is not None:
+        environ = build_environ(scope)
+        with app.request_context(environ):
+            if not handled_by_flask():
+                response = await dispatch(*route)
+                return await send_response(send, response, scope['method'] == 'HEAD')
+    await WsgiInstance(app)(scope, receive, send)
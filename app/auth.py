@@ -1,6 +1,8 @@
 from flask_httpauth import HTTPBasicAuth, HTTPTokenAuth
-from . import db
-from .models import Golfer
+from . import db, token_cache
+from .models import Golfer, as_utc
+from .hashing import needs_rehash
+from .rate_limit import charge_golfer
 from datetime import datetime, timezone
 
 basic_auth = HTTPBasicAuth()
@@ -8,8 +10,13 @@ token_auth = HTTPTokenAuth()
 
 @basic_auth.verify_password
 def verify(username, password):
-    golfer = db.session.execute(db.select(Golfer).where(Golfer.username==username)).scalar_one_or_none()
+    # credentials are always checked on the primary, a lagging replica may not have a new golfer yet
+    golfer = db.session.execute(db.select(Golfer).where(Golfer.username==username), bind_arguments={'primary': True}).scalar_one_or_none()
     if golfer is not None and golfer.check_password(password):
+        # upgrade hashes made with older PASSWORD_HASH_METHOD parameters while we have the plaintext
+        if needs_rehash(golfer.password):
+            golfer.set_password(password)
+        charge_golfer(golfer)
         return golfer
     return None
 
@@ -19,8 +26,16 @@ def handle_error(status_code):
 
 @token_auth.verify_token
 def verify(token):
-    golfer = db.session.execute(db.select(Golfer).where(Golfer.token==token)).scalar_one_or_none()
-    if golfer is not None and golfer.tokenExp > datetime.now(timezone.utc):
+    # steady state is a cache hit, which rebuilds the golfer without a database round trip
+    values = token_cache.get(token)
+    if values is not None:
+        golfer = Golfer.from_cache(values)
+        charge_golfer(golfer)
+        return golfer
+    golfer = db.session.execute(db.select(Golfer).where(Golfer.token==token), bind_arguments={'primary': True}).scalar_one_or_none()
+    if golfer is not None and as_utc(golfer.tokenExp) > datetime.now(timezone.utc):
+        token_cache.set(token, as_utc(golfer.tokenExp), golfer.cache_values())
+        charge_golfer(golfer)
         return golfer
     return None
 
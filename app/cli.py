@@ -0,0 +1,219 @@
+import csv
+import json
+import sys
+import click
+from flask.cli import AppGroup
+from . import app, db
+from .models import Golfer, Course, Teetime
+
+
+# flask courses import|export FILE and flask teetimes import|export FILE
+# Files are CSV or NDJSON (picked from the extension unless --format is given) and are processed
+# in chunks: one duplicate check SELECT and one multi row INSERT per chunk instead of per row.
+
+courses_cli = AppGroup('courses', help='Bulk import/export of courses.')
+teetimes_cli = AppGroup('teetimes', help='Bulk import/export of teetimes.')
+
+# fields that must be present for a row to be imported, same as the POST routes
+REQUIRED_FIELDS = {
+    Course: ['course_name', 'address', 'city', 'district', 'country', 'par'],
+    Teetime: ['course_name', 'price', 'teetime_date', 'teetime_time', 'space_remaining', 'golfer_id'],
+}
+
+
+def file_format(path, fmt):
+    if fmt:
+        return fmt
+    return 'ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv'
+
+
+def read_rows(path, fmt):
+    handle = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+    with handle:
+        if fmt == 'csv':
+            yield from csv.DictReader(handle)
+        else:
+            for line in handle:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def convert(column, value):
+    # csv gives strings for everything, turn them into the column's python type
+    if value is None or value == '':
+        return None
+    if not isinstance(value, str):
+        return value
+    python_type = column.type.python_type
+    if python_type is bool:
+        return value.strip().lower() in ('1', 'true', 'yes')
+    if python_type in (int, float):
+        return python_type(value)
+    return value
+
+
+def clean_row(model, row):
+    # keep only known non primary key columns (ids are assigned by the target database)
+    columns = {column.key: column for column in model.__table__.columns if not column.primary_key}
+    return {key: convert(columns[key], value) for key, value in row.items() if key in columns}
+
+
+def chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def course_duplicates(rows, seen):
+    # a course is a duplicate when its name or address already exists (like POST /courses), in the db or earlier in the file
+    names = {row['course_name'] for row in rows}
+    addresses = {row['address'] for row in rows}
+    # two lookups so each one can use its own index
+    seen.update(('name', name) for name in db.session.execute(db.select(Course.course_name).where(Course.course_name.in_(names))).scalars())
+    seen.update(('address', address) for address in db.session.execute(db.select(Course.address).where(Course.address.in_(addresses))).scalars())
+    keep = []
+    for row in rows:
+        keys = {('name', row['course_name']), ('address', row['address'])}
+        if keys & seen:
+            continue
+        seen.update(keys)
+        keep.append(row)
+    return keep
+
+
+def teetime_duplicates(rows, seen):
+    # a teetime is a duplicate when the same golfer already hosts the same course, date and time
+    key = lambda row: (row.get('course_id'), row['teetime_date'], row['teetime_time'], row['golfer_id'])
+    golfer_ids = {row['golfer_id'] for row in rows}
+    dates = {row['teetime_date'] for row in rows}
+    existing = db.session.execute(
+        db.select(Teetime.course_id, Teetime.teetime_date, Teetime.teetime_time, Teetime.golfer_id)
+        .where(Teetime.golfer_id.in_(golfer_ids), Teetime.teetime_date.in_(dates))
+    ).all()
+    seen.update(tuple(row) for row in existing)
+    keep = []
+    for row in rows:
+        if key(row) in seen:
+            continue
+        seen.add(key(row))
+        keep.append(row)
+    return keep
+
+
+def resolve_courses(rows, course_ids):
+    # rows without a course_id are matched to a course by name
+    names = {row['course_name'] for row in rows if row.get('course_id') is None} - set(course_ids)
+    if names:
+        course_ids.update(db.session.execute(db.select(Course.course_name, Course.course_id).where(Course.course_name.in_(names))).all())
+    for row in rows:
+        if row.get('course_id') is None:
+            row['course_id'] = course_ids.get(row['course_name'])
+
+
+def import_rows(model, path, fmt, chunk_size, defaults=None, prepare=None, duplicates=None):
+    required = REQUIRED_FIELDS[model]
+    imported = skipped = invalid = 0
+    seen = set()
+    for chunk in chunks(enumerate(read_rows(path, file_format(path, fmt)), start=1), chunk_size):
+        rows = []
+        for line, row in chunk:
+            try:
+                row = clean_row(model, row)
+            except ValueError as e:
+                click.echo(f"row {line}: {e}", err=True)
+                invalid += 1
+                continue
+            for key, value in (defaults or {}).items():
+                if row.get(key) is None:
+                    row[key] = value
+            missing = [field for field in required if row.get(field) is None]
+            if missing:
+                click.echo(f"row {line}: {', '.join(missing)} must be present", err=True)
+                invalid += 1
+                continue
+            rows.append(row)
+        if prepare:
+            prepare(rows)
+        kept = duplicates(rows, seen) if duplicates else rows
+        if kept:
+            model.bulk_create(kept)
+        imported += len(kept)
+        skipped += len(rows) - len(kept)
+        click.echo(f"{model.__tablename__}: {imported} imported, {skipped} duplicates skipped, {invalid} invalid", err=True)
+    return imported
+
+
+def export_rows(model, path, fmt):
+    # stream the table out in chunks so memory stays flat whatever its size
+    columns = [column.key for column in model.__table__.columns]
+    select_stmt = db.select(*model.__table__.columns).order_by(*model.__table__.primary_key.columns)
+    result = db.session.execute(select_stmt.execution_options(yield_per=app.config['STREAM_CHUNK_SIZE']))
+    handle = sys.stdout if path == '-' else open(path, 'w', newline='', encoding='utf-8')
+    count = 0
+    with handle:
+        if file_format(path, fmt) == 'csv':
+            writer = csv.writer(handle)
+            writer.writerow(columns)
+            for row in result:
+                writer.writerow(row)
+                count += 1
+        else:
+            for row in result:
+                handle.write(app.json.dumps(row._asdict()) + '\n')
+                count += 1
+    click.echo(f"{model.__tablename__}: {count} exported", err=True)
+
+
+format_option = click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']), help='Defaults to the file extension (.ndjson/.jsonl, otherwise csv).')
+chunk_option = click.option('--chunk-size', default=5000, show_default=True, help='Rows per duplicate check and INSERT.')
+
+
+@courses_cli.command('import')
+@click.argument('path')
+@format_option
+@chunk_option
+def import_courses(path, fmt, chunk_size):
+    """Import courses from PATH ('-' for stdin), skipping duplicates by name or address."""
+    import_rows(Course, path, fmt, chunk_size, duplicates=course_duplicates)
+
+
+@courses_cli.command('export')
+@click.argument('path')
+@format_option
+def export_courses(path, fmt):
+    """Export every course to PATH ('-' for stdout)."""
+    export_rows(Course, path, fmt)
+
+
+@teetimes_cli.command('import')
+@click.argument('path')
+@format_option
+@chunk_option
+@click.option('--golfer', 'username', help='Host golfer for rows without a golfer_id.')
+def import_teetimes(path, fmt, chunk_size, username):
+    """Import teetimes from PATH ('-' for stdin). Rows without a course_id are matched to a course by course_name."""
+    golfer_id = None
+    if username:
+        golfer_id = db.session.execute(db.select(Golfer.golfer_id).where(Golfer.username == username)).scalar_one_or_none()
+        if golfer_id is None:
+            raise click.UsageError(f"No golfer with username {username}")
+    course_ids = {}
+    import_rows(Teetime, path, fmt, chunk_size, defaults={'golfer_id': golfer_id},
+                prepare=lambda rows: resolve_courses(rows, course_ids), duplicates=teetime_duplicates)
+
+
+@teetimes_cli.command('export')
+@click.argument('path')
+@format_option
+def export_teetimes(path, fmt):
+    """Export every teetime to PATH ('-' for stdout)."""
+    export_rows(Teetime, path, fmt)
+
+
+app.cli.add_command(courses_cli)
+app.cli.add_command(teetimes_cli)
@@ -0,0 +1,130 @@
+import base64
+import datetime
+import json
+from flask import request
+from . import app, db
+from .models import Teetime_summary
+from .schedule import time_conditions, parse_time, day_start
+
+
+# Server side tee time discovery: every filter is pushed into one SELECT over the teetime_summary read model
+# (see summary.py), a single table scan backed by its date/time and location indexes, and only a compact
+# summary of each row comes back. Tee times that already started are left out unless ?include_past=1 (or
+# ?include_archived=1), and ?from=&to= take a range of start times like /teetimes (see schedule.py).
+# Dates, time windows and the page order are all on the parsed start (starts_at, start_minute), never on the
+# free form teetime_date/teetime_time strings, so tee times whose start does not parse are never listed.
+
+# columns returned for each match, in order
+SUMMARY_COLUMNS = (
+    Teetime_summary.teetime_id,
+    Teetime_summary.course_id,
+    Teetime_summary.course_name,
+    Teetime_summary.city,
+    Teetime_summary.district,
+    Teetime_summary.country,
+    Teetime_summary.price,
+    Teetime_summary.teetime_date,
+    Teetime_summary.teetime_time,
+    Teetime_summary.starts_at,
+    Teetime_summary.space_remaining,
+    Teetime_summary.par,
+    Teetime_summary.rating,
+    Teetime_summary.strict_dress,
+)
+
+
+def _arg(name, convert):
+    value = request.args.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        return convert(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a valid {convert.__name__}")
+
+
+def boolean(value):
+    if value.lower() in ('1', 'true', 'yes'):
+        return True
+    if value.lower() in ('0', 'false', 'no'):
+        return False
+    raise ValueError(value)
+
+
+def date(value):
+    return datetime.date.fromisoformat(value)
+
+
+def time(value):
+    # -> minutes after midnight, like start_minute
+    moment = parse_time(value)
+    if moment is None:
+        raise ValueError(value)
+    return moment.hour * 60 + moment.minute
+
+
+# query param -> (converter, function building the WHERE condition)
+# dates are YYYY-MM-DD and times e.g. 08:30 or 8:30 AM, both local (TEETIME_TIMEZONE) and inclusive
+FILTERS = {
+    'city': (str, lambda v: Teetime_summary.city == v),
+    'district': (str, lambda v: Teetime_summary.district == v),
+    'country': (str, lambda v: Teetime_summary.country == v),
+    'date_from': (date, lambda v: Teetime_summary.starts_at >= day_start(v)),
+    'date_to': (date, lambda v: Teetime_summary.starts_at < day_start(v + datetime.timedelta(days=1))),
+    'time_from': (time, lambda v: Teetime_summary.start_minute >= v),
+    'time_to': (time, lambda v: Teetime_summary.start_minute <= v),
+    'price_min': (int, lambda v: Teetime_summary.price >= v),
+    'price_max': (int, lambda v: Teetime_summary.price <= v),
+    'min_spots': (int, lambda v: Teetime_summary.space_remaining >= v),
+    'strict_dress': (boolean, lambda v: Teetime_summary.strict_dress == v),
+    'par': (int, lambda v: Teetime_summary.par == v),
+    'min_rating': (float, lambda v: Teetime_summary.rating >= v),
+}
+
+
+def make_cursor(row):
+    # base64 of the JSON [starts_at, teetime_id] of the last row of a page
+    return base64.urlsafe_b64encode(json.dumps([row.starts_at.isoformat(), row.teetime_id]).encode()).decode()
+
+
+def parse_cursor(cursor):
+    try:
+        starts_at, teetime_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.datetime.fromisoformat(starts_at), int(teetime_id)
+    except (ValueError, TypeError):
+        raise ValueError('cursor must be the next_cursor of a previous page')
+
+
+def discover_response():
+    try:
+        conditions = []
+        for name, (convert, condition) in FILTERS.items():
+            value = _arg(name, convert)
+            if value is not None:
+                conditions.append(condition(value))
+        conditions.extend(time_conditions(Teetime_summary.starts_at))
+        cursor = request.args.get('cursor')
+        cursor = parse_cursor(cursor) if cursor else None
+        limit = _arg('limit', int)
+        if limit is None:
+            limit = app.config['DEFAULT_PAGE_SIZE']
+        if limit < 1:
+            raise ValueError('limit must be at least 1')
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    limit = min(limit, app.config['MAX_PAGE_SIZE'])
+
+    order = (Teetime_summary.starts_at, Teetime_summary.teetime_id)
+    # only teetimes at a known course (city is copied from the course and never null there), like a join would,
+    # and with a known start
+    select_stmt = db.select(*SUMMARY_COLUMNS).where(Teetime_summary.city.is_not(None), Teetime_summary.starts_at.is_not(None), *conditions)
+    if cursor is not None:
+        # keyset pagination in start time order
+        select_stmt = select_stmt.where(db.tuple_(*order) > db.tuple_(*cursor))
+    rows = db.session.execute(select_stmt.order_by(*order).limit(limit + 1)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = make_cursor(rows[-1])
+    return {'items': [row._asdict() for row in rows], 'next_cursor': next_cursor}
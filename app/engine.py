@@ -0,0 +1,79 @@
+import sqlite3
+import threading
+from sqlalchemy import event, exc
+from sqlalchemy.pool import Pool, QueuePool
+from . import app, db
+
+
+# Per connection settings and connection pool numbers. New sqlite connections are switched to WAL (readers
+# no longer block on the writer) with the SQLITE_* settings from config.py. The pool itself is sized by
+# SQLALCHEMY_ENGINE_OPTIONS, pool_stats() shows how much of it real traffic uses (per worker process).
+
+SYNCHRONOUS_MODES = {'OFF', 'NORMAL', 'FULL', 'EXTRA'}
+
+_lock = threading.Lock()
+counters = {
+    'connections_opened': 0, # new connections, steady growth means churn (recycle too low, pool too small)
+    'checkouts': 0,
+    'invalidated': 0, # connections thrown away after an error or a failed pre-ping
+    'timeouts': 0, # requests that waited pool_timeout for a connection and got a 503
+}
+
+
+def count(name):
+    with _lock:
+        counters[name] += 1
+
+
+def apply_sqlite_pragmas(dbapi_connection):
+    # also used for the aiosqlite connections of asgi.py, which have the same cursor interface
+    synchronous = app.config['SQLITE_SYNCHRONOUS'].upper()
+    if synchronous not in SYNCHRONOUS_MODES:
+        raise ValueError(f"SQLITE_SYNCHRONOUS must be one of {', '.join(sorted(SYNCHRONOUS_MODES))}")
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute(f'PRAGMA synchronous={synchronous}')
+    cursor.execute(f"PRAGMA mmap_size={int(app.config['SQLITE_MMAP_SIZE'])}")
+    cursor.execute(f"PRAGMA busy_timeout={int(app.config['SQLITE_BUSY_TIMEOUT_MS'])}")
+    cursor.close()
+
+
+@event.listens_for(Pool, 'connect')
+def configure_connection(dbapi_connection, connection_record):
+    count('connections_opened')
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        apply_sqlite_pragmas(dbapi_connection)
+
+
+@event.listens_for(Pool, 'checkout')
+def count_checkout(dbapi_connection, connection_record, connection_proxy):
+    count('checkouts')
+
+
+@event.listens_for(Pool, 'invalidate')
+def count_invalidated(dbapi_connection, connection_record, exception):
+    count('invalidated')
+
+
+def pool_stats():
+    pool = db.engine.pool
+    with _lock:
+        stats = {'pool': type(pool).__name__, **counters}
+    if isinstance(pool, QueuePool):
+        options = app.config['SQLALCHEMY_ENGINE_OPTIONS']
+        stats.update({
+            'size': pool.size(),
+            'max_overflow': options.get('max_overflow', 10),
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            'overflow': max(pool.overflow(), 0), # connections open beyond pool_size right now
+        })
+    return stats
+
+
+@app.errorhandler(exc.TimeoutError)
+def handle_pool_timeout(e):
+    # every pooled connection stayed checked out for pool_timeout seconds
+    count('timeouts')
+    app.logger.warning('database pool exhausted: %s', e)
+    return {'error': 'The server is busy. Please try again shortly'}, 503, {'Retry-After': '1'}
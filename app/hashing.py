@@ -0,0 +1,74 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from werkzeug.security import generate_password_hash, check_password_hash
+from . import app
+
+
+# Password hashing is CPU bound on purpose, so it runs in a pool of PASSWORD_HASH_WORKERS processes (one per
+# core by default) where it does not hold the GIL of the worker serving the request. In front of the pool is a
+# queue of at most PASSWORD_HASH_QUEUE_LIMIT hashes per worker process, running or waiting, shared by all
+# of its request threads (gthread workers, the ASGI app); past that requests get a 429 right away instead of
+# piling up behind a login storm. With PASSWORD_HASH_WORKERS=0 hashes run inline behind the same limit.
+
+class HashingBusy(Exception):
+    pass
+
+
+_slots = threading.BoundedSemaphore(app.config['PASSWORD_HASH_QUEUE_LIMIT'])
+_prefixes = {} # hash method -> the "method:params" prefix werkzeug writes for it
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def pool():
+    global _pool, _pool_pid
+    with _pool_lock:
+        # gunicorn forks workers after the app is imported, each worker gets its own pool
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ProcessPoolExecutor(app.config['PASSWORD_HASH_WORKERS'], mp_context=multiprocessing.get_context('spawn'))
+            _pool_pid = os.getpid()
+    return _pool
+
+
+def run(fn, *args):
+    if not _slots.acquire(blocking=False):
+        raise HashingBusy()
+    try:
+        if app.config['PASSWORD_HASH_WORKERS'] <= 0:
+            return fn(*args)
+        return pool().submit(fn, *args).result()
+    finally:
+        _slots.release()
+
+
+def hash_password(plaintext_password):
+    return run(generate_password_hash, plaintext_password, app.config['PASSWORD_HASH_METHOD'])
+
+
+def hash_passwords(plaintext_passwords):
+    # for bulk imports: the whole batch is spread over the pool, bypassing the request queue limit
+    method = app.config['PASSWORD_HASH_METHOD']
+    if app.config['PASSWORD_HASH_WORKERS'] <= 0:
+        return [generate_password_hash(password, method) for password in plaintext_passwords]
+    return list(pool().map(generate_password_hash, plaintext_passwords, repeat(method), chunksize=16))
+
+
+def verify_password(pw_hash, plaintext_password):
+    return run(check_password_hash, pw_hash, plaintext_password)
+
+
+def needs_rehash(pw_hash):
+    # true when the hash was made with other parameters than PASSWORD_HASH_METHOD
+    method = app.config['PASSWORD_HASH_METHOD']
+    if method not in _prefixes:
+        _prefixes[method] = generate_password_hash('', method).split('$', 1)[0]
+    return pw_hash.split('$', 1)[0] != _prefixes[method]
+
+
+@app.errorhandler(HashingBusy)
+def handle_hashing_busy(e):
+    return {'error': 'Too many logins in progress. Please try again shortly'}, 429, {'Retry-After': '1'}
@@ -0,0 +1,144 @@
+import threading
+import time
+from collections import defaultdict
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from . import app, db
+from .serialization import FastJSONProvider
+
+
+# Per request performance numbers: total latency, SQL statement count and time, rows loaded and JSON
+# serialization time. They are sent back in a Server-Timing header, statements slower than SLOW_QUERY_MS
+# are logged with their parameters, and GET /metrics exposes per route counters and latency histograms
+# in the Prometheus text format (numbers are per process, scrape every gunicorn worker).
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = defaultdict(int) # (route, method, status) -> count
+        self.latency_buckets = defaultdict(lambda: [0] * len(LATENCY_BUCKETS)) # (route, method) -> counts per bucket
+        self.latency_sum = defaultdict(float)
+        self.latency_count = defaultdict(int)
+        self.sql_statements = defaultdict(int) # route -> count
+        self.sql_seconds = defaultdict(float)
+        self.slow_queries = 0
+
+    def observe(self, route, method, status, seconds, statements, sql_seconds):
+        with self._lock:
+            self.requests[(route, method, status)] += 1
+            buckets = self.latency_buckets[(route, method)]
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    buckets[i] += 1
+            self.latency_sum[(route, method)] += seconds
+            self.latency_count[(route, method)] += 1
+            self.sql_statements[route] += statements
+            self.sql_seconds[route] += sql_seconds
+
+    def observe_slow_query(self):
+        with self._lock:
+            self.slow_queries += 1
+
+    def render(self, extra_gauges=()):
+        lines = []
+        with self._lock:
+            lines.append('# HELP http_requests_total Requests handled, by route, method and status.')
+            lines.append('# TYPE http_requests_total counter')
+            for (route, method, status), count in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{route="{route}",method="{method}",status="{status}"}} {count}')
+            lines.append('# HELP http_request_duration_seconds Request latency, by route and method.')
+            lines.append('# TYPE http_request_duration_seconds histogram')
+            for (route, method), buckets in sorted(self.latency_buckets.items()):
+                labels = f'route="{route}",method="{method}"'
+                for bound, count in zip(LATENCY_BUCKETS, buckets):
+                    lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {self.latency_count[(route, method)]}')
+                lines.append(f'http_request_duration_seconds_sum{{{labels}}} {self.latency_sum[(route, method)]}')
+                lines.append(f'http_request_duration_seconds_count{{{labels}}} {self.latency_count[(route, method)]}')
+            lines.append('# HELP db_statements_total SQL statements executed, by route.')
+            lines.append('# TYPE db_statements_total counter')
+            for route, count in sorted(self.sql_statements.items()):
+                lines.append(f'db_statements_total{{route="{route}"}} {count}')
+            lines.append('# HELP db_statement_seconds_total Time spent in SQL statements, by route.')
+            lines.append('# TYPE db_statement_seconds_total counter')
+            for route, seconds in sorted(self.sql_seconds.items()):
+                lines.append(f'db_statement_seconds_total{{route="{route}"}} {seconds}')
+            lines.append('# HELP db_slow_statements_total Statements slower than SLOW_QUERY_MS.')
+            lines.append('# TYPE db_slow_statements_total counter')
+            lines.append(f'db_slow_statements_total {self.slow_queries}')
+        for name, help_text, value in extra_gauges:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} gauge')
+            lines.append(f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_statement_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('statement_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def stop_statement_timer(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['statement_start'].pop()
+    if elapsed * 1000 >= app.config['SLOW_QUERY_MS']:
+        metrics.observe_slow_query()
+        app.logger.warning('slow query (%.1f ms): %s | parameters: %.500r', elapsed * 1000, statement, parameters)
+    if has_request_context():
+        g.sql_statements = g.get('sql_statements', 0) + 1
+        g.sql_seconds = g.get('sql_seconds', 0.0) + elapsed
+
+
+@event.listens_for(db.Model, 'load', propagate=True)
+def count_loaded_row(target, context):
+    if has_request_context():
+        g.rows_loaded = g.get('rows_loaded', 0) + 1
+
+
+class TimedJSONProvider(FastJSONProvider):
+    # adds the time spent encoding response bodies to the request's numbers
+    def response(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().response(*args, **kwargs)
+        finally:
+            if has_request_context():
+                g.json_seconds = g.get('json_seconds', 0.0) + time.perf_counter() - start
+
+
+app.json = TimedJSONProvider(app)
+
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    g.sql_statements = 0
+    g.sql_seconds = 0.0
+    g.rows_loaded = 0
+    g.json_seconds = 0.0
+
+
+@app.after_request
+def record_request(response):
+    if 'request_start' not in g:
+        return response
+    seconds = time.perf_counter() - g.request_start
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    statements = g.get('sql_statements', 0)
+    sql_seconds = g.get('sql_seconds', 0.0)
+    metrics.observe(route, request.method, response.status_code, seconds, statements, sql_seconds)
+    response.headers['Server-Timing'] = ', '.join([
+        f'total;dur={seconds * 1000:.2f}',
+        f'db;dur={sql_seconds * 1000:.2f};desc="{statements} statements, {g.get("rows_loaded", 0)} rows"',
+        f'json;dur={g.get("json_seconds", 0.0) * 1000:.2f}',
+    ])
+    if seconds * 1000 >= app.config['SLOW_REQUEST_MS']:
+        app.logger.warning('slow request %s %s: %.1f ms, %d statements (%.1f ms)', request.method, request.full_path, seconds * 1000, statements, sql_seconds * 1000)
+    return response
@@ -1,7 +1,20 @@
 import secrets
-from . import db 
+from . import app, db, token_cache
 from datetime import datetime, timezone, timedelta
-from werkzeug.security import generate_password_hash, check_password_hash
+from .hashing import hash_password, hash_passwords, verify_password
+from sqlalchemy import event, func
+from sqlalchemy.orm import selectinload, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from .unit_of_work import commit, bulk_insert
+from .serialization import columns_dict, Included
+from .schedule import parse_start, start_minute
+
+
+def as_utc(dt):
+    # sqlite hands back naive datetimes even for timezone=True columns, treat those as UTC
+    if dt is not None and dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt
 
 
 
@@ -9,7 +22,7 @@ class Golfer(db.Model):
     golfer_id = db.Column(db.Integer, primary_key=True)
     first_name = db.Column(db.String, nullable=False)
     last_name = db.Column(db.String, nullable=False)
-    email = db.Column(db.String, nullable=False)
+    email = db.Column(db.String, nullable=False, index=True)
     username = db.Column(db.String, nullable=False, unique=True)
     password = db.Column(db.String, nullable=False) #pw_hash ?!?!
     golfer_age = db.Column(db.Integer, nullable=False)
@@ -25,10 +38,11 @@ class Golfer(db.Model):
     country = db.Column(db.String, nullable=False)
     phone = db.Column(db.String, nullable=True)
     music = db.Column(db.Boolean, nullable=True)
-    token = db.Column(db.String, nullable=True)
+    token = db.Column(db.String, nullable=True, index=True, unique=True) # looked up on every token authenticated request
     tokenExp = db.Column(db.DateTime(timezone=True), nullable=True)
     teetimes = db.relationship('Teetime', back_populates="golfer")
     golfer_comments = db.relationship("Golfer_comment", back_populates="golfer")
+    bookings = db.relationship("Booking", back_populates="golfer")
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -36,41 +50,66 @@ class Golfer(db.Model):
 
     def __repr__(self):
         return f"<Golfer {self.golfer_id}|{self.username}>"
+
+    @classmethod
+    def bulk_create(cls, rows):
+        # rows are dicts of column values with a plaintext 'password', returns the new golfer_ids
+        rows = list(rows)
+        hashes = hash_passwords([row.get('password', '') for row in rows])
+        return bulk_insert(cls, [dict(row, password=pw_hash) for row, pw_hash in zip(rows, hashes)])
     
     def set_password(self, plaintext_password):
-        self.password = generate_password_hash(plaintext_password)
+        self.password = hash_password(plaintext_password) # on the hashing pool, see hashing.py
         self.save()
     
     def save(self): #to add to the database automatically like done in the terminal
+        # the cached copy for this golfer's token is about to be stale (read before commit expires it)
+        token_cache.invalidate(self.token)
         db.session.add(self)
-        db.session.commit()
+        commit()
 
     def check_password(self, plaintext_password):
-        return check_password_hash(self.password, plaintext_password)
+        return verify_password(self.password, plaintext_password)
     
+    # to_dict key -> column attribute (the serializer is compiled once from this, see serialization.py)
+    dict_columns = {
+        "golfer_id": "golfer_id",
+        # changed above to golfer ID ================================================================================================================================
+        "first_name": "first_name",
+        "last_name": "last_name",
+        "username": "username",
+        "email": "email",
+        "handicap": "handicap",
+        "golfer_age": "golfer_age",
+        "phone": "phone",
+        "city": "city",
+        "district": "district",
+        "country": "country",
+        "right_handed": "right_handed",
+        "alcohol": "alcohol",
+        "legal_drugs": "legal_drugs",
+        "smoker": "smoker",
+        "gambler": "gambler",
+        "music": "music",
+        "tees": "tees"
+    }
+
     #turn the User into a dict type
     def to_dict(self):
-        return {
-            "golfer_id": self.golfer_id,
-            # changed above to golfer ID ================================================================================================================================
-            "first_name": self.first_name,
-            "last_name": self.last_name,
-            "username": self.username,
-            "email": self.email,
-            "handicap": self.handicap,
-            "golfer_age": self.golfer_age,
-            "phone":self.phone,
-            "city": self.city,
-            "district": self.district,
-            "country": self.country,
-            "right_handed": self.right_handed,
-            "alcohol": self.alcohol,
-            "legal_drugs": self.legal_drugs,
-            "smoker": self.smoker,
-            "gambler": self.gambler,
-            "music": self.music,
-            "tees": self.tees
-        }
+        return columns_dict(self)
+
+    def cache_values(self):
+        # plain column values that are safe to keep in the token cache across requests
+        return {attr.key: getattr(self, attr.key) for attr in Golfer.__mapper__.column_attrs}
+
+    @classmethod
+    def from_cache(cls, values):
+        # rebuild a session attached golfer from cached values without a SELECT (skips __init__, which saves)
+        golfer = cls.__mapper__.class_manager.new_instance()
+        for key, value in values.items():
+            set_committed_value(golfer, key, value)
+        make_transient_to_detached(golfer)
+        return db.session.merge(golfer, load=False)
     
     def update(self, **kwargs):
         allowed_fields = {'first_name', 'last_name', 'city', 'district', 'country', 'email', 'phone', 'handicap', 'golfer_age', 'right_handed', 'alcohol', 'legal_drugs', 'smoker', 'gambler', 'tees', 'music'}
@@ -81,22 +120,24 @@ class Golfer(db.Model):
     
     def get_token(self):
         now = datetime.now(timezone.utc)
-        if self.token and self.tokenExp > now + timedelta(minutes=1):
+        if self.token and as_utc(self.tokenExp) > now + timedelta(minutes=1):
             return {"token": self.token, "tokenExp": self.tokenExp}
+        token_cache.invalidate(self.token)
         self.token = secrets.token_hex(16)
         self.tokenExp = now + timedelta(hours=1)
         self.save()
         return {"token": self.token, "tokenExp": self.tokenExp}
     
     def delete(self):
+        token_cache.invalidate(self.token)
         db.session.delete(self)
-        db.session.commit()
+        commit()
     
 
 class Course(db.Model):
     course_id = db.Column(db.Integer, primary_key=True)
-    course_name = db.Column(db.String, nullable=False)
-    address = db.Column(db.String, nullable=False)
+    course_name = db.Column(db.String, nullable=False, index=True)
+    address = db.Column(db.String, nullable=False, index=True)
     city = db.Column(db.String, nullable=False)
     district = db.Column(db.String, nullable=False)
     country = db.Column(db.String, nullable=False)
@@ -109,6 +150,8 @@ class Course(db.Model):
     par = db.Column(db.Integer, nullable=False)
     designer = db.Column(db.String, nullable=True)
     teetimes = db.relationship("Teetime", back_populates="course")
+    # location filters of /teetimes/discover
+    __table_args__ = (db.Index('ix_course_location', 'city', 'district', 'country'),)
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -116,29 +159,37 @@ class Course(db.Model):
 
     def __repr__(self):
         return f"<Course {self.course_id}|{self.course_name}>"
+
+    @classmethod
+    def bulk_create(cls, rows):
+        # rows are dicts of column values, inserted in chunks with a single commit, returns the new ids
+        return bulk_insert(cls, rows)
     
     def save(self):
         db.session.add(self)
-        db.session.commit()
-
-    def to_dict(self):
-        return {
-            "course_id": self.course_id,
-            # changed to course_id ================================================================================================================================
-            "course_name": self.course_name,
-            "address": self.address,
-            "city": self.city,
-            "district": self.district,
-            "country": self.country,
-            "weekday_price": self.weekday_price,
-            "weekend_price": self.weekend_price,
-            "strict_dress":self.strict_dress,
-            "rating": self.rating,
-            "slope":self.slope,
-            "couse_length": self.course_length,
-            "par": self.par,
-            "designer": self.designer
-        }
+        commit()
+
+    # to_dict key -> column attribute, also used to leave unrequested columns out of the SELECT for ?fields=
+    dict_columns = {
+        "course_id": "course_id",
+        # changed to course_id ================================================================================================================================
+        "course_name": "course_name",
+        "address": "address",
+        "city": "city",
+        "district": "district",
+        "country": "country",
+        "weekday_price": "weekday_price",
+        "weekend_price": "weekend_price",
+        "strict_dress": "strict_dress",
+        "rating": "rating",
+        "slope": "slope",
+        "couse_length": "course_length",
+        "par": "par",
+        "designer": "designer"
+    }
+
+    def to_dict(self, fields=None):
+        return columns_dict(self, fields)
     
     def update(self, **kwargs):
         allowed_fields = {"course_name", "weekday_price", "weekend_price", "strict_dress", "rating", "slope", "course_length", "par"}
@@ -149,7 +200,7 @@ class Course(db.Model):
 
     def delete(self):
         db.session.delete(self) 
-        db.session.commit()
+        commit()
 
 
 
@@ -160,12 +211,25 @@ class Teetime(db.Model):
     teetime_date = db.Column(db.String, nullable=False)
     teetime_time = db.Column(db.String, nullable=False)
     space_remaining = db.Column(db.Integer, nullable=False)
-    golfer_id = db.Column(db.Integer, db.ForeignKey('golfer.golfer_id'), nullable=False)
+    # teetime_date + teetime_time as a UTC timestamp, set on every write (null when they do not parse, see schedule.py)
+    starts_at = db.Column(db.DateTime(timezone=True), nullable=True, index=True)
+    # its local time of day in minutes after midnight (TEETIME_TIMEZONE), for time of day windows
+    start_minute = db.Column(db.Integer, nullable=True)
+    golfer_id = db.Column(db.Integer, db.ForeignKey('golfer.golfer_id'), nullable=False, index=True)
     # made nullable true below ================================================================================================================================
-    course_id = db.Column(db.Integer, db.ForeignKey('course.course_id'), nullable=True)
+    course_id = db.Column(db.Integer, db.ForeignKey('course.course_id'), nullable=True, index=True)
     golfer = db.relationship("Golfer", back_populates='teetimes')
     golfer_comments = db.relationship("Golfer_comment", back_populates='teetime')
+    # a teetime's bookings go with it (booking.teetime_id is not nullable)
+    bookings = db.relationship("Booking", back_populates='teetime', cascade='all, delete-orphan')
     course = db.relationship("Course", back_populates="teetimes")
+    # date range + time window scans (and date/time ordering) of /teetimes/discover, on their own or per course.
+    # AUTOINCREMENT: sqlite would hand out the ids of archived rows again (archive.py)
+    __table_args__ = (
+        db.Index('ix_teetime_date_time', 'teetime_date', 'teetime_time'),
+        db.Index('ix_teetime_course_date_time', 'course_id', 'teetime_date', 'teetime_time'),
+        {'sqlite_autoincrement': True},
+    )
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -173,27 +237,61 @@ class Teetime(db.Model):
 
     def __repr__(self):
         return f"<Teetime {self.teetime_id}|{self.course_name}|{self.price}|{self.teetime_date}|{self.teetime_time}>"
+
+    @classmethod
+    def bulk_create(cls, rows):
+        # rows are dicts of column values, inserted in chunks with a single commit, returns the new ids
+        rows = [dict(row, starts_at=parse_start(row.get('teetime_date'), row.get('teetime_time'))) for row in rows]
+        return bulk_insert(cls, [dict(row, start_minute=start_minute(row['starts_at'])) for row in rows])
     
     def save(self):
         db.session.add(self)
-        db.session.commit()
-
-    def to_dict(self):
-        return {
-            "teetime_id": self.teetime_id,
-            # changed to teetime_ID above ================================================================================================================================
-            'course_name': self.course_name,
-            "course_details": self.course.to_dict(),
-            "price": self.price,
-            "teetime_date": self.teetime_date,
-            "teetime_time": self.teetime_time,
-            "space_remaining": self.space_remaining,
-            # "course_id":self.course_id,
-            # added course ID above ================================================================================================================================
-            "golfer": self.golfer.to_dict(),
-            "golfer_comments": [golfer_comment.to_dict() for golfer_comment in self.golfer_comments]
-        }
-
+        commit()
+
+    # to_dict key -> column attribute, also used to leave unrequested columns out of the SELECT for ?fields=
+    dict_columns = {
+        "teetime_id": "teetime_id",
+        # changed to teetime_ID above ================================================================================================================================
+        "course_name": "course_name",
+        "price": "price",
+        "teetime_date": "teetime_date",
+        "teetime_time": "teetime_time",
+        "starts_at": "starts_at",
+        "space_remaining": "space_remaining",
+        "comment_count": "comment_count"
+    }
+    # to_dict key of each nested object -> column its relationship needs loaded
+    dict_relationships = {
+        "course_details": "course_id",
+        "golfer": "golfer_id",
+        "golfer_comments": "teetime_id"
+    }
+
+    def to_dict(self, fields=None, included=None):
+        # included is shared by every teetime of a listing, so a course or golfer is serialized once per response
+        if included is None:
+            included = Included()
+        data = columns_dict(self, fields)
+        if fields is None or "course_details" in fields:
+            data["course_details"] = included.nested("courses", self.course)
+        if fields is None or "golfer" in fields:
+            data["golfer"] = included.nested("golfers", self.golfer)
+        if fields is None or "golfer_comments" in fields:
+            # only the latest ones (comment_count has them all, GET /teetimes/<id>/golfer_comments pages through them)
+            data["golfer_comments"] = [included.nested("golfer_comments", golfer_comment) for golfer_comment in self.latest_comments]
+        return data
+
+    @staticmethod
+    def eager_options(fields=None):
+        # loader options for everything to_dict touches so a listing is a fixed number of queries (no N+1)
+        options = []
+        if fields is None or "course_details" in fields:
+            options.append(selectinload(Teetime.course))
+        if fields is None or "golfer" in fields:
+            options.append(selectinload(Teetime.golfer))
+        if fields is None or "golfer_comments" in fields:
+            options.append(selectinload(Teetime.latest_comments).selectinload(Golfer_comment.golfer))
+        return options
 
 
     def update(self, **kwargs):
@@ -206,18 +304,52 @@ class Teetime(db.Model):
 
     def delete(self):
         db.session.delete(self) # deleting THIS object from the database
-        db.session.commit() # commiting our changes
-
-
+        commit() # commiting our changes (deferred inside a unit of work)
+
+    @staticmethod
+    def reserve(teetime_id, spots):
+        # a single conditional UPDATE so concurrent joiners can never take more spots than are left
+        result = db.session.execute(
+            db.update(Teetime)
+            .where(Teetime.teetime_id == teetime_id, Teetime.space_remaining >= spots)
+            .values(space_remaining=Teetime.space_remaining - spots)
+        )
+        if result.rowcount != 1:
+            return False
+        # statements skip the mapper events that keep the summary in sync (see summary.py)
+        Teetime_summary.add_spots(teetime_id, -spots)
+        return True
+
+    @staticmethod
+    def release(teetime_id, spots):
+        db.session.execute(
+            db.update(Teetime)
+            .where(Teetime.teetime_id == teetime_id)
+            .values(space_remaining=Teetime.space_remaining + spots)
+        )
+        Teetime_summary.add_spots(teetime_id, spots)
+
+
+@event.listens_for(Teetime, 'before_insert')
+@event.listens_for(Teetime, 'before_update')
+def set_starts_at(mapper, connection, target):
+    state = db.inspect(target)
+    if state.attrs.teetime_date.history.has_changes() or state.attrs.teetime_time.history.has_changes():
+        target.starts_at = parse_start(target.teetime_date, target.teetime_time)
+        target.start_minute = start_minute(target.starts_at)
 
 
 class Golfer_comment(db.Model):
     golfer_comment_id = db.Column(db.Integer, primary_key=True)
     body = db.Column(db.String, nullable=False)
-    golfer_id = db.Column(db.Integer, db.ForeignKey('golfer.golfer_id'), nullable=False)
-    teetime_id = db.Column(db.Integer, db.ForeignKey('teetime.teetime_id'), nullable=False)
+    golfer_id = db.Column(db.Integer, db.ForeignKey('golfer.golfer_id'), nullable=False, index=True)
+    # active_history: moving a comment loads the teetime it leaves, even when expired, so summary.py can take it
+    # off that teetime's comment count (the flush only reports old values that were loaded)
+    teetime_id = db.column_property(db.Column(db.Integer, db.ForeignKey('teetime.teetime_id'), nullable=False, index=True), active_history=True)
     teetime = db.relationship('Teetime', back_populates="golfer_comments")
     golfer = db.relationship('Golfer', back_populates='golfer_comments')
+    # ids of archived comments are never handed out again (archive.py)
+    __table_args__ = {'sqlite_autoincrement': True}
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -226,23 +358,289 @@ class Golfer_comment(db.Model):
     def __repr__(self):
         return f"<Comment {self.golfer_comment_id}>"
 
+    @classmethod
+    def bulk_create(cls, rows):
+        # rows are dicts of column values, inserted in chunks with a single commit, returns the new ids
+        return bulk_insert(cls, rows)
+
+    def save(self):
+        db.session.add(self)
+        commit()
+
+    def delete(self):
+        db.session.delete(self)
+        commit()
+
+    dict_columns = {
+        'id': 'golfer_comment_id',
+        'body': 'body',
+        'teetime_id': 'teetime_id'
+    }
+    dict_relationships = {
+        'golfer': 'golfer_id'
+    }
+
+    def to_dict(self, fields=None, included=None):
+        if included is None:
+            included = Included()
+        data = columns_dict(self, fields)
+        if fields is None or 'golfer' in fields:
+            data['golfer'] = included.nested('golfers', self.golfer)
+        return data
+
+    @staticmethod
+    def eager_options(fields=None):
+        return [selectinload(Golfer_comment.golfer)] if fields is None or 'golfer' in fields else []
+
+
+def latest_comments(teetime_model, comment_model):
+    # relationship to the TEETIME_LATEST_COMMENTS newest comments of a teetime: a correlated ORDER BY .. LIMIT per
+    # teetime, which reads just those few entries of the teetime_id index however many comments a teetime has
+    newest = comment_model.__table__.alias()
+    newest_ids = (
+        db.select(newest.c.golfer_comment_id)
+        .where(newest.c.teetime_id == teetime_model.teetime_id)
+        .order_by(newest.c.golfer_comment_id.desc())
+        .limit(app.config['TEETIME_LATEST_COMMENTS'])
+    )
+    return db.relationship(
+        comment_model,
+        primaryjoin=db.and_(comment_model.teetime_id == teetime_model.teetime_id, comment_model.golfer_comment_id.in_(newest_ids)),
+        order_by=comment_model.golfer_comment_id.desc(),
+        viewonly=True,
+    )
+
+
+def comment_count(teetime_model, comment_model):
+    # an index only count per row of a teetime query
+    return db.column_property(
+        db.select(func.count()).where(comment_model.teetime_id == teetime_model.teetime_id).correlate_except(comment_model).scalar_subquery()
+    )
+
+
+Teetime.latest_comments = latest_comments(Teetime, Golfer_comment)
+Teetime.comment_count = comment_count(Teetime, Golfer_comment)
+
+
+class Booking(db.Model):
+    booking_id = db.Column(db.Integer, primary_key=True)
+    spots = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    golfer_id = db.Column(db.Integer, db.ForeignKey('golfer.golfer_id'), nullable=False, index=True)
+    teetime_id = db.Column(db.Integer, db.ForeignKey('teetime.teetime_id'), nullable=False, index=True)
+    golfer = db.relationship('Golfer', back_populates='bookings')
+    teetime = db.relationship('Teetime', back_populates='bookings')
+    # ids of archived bookings are never handed out again (archive.py)
+    __table_args__ = {'sqlite_autoincrement': True}
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.save()
+
+    def __repr__(self):
+        return f"<Booking {self.booking_id}|{self.teetime_id}|{self.spots}>"
+
+    @classmethod
+    def bulk_create(cls, rows):
+        # rows are dicts of column values, inserted in chunks with a single commit, returns the new ids
+        return bulk_insert(cls, rows)
+
     def save(self):
         db.session.add(self)
-        db.session.commit()
+        commit()
 
     def delete(self):
         db.session.delete(self)
-        db.session.commit()
+        commit()
+
+    @staticmethod
+    def cancel(booking_id):
+        # a single DELETE .. RETURNING so concurrent cancels of one booking give its spots back only once,
+        # False when it was already gone
+        row = db.session.execute(
+            db.delete(Booking).where(Booking.booking_id == booking_id).returning(Booking.teetime_id, Booking.spots)
+        ).one_or_none()
+        if row is None:
+            return False
+        Teetime.release(row.teetime_id, row.spots)
+        commit()
+        return True
 
     def to_dict(self):
         return {
-            'id': self.golfer_comment_id,
-            'body': self.body,
+            'booking_id': self.booking_id,
             'teetime_id': self.teetime_id,
-            'golfer': self.golfer.to_dict()
+            'golfer_id': self.golfer_id,
+            'spots': self.spots,
+            'created_at': self.created_at
         }
 
 
-    
+class Teetime_summary(db.Model):
+    # read model: one row per teetime with its course's and host's display fields and its comment count, written
+    # only by summary.py (kept in sync from the source tables) so listings read a single table
+    teetime_id = db.Column(db.Integer, primary_key=True)
+    course_id = db.Column(db.Integer, nullable=True, index=True)
+    golfer_id = db.Column(db.Integer, nullable=False, index=True)
+    course_name = db.Column(db.String, nullable=False)
+    price = db.Column(db.Integer, nullable=False)
+    teetime_date = db.Column(db.String, nullable=False)
+    teetime_time = db.Column(db.String, nullable=False)
+    space_remaining = db.Column(db.Integer, nullable=False)
+    starts_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    start_minute = db.Column(db.Integer, nullable=True)
+    # the course's (null without one)
+    city = db.Column(db.String, nullable=True)
+    district = db.Column(db.String, nullable=True)
+    country = db.Column(db.String, nullable=True)
+    par = db.Column(db.Integer, nullable=True)
+    rating = db.Column(db.Float, nullable=True)
+    strict_dress = db.Column(db.Boolean, nullable=True)
+    # the host golfer's
+    host_username = db.Column(db.String, nullable=True)
+    host_first_name = db.Column(db.String, nullable=True)
+    host_last_name = db.Column(db.String, nullable=True)
+    host_handicap = db.Column(db.Float, nullable=True)
+    comment_count = db.Column(db.Integer, nullable=False, default=0)
+    # start time ordered scans of /teetimes/discover (and start time ranges of /teetimes/summary), on their own or
+    # within a location
+    __table_args__ = (
+        db.Index('ix_teetime_summary_starts_at_id', 'starts_at', 'teetime_id'),
+        db.Index('ix_teetime_summary_location_starts_at', 'city', 'district', 'country', 'starts_at', 'teetime_id'),
+    )
+
+    def __repr__(self):
+        return f"<Teetime_summary {self.teetime_id}|{self.course_name}|{self.comment_count}>"
+
+    @staticmethod
+    def add_spots(teetime_id, spots):
+        db.session.execute(
+            db.update(Teetime_summary)
+            .where(Teetime_summary.teetime_id == teetime_id)
+            .values(space_remaining=Teetime_summary.space_remaining + spots)
+        )
+
+    # to_dict key -> column attribute, also used to leave unrequested columns out of the SELECT for ?fields=
+    dict_columns = {
+        "teetime_id": "teetime_id",
+        "course_id": "course_id",
+        "golfer_id": "golfer_id",
+        "course_name": "course_name",
+        "price": "price",
+        "teetime_date": "teetime_date",
+        "teetime_time": "teetime_time",
+        "starts_at": "starts_at",
+        "space_remaining": "space_remaining",
+        "city": "city",
+        "district": "district",
+        "country": "country",
+        "par": "par",
+        "rating": "rating",
+        "strict_dress": "strict_dress",
+        "host_username": "host_username",
+        "host_first_name": "host_first_name",
+        "host_last_name": "host_last_name",
+        "host_handicap": "host_handicap",
+        "comment_count": "comment_count"
+    }
+
+    def to_dict(self, fields=None):
+        return columns_dict(self, fields)
+
+
+# Archive tables: tee times that started more than ARCHIVE_AFTER_DAYS ago, with their comments and bookings, are
+# moved here by archive.py so the hot tables only hold recent and upcoming ones. Same columns and ids as the hot
+# rows plus when they were archived, read by ?include_archived=1.
+
+class Teetime_archive(db.Model):
+    teetime_id = db.Column(db.Integer, primary_key=True)
+    course_name = db.Column(db.String, nullable=False)
+    price = db.Column(db.Integer, nullable=False)
+    teetime_date = db.Column(db.String, nullable=False)
+    teetime_time = db.Column(db.String, nullable=False)
+    space_remaining = db.Column(db.Integer, nullable=False)
+    starts_at = db.Column(db.DateTime(timezone=True), nullable=True, index=True)
+    start_minute = db.Column(db.Integer, nullable=True)
+    golfer_id = db.Column(db.Integer, db.ForeignKey('golfer.golfer_id'), nullable=False, index=True)
+    course_id = db.Column(db.Integer, db.ForeignKey('course.course_id'), nullable=True, index=True)
+    archived_at = db.Column(db.DateTime(timezone=True), nullable=False)
+    golfer = db.relationship("Golfer", viewonly=True)
+    course = db.relationship("Course", viewonly=True)
+    golfer_comments = db.relationship("Golfer_comment_archive", back_populates='teetime')
+
+    def __repr__(self):
+        return f"<Teetime_archive {self.teetime_id}|{self.course_name}|{self.teetime_date}|{self.teetime_time}>"
+
+    # same documents as the hot teetimes, plus when they were archived
+    dict_columns = {**Teetime.dict_columns, "archived_at": "archived_at"}
+    dict_relationships = Teetime.dict_relationships
+    to_dict = Teetime.to_dict
+
+    @staticmethod
+    def eager_options(fields=None):
+        options = []
+        if fields is None or "course_details" in fields:
+            options.append(selectinload(Teetime_archive.course))
+        if fields is None or "golfer" in fields:
+            options.append(selectinload(Teetime_archive.golfer))
+        if fields is None or "golfer_comments" in fields:
+            options.append(selectinload(Teetime_archive.latest_comments).selectinload(Golfer_comment_archive.golfer))
+        return options
+
+
+class Golfer_comment_archive(db.Model):
+    golfer_comment_id = db.Column(db.Integer, primary_key=True)
+    body = db.Column(db.String, nullable=False)
+    golfer_id = db.Column(db.Integer, db.ForeignKey('golfer.golfer_id'), nullable=False, index=True)
+    teetime_id = db.Column(db.Integer, db.ForeignKey('teetime_archive.teetime_id'), nullable=False, index=True)
+    archived_at = db.Column(db.DateTime(timezone=True), nullable=False)
+    teetime = db.relationship('Teetime_archive', back_populates="golfer_comments")
+    golfer = db.relationship('Golfer', viewonly=True)
 
-	
+    def __repr__(self):
+        return f"<Comment_archive {self.golfer_comment_id}>"
+
+    dict_columns = Golfer_comment.dict_columns
+    dict_relationships = Golfer_comment.dict_relationships
+    to_dict = Golfer_comment.to_dict
+
+    @staticmethod
+    def eager_options(fields=None):
+        return [selectinload(Golfer_comment_archive.golfer)] if fields is None or 'golfer' in fields else []
+
+
+Teetime_archive.latest_comments = latest_comments(Teetime_archive, Golfer_comment_archive)
+Teetime_archive.comment_count = comment_count(Teetime_archive, Golfer_comment_archive)
+
+
+class Booking_archive(db.Model):
+    booking_id = db.Column(db.Integer, primary_key=True)
+    spots = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False)
+    golfer_id = db.Column(db.Integer, db.ForeignKey('golfer.golfer_id'), nullable=False, index=True)
+    teetime_id = db.Column(db.Integer, db.ForeignKey('teetime_archive.teetime_id'), nullable=False, index=True)
+    archived_at = db.Column(db.DateTime(timezone=True), nullable=False)
+
+    def __repr__(self):
+        return f"<Booking_archive {self.booking_id}|{self.teetime_id}|{self.spots}>"
+
+    to_dict = Booking.to_dict
+
+
+class Table_version(db.Model):
+    # bumped right after every commit that wrote to a table, feeds the ETags of the read endpoints (see versions.py)
+    table_name = db.Column(db.String, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<Table_version {self.table_name}|{self.version}>"
+
+
+class Job_lease(db.Model):
+    # one row per background job, the process holding an unexpired lease is the only one running it (see archive.py)
+    name = db.Column(db.String, primary_key=True)
+    holder = db.Column(db.String)
+    expires_at = db.Column(db.DateTime(timezone=True))
+
+    def __repr__(self):
+        return f"<Job_lease {self.name}|{self.holder}|{self.expires_at}>"
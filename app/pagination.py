@@ -0,0 +1,166 @@
+from operator import attrgetter
+from flask import request, Response, stream_with_context
+from sqlalchemy.orm import load_only
+from . import app, db
+from .serialization import Included
+
+
+# ?fields=a,b,c -> set of to_dict keys (None means everything)
+def parse_fields(model):
+    fields = request.args.get('fields')
+    if not fields:
+        return None
+    fields = {field.strip() for field in fields.split(',') if field.strip()}
+    allowed = set(model.dict_columns) | set(getattr(model, 'dict_relationships', {}))
+    unknown = fields - allowed
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(sorted(unknown))}")
+    return fields
+
+
+# ?limit=&cursor= -> (limit, cursor), limit is None when the client did not ask for pages
+def parse_page_args():
+    limit = request.args.get('limit')
+    cursor = request.args.get('cursor')
+    if limit is None and cursor is None:
+        return None, None
+    try:
+        limit = int(limit) if limit is not None else app.config['DEFAULT_PAGE_SIZE']
+        cursor = int(cursor) if cursor is not None else None
+    except ValueError:
+        raise ValueError('limit and cursor must be integers')
+    if limit < 1:
+        raise ValueError('limit must be at least 1')
+    return min(limit, app.config['MAX_PAGE_SIZE']), cursor
+
+
+# only SELECT the columns the requested fields (and their relationships) need
+def projection_options(model, fields):
+    if fields is None:
+        return []
+    columns = {model.__mapper__.primary_key[0].key}
+    columns.update(model.dict_columns[field] for field in fields if field in model.dict_columns)
+    columns.update(column for field, column in getattr(model, 'dict_relationships', {}).items() if field in fields)
+    return [load_only(*(getattr(model, column) for column in columns))]
+
+
+# ?stream=1 or Accept: application/x-ndjson -> one JSON object per line instead of one big list
+def wants_stream():
+    if request.args.get('stream') in ('1', 'true'):
+        return True
+    return request.accept_mimetypes.best == 'application/x-ndjson'
+
+
+# ?sideload=1 -> nested objects are replaced by their ids and listed once in an "included" section
+def wants_side_load():
+    return request.args.get('sideload') in ('1', 'true')
+
+
+# ?include_archived=1 -> the archive tables are read as well (see archive.py)
+def wants_archived():
+    return request.args.get('include_archived') in ('1', 'true')
+
+
+def serialize(rows, model, fields):
+    # -> (items, included sections or None); nested objects shared by several rows are only serialized once
+    if not hasattr(model, 'dict_relationships'):
+        return [row.to_dict(fields) for row in rows], None
+    included = Included(side_load=wants_side_load())
+    items = [row.to_dict(fields, included) for row in rows]
+    return items, included.sections() if included.side_load else None
+
+
+def page_body(items, next_cursor, included, paginated):
+    # a plain list when the client did not ask for pages (or side loading), otherwise an object
+    if included is None and not paginated:
+        return items
+    body = {'items': items}
+    if paginated:
+        body['next_cursor'] = next_cursor
+    if included is not None:
+        body['included'] = included
+    return body
+
+
+def stream_response(select_stmt, model, fields, limit=None):
+    # reads STREAM_CHUNK_SIZE rows at a time (keyset on the primary key, select_stmt is ordered by it) so memory
+    # stays flat; yield_per can not be combined with the selectin eager loads of a teetime's nested objects
+    key = model.__mapper__.primary_key[0]
+    chunk_size = app.config['STREAM_CHUNK_SIZE']
+
+    def generate():
+        remaining = limit
+        last = None
+        while remaining is None or remaining > 0:
+            size = chunk_size if remaining is None else min(chunk_size, remaining)
+            chunk_stmt = select_stmt if last is None else select_stmt.where(key > last)
+            rows = db.session.execute(chunk_stmt.limit(size)).scalars().all()
+            for row in rows:
+                yield app.json.dumps(row.to_dict(fields)) + '\n'
+            if len(rows) < size:
+                break
+            last = getattr(rows[-1], key.key)
+            if remaining is not None:
+                remaining -= len(rows)
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+def list_query(select_stmt, model):
+    # -> (select, fields, limit) with the projection, eager loads, order and cursor of the request applied
+    fields = parse_fields(model)
+    limit, cursor = parse_page_args()
+    select_stmt = select_stmt.options(*projection_options(model, fields))
+    if hasattr(model, 'eager_options'):
+        select_stmt = select_stmt.options(*model.eager_options(fields))
+    # keyset pagination on the primary key so deep pages cost the same as the first one
+    key = model.__mapper__.primary_key[0]
+    select_stmt = select_stmt.order_by(key)
+    if cursor is not None:
+        select_stmt = select_stmt.where(key > cursor)
+    return select_stmt, fields, limit
+
+
+def list_body(rows, model, fields, limit):
+    # rows were fetched with limit + 1, the extra one only tells there is a next page
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = getattr(rows[-1], model.__mapper__.primary_key[0].key)
+    items, included = serialize(rows, model, fields)
+    return page_body(items, next_cursor, included, limit is not None)
+
+
+def list_response(select_stmt, model):
+    try:
+        select_stmt, fields, limit = list_query(select_stmt, model)
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    if wants_stream():
+        return stream_response(select_stmt, model, fields, limit)
+    if limit is not None:
+        select_stmt = select_stmt.limit(limit + 1)
+    rows = db.session.execute(select_stmt).scalars().all()
+    return list_body(rows, model, fields, limit)
+
+
+def merged_list_response(parts):
+    # list_response over (select, model) pairs whose rows share one primary key sequence and one to_dict document
+    # (a table and its archive): each is read like a page of its own and the pages are merged in key order
+    if wants_stream():
+        return {'error': 'This listing can not be streamed'}, 400
+    try:
+        queries = [list_query(select_stmt, model) for select_stmt, model in parts]
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    rows = []
+    for select_stmt, fields, limit in queries:
+        if limit is not None:
+            select_stmt = select_stmt.limit(limit + 1)
+        rows.extend(db.session.execute(select_stmt).scalars().all())
+    model = parts[0][1]
+    _, fields, limit = queries[0]
+    rows.sort(key=attrgetter(model.__mapper__.primary_key[0].key))
+    if limit is not None:
+        rows = rows[:limit + 1]
+    return list_body(rows, model, fields, limit)
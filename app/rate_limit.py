@@ -0,0 +1,272 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from flask import g, request
+from . import app
+
+
+# Request rate limits and admission control, checked before any other work of a request (auth included).
+#
+# Every client gets a token bucket per policy: `requests` tokens that refill over `seconds`, each request
+# takes one and gets a 429 with Retry-After when the bucket is empty. Every request is charged to its IP
+# (request.remote_addr, run behind a proxy that sets it) before anything else runs, and once auth.py has
+# verified its credentials also to that golfer, whose bucket follows them across tokens and addresses.
+# Credentials are never trusted before they are verified: a made up token or username never buys a fresh
+# bucket. Routes pick a policy with @limit, the rest use "default"; "auth" (login, token and sign up,
+# where every request costs a password hash) is kept per claimed username and per IP, so neither guessing
+# one golfer's password from many addresses nor many golfers' from one address gets far.
+#
+# A bucket is a few numbers. The "memory" backend keeps them per worker process (limits are then per worker),
+# "sqlite" in a file every gunicorn worker on the machine shares, "none" turns rate limiting off. Buckets
+# that have refilled completely are dropped, a missing bucket is a full one.
+#
+# The admission gate caps the requests a worker process handles at once (ADMISSION_MAX_CONCURRENT, by default
+# the size of its database pool plus overflow): the next one gets a 503 right away instead of waiting
+# DB_POOL_TIMEOUT on an exhausted pool and holding a thread the whole time.
+
+class RateLimited(Exception):
+    def __init__(self, retry_after):
+        self.retry_after = retry_after
+
+
+class AdmissionRejected(Exception):
+    pass
+
+
+def parse_rate(value):
+    # "requests/seconds" -> (burst, tokens per second), "" or "0" -> None (no limit)
+    if not value or value.strip() == '0':
+        return None
+    requests, _, seconds = value.partition('/')
+    try:
+        requests, seconds = int(requests), float(seconds or 1)
+    except ValueError:
+        raise ValueError(f"Rate limits are written as requests/seconds (e.g. 100/60), not {value!r}")
+    if requests <= 0 or seconds <= 0:
+        raise ValueError(f"Rate limit {value!r} must have a positive number of requests and seconds")
+    return requests, requests / seconds
+
+
+class MemoryBackend:
+    name = 'memory'
+
+    def __init__(self, max_keys):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict() # key -> (tokens, monotonic time of the last take, time the bucket is full again)
+        self._lock = threading.Lock()
+
+    def take(self, key, burst, rate):
+        # -> seconds until a token is available, 0 when one was taken
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated, _ = self._buckets.pop(key, (burst, now, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+            # least recently used first: drop the ones that are full again, and the oldest past max_keys
+            while self._buckets:
+                oldest, (_, _, full_at) = next(iter(self._buckets.items()))
+                if full_at > now and len(self._buckets) <= self.max_keys:
+                    break
+                del self._buckets[oldest]
+            return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'backend': self.name, 'keys': len(self._buckets), 'max_keys': self.max_keys}
+
+
+class SQLiteBackend:
+    name = 'sqlite'
+
+    # refill, take a token when there is one and write the bucket back in one atomic statement
+    TAKE = """
+        INSERT INTO rate_bucket (key, tokens, updated, full_at, allowed) VALUES (:key, :burst - 1, :now, :now + 1 / :rate, 1)
+        ON CONFLICT (key) DO UPDATE SET
+            allowed = min(:burst, tokens + (:now - updated) * :rate) >= 1,
+            tokens = min(:burst, tokens + (:now - updated) * :rate) - (min(:burst, tokens + (:now - updated) * :rate) >= 1),
+            updated = :now,
+            full_at = :now + (:burst - min(:burst, tokens + (:now - updated) * :rate) + (min(:burst, tokens + (:now - updated) * :rate) >= 1)) / :rate
+        RETURNING tokens, allowed
+    """
+    # seconds between deletes of the buckets that are full again
+    PURGE_INTERVAL = 60
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._purged_at = 0.0
+        self._connection().execute(
+            'CREATE TABLE IF NOT EXISTS rate_bucket (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, '
+            'full_at REAL NOT NULL, allowed INTEGER NOT NULL) WITHOUT ROWID'
+        )
+
+    def _connection(self):
+        # one connection per thread (and per process, gunicorn forks after import)
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=OFF') # losing the last buckets in a crash only resets them
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def take(self, key, burst, rate):
+        now = time.time() # wall clock, shared between processes
+        connection = self._connection()
+        tokens, allowed = connection.execute(self.TAKE, {'key': key, 'burst': burst, 'rate': rate, 'now': now}).fetchone()
+        if now - self._purged_at > self.PURGE_INTERVAL:
+            self._purged_at = now
+            connection.execute('DELETE FROM rate_bucket WHERE full_at <= ?', (now,))
+        return 0.0 if allowed else (1 - tokens) / rate
+
+    def clear(self):
+        self._connection().execute('DELETE FROM rate_bucket')
+
+    def stats(self):
+        keys = self._connection().execute('SELECT count(*) FROM rate_bucket').fetchone()[0]
+        return {'backend': self.name, 'keys': keys}
+
+
+class NullBackend:
+    name = 'none'
+
+    def take(self, key, burst, rate):
+        return 0.0
+
+    def clear(self):
+        pass
+
+    def stats(self):
+        return {'backend': self.name}
+
+
+def create_backend(config):
+    backend = config['RATE_LIMIT_BACKEND']
+    if backend == 'memory':
+        return MemoryBackend(config['RATE_LIMIT_MAX_KEYS'])
+    if backend == 'sqlite':
+        return SQLiteBackend(config['RATE_LIMIT_PATH'])
+    if backend == 'none':
+        return NullBackend()
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND {backend!r}, use memory, sqlite or none")
+
+
+def admission_limit(config):
+    limit = config['ADMISSION_MAX_CONCURRENT']
+    if limit is None:
+        # every request may need a connection, the pool gives out at most pool_size + max_overflow of them
+        options = config['SQLALCHEMY_ENGINE_OPTIONS']
+        limit = options.get('pool_size', 0) + options.get('max_overflow', 0) if 'pool_size' in options else 0
+    return limit
+
+
+backend = create_backend(app.config)
+# policy name -> (burst, tokens per second) or None
+policies = {name: parse_rate(value) for name, value in app.config['RATE_LIMITS'].items()}
+_admission_limit = admission_limit(app.config)
+
+_lock = threading.Lock()
+counters = {
+    'in_flight': 0, # requests past the admission gate right now
+    'rate_limited': 0, # requests answered with a 429
+    'admission_rejected': 0, # requests answered with a 503 by the admission gate
+}
+
+
+def count(name):
+    with _lock:
+        counters[name] += 1
+
+
+def admit():
+    with _lock:
+        if counters['in_flight'] >= _admission_limit:
+            counters['admission_rejected'] += 1
+            return False
+        counters['in_flight'] += 1
+        return True
+
+
+def limit(policy):
+    # route decorator: rate limit the view with this RATE_LIMITS policy, None exempts it from rate limits and the
+    # admission gate (monitoring endpoints, which have to answer when the app is overloaded)
+    def decorator(view):
+        view.rate_limit_policy = policy
+        return view
+    return decorator
+
+
+def client_keys(policy):
+    # the buckets charged before auth: always the address, for "auth" also the username tried
+    auth = request.authorization
+    ip = f'ip:{request.remote_addr}'
+    if policy == 'auth' and auth is not None and auth.type == 'basic' and auth.username:
+        return [f'user:{auth.username}', ip]
+    return [ip]
+
+
+def charge(policy, keys):
+    # every bucket is charged so the busiest key decides
+    wait = max(backend.take(f'{policy}:{key}', *policies[policy]) for key in keys)
+    if wait > 0:
+        count('rate_limited')
+        raise RateLimited(math.ceil(wait))
+
+
+@app.before_request
+def check_limits():
+    view = app.view_functions.get(request.endpoint)
+    policy = getattr(view, 'rate_limit_policy', 'default')
+    if policy is None:
+        return
+    if policies.get(policy) is not None:
+        charge(policy, client_keys(policy))
+        g.rate_limit_policy = policy
+    if _admission_limit > 0:
+        if not admit():
+            raise AdmissionRejected()
+        g.admitted = True
+
+
+def charge_golfer(golfer):
+    # called by auth.py once a request's credentials are verified ("auth" requests already paid per username)
+    policy = g.get('rate_limit_policy')
+    if policy is not None and policy != 'auth':
+        charge(policy, [f'golfer:{golfer.golfer_id}'])
+
+
+@app.teardown_request
+def release_admission(exception):
+    # teardown runs once the response is sent (after the last chunk of a streamed one)
+    if g.pop('admitted', False):
+        with _lock:
+            counters['in_flight'] -= 1
+
+
+def stats():
+    with _lock:
+        numbers = dict(counters)
+    return {**backend.stats(), 'admission_limit': _admission_limit, **numbers}
+
+
+@app.errorhandler(RateLimited)
+def handle_rate_limited(e):
+    return {'error': f"Too many requests. Please try again in {e.retry_after} seconds"}, 429, {'Retry-After': str(e.retry_after)}
+
+
+@app.errorhandler(AdmissionRejected)
+def handle_admission_rejected(e):
+    return {'error': 'The server is busy. Please try again shortly'}, 503, {'Retry-After': '1'}
@@ -0,0 +1,544 @@
+import threading
+import time
+from datetime import timezone
+import numpy as np
+from sqlalchemy import event, exc
+from . import app, db
+from .models import Golfer, Course, Teetime, Booking
+from .pagination import parse_fields, parse_page_args, projection_options, serialize, page_body
+from .schedule import upcoming
+from .unit_of_work import on_bulk_insert, on_bulk_delete
+from .versions import versions_select, on_bump
+
+
+# Tee time recommendations (GET /teetimes/recommended): open tee times ranked by how well their host matches
+# the golfer asking. Every worker keeps the scoring inputs in memory as NumPy columns: per golfer (indexed by
+# golfer_id) handicap, lifestyle flags, tees and location, per course (by course_id) its location and one row
+# per tee time with its host and course. Ranking all tee times is a handful of vectorized operations plus an
+# argpartition, and only the top candidates are loaded from the database, where full tee times, the golfer's
+# own, the ones they already booked and the ones that already started are filtered out.
+#
+# The index is built on first use and then kept up to date from the session: inserts, updates and deletes of
+# golfers, courses and teetimes (bulk inserts included) are applied right after they are committed, and the
+# versions those commits bump are followed along. Only writes of other worker processes leave the table
+# versions ahead of the index's, they are picked up by a rebuild in the background, at most every
+# RECOMMENDATIONS_REFRESH_SECONDS.
+
+TABLES = ('golfer', 'course', 'teetime')
+
+# yes/no golfer attributes, compared host against golfer (unknown on either side counts half)
+FLAGS = ('alcohol', 'legal_drugs', 'smoker', 'gambler', 'music', 'right_handed')
+
+WEIGHTS = {
+    'handicap': 3.0, # 1 for the same handicap down to 0 at HANDICAP_SPREAD strokes apart
+    'alcohol': 1.0,
+    'legal_drugs': 1.0,
+    'smoker': 1.0,
+    'gambler': 1.0,
+    'music': 0.5,
+    'right_handed': 0.25,
+    'tees': 1.0,
+    # where the tee time is (the course, or the host when it has none) against where the golfer lives,
+    # only the closest match counts
+    'city': 4.0,
+    'district': 2.0,
+    'country': 1.0,
+}
+HANDICAP_SPREAD = 20.0
+MAX_SCORE = sum(weight for key, weight in WEIGHTS.items() if key not in ('district', 'country'))
+
+# candidates ranked per round trip, as a multiple of the page size (some get filtered out by the database)
+OVERFETCH = 4
+
+GOLFER_COLUMNS = ('golfer_id', 'handicap', 'tees', 'city', 'district', 'country', *FLAGS)
+COURSE_COLUMNS = ('course_id', 'city', 'district', 'country')
+TEETIME_COLUMNS = ('teetime_id', 'golfer_id', 'course_id', 'starts_at')
+MODEL_COLUMNS = {Golfer: GOLFER_COLUMNS, Course: COURSE_COLUMNS, Teetime: TEETIME_COLUMNS}
+
+
+# per golfer features, copied onto each of their tee times so scoring reads contiguous columns only
+HOST_FEATURES = {
+    'handicap': (np.float32, np.nan),
+    'flag_values': (np.uint8, 0), # bit per FLAGS entry: yes
+    'flag_known': (np.uint8, 0), # bit per FLAGS entry: answered
+    'tees': (np.int32, 0),
+}
+# where the tee time is: the course's location, or the host's when it has no (known) course
+LOCATION_LEVELS = ('country', 'district', 'city')
+LOCATION = {level: (np.int32, 0) for level in LOCATION_LEVELS}
+
+
+def flag_scores():
+    # weighted flag similarity for every (agreeing bits, unknown bits) pair, indexed by agree | unknown << len(FLAGS)
+    weights = np.array([WEIGHTS[name] for name in FLAGS], np.float32)
+    bits = (np.arange(1 << 2 * len(FLAGS))[:, None] >> np.arange(2 * len(FLAGS))) & 1
+    return (bits[:, :len(FLAGS)] @ weights + 0.5 * bits[:, len(FLAGS):] @ weights).astype(np.float32)
+
+
+FLAG_SCORES = flag_scores()
+ALL_FLAGS = (1 << len(FLAGS)) - 1
+
+
+class Vocabulary(dict):
+    # hashable key -> small int code, 0 for unknown
+    def code(self, key):
+        if key is None:
+            return 0
+        code = self.get(key)
+        if code is None:
+            code = self[key] = len(self) + 1
+        return code
+
+
+def normalize(value):
+    if value is None:
+        return None
+    value = str(value).strip().lower()
+    return value or None
+
+
+class IdColumns:
+    # numpy columns indexed directly by id (golfer and course ids are dense), present marks the live rows
+    def __init__(self, spec):
+        self.spec = spec # name -> (dtype, fill)
+        self.columns = {name: np.full(0, fill, dtype) for name, (dtype, fill) in spec.items()}
+        self.present = np.zeros(0, bool)
+
+    def reserve(self, max_id):
+        size = len(self.present)
+        if max_id < size:
+            return
+        new_size = max(max_id + 1, size * 2, 1024)
+        for name, (dtype, fill) in self.spec.items():
+            grown = np.full(new_size, fill, dtype)
+            grown[:size] = self.columns[name]
+            self.columns[name] = grown
+        present = np.zeros(new_size, bool)
+        present[:size] = self.present
+        self.present = present
+
+    def set(self, ids, values):
+        self.reserve(int(ids.max()))
+        for name, column in values.items():
+            self.columns[name][ids] = column
+        self.present[ids] = True
+
+    def delete(self, ids):
+        ids = ids[ids < len(self.present)]
+        for name, (dtype, fill) in self.spec.items():
+            self.columns[name][ids] = fill
+        self.present[ids] = False
+
+
+class Rows:
+    # dense numpy columns with one row per key, a delete moves the last row into the gap
+    def __init__(self, spec, key):
+        self.spec = spec # name -> (dtype, fill)
+        self.key = key
+        self.columns = {name: np.full(0, fill, dtype) for name, (dtype, fill) in spec.items()}
+        self.positions = {} # key -> row
+        self.count = 0
+
+    def _reserve(self, count):
+        size = len(self.columns[self.key])
+        if count <= size:
+            return
+        new_size = max(count, size * 2, 1024)
+        for name, (dtype, fill) in self.spec.items():
+            grown = np.full(new_size, fill, dtype)
+            grown[:self.count] = self.columns[name][:self.count]
+            self.columns[name] = grown
+
+    def set(self, values):
+        # upserts by key, returns the rows written
+        keys = values[self.key]
+        rows = np.empty(len(keys), np.int64)
+        new = 0
+        for i, key in enumerate(keys.tolist()):
+            row = self.positions.get(key)
+            if row is None:
+                row = self.positions[key] = self.count + new
+                new += 1
+            rows[i] = row
+        self._reserve(self.count + new)
+        self.count += new
+        for name, column in values.items():
+            self.columns[name][rows] = column
+        return rows
+
+    def delete(self, keys):
+        for key in keys.tolist():
+            row = self.positions.pop(key, None)
+            if row is None:
+                continue
+            last = self.count - 1
+            if row != last:
+                for column in self.columns.values():
+                    column[row] = column[last]
+                self.positions[int(self.columns[self.key][row])] = row
+            self.count = last
+
+    def view(self, name):
+        return self.columns[name][:self.count]
+
+
+class IndexData:
+    # one consistent copy of the scoring inputs, changes are applied in place under RecommendationIndex.lock
+    def __init__(self):
+        self.vocabulary = Vocabulary()
+        self.places = {} # raw (country, district, city) -> their codes, most golfers share a few places
+        self.golfers = IdColumns({**HOST_FEATURES, **LOCATION})
+        self.courses = IdColumns(LOCATION)
+        self.teetimes = Rows({
+            'teetime_id': (np.int64, 0),
+            'golfer_id': (np.int64, 0),
+            'course_id': (np.int64, 0),
+            'starts_at': (np.float64, np.inf), # unix time, never past when unknown
+            **HOST_FEATURES,
+            **LOCATION,
+        }, 'teetime_id')
+
+    def place(self, country, district, city):
+        # codes of the country, (country, district) and (country, district, city) so equal names elsewhere differ
+        codes = self.places.get((country, district, city))
+        if codes is None:
+            code = self.vocabulary.code
+            country, district, city = normalize(country), normalize(district), normalize(city)
+            codes = self.places[(country, district, city)] = (
+                code(country and ('country', country)),
+                code(country and district and ('district', country, district)),
+                code(country and district and city and ('city', country, district, city)),
+            )
+        return codes
+
+    def locations(self, countries, districts, cities):
+        codes = np.array([self.place(*place) for place in zip(countries, districts, cities)], np.int32).reshape(-1, 3)
+        return {level: codes[:, i] for i, level in enumerate(LOCATION_LEVELS)}
+
+    def golfer_features(self, rows):
+        # rows are GOLFER_COLUMNS tuples -> (ids, column values)
+        ids, handicaps, tees, cities, districts, countries, *flags = zip(*rows)
+        values = self.locations(countries, districts, cities)
+        values['handicap'] = np.array(handicaps, np.float32) # None -> nan
+        values['tees'] = np.array([self.vocabulary.code(normalize(tee) and ('tees', normalize(tee))) for tee in tees], np.int32)
+        values['flag_values'] = np.zeros(len(rows), np.uint8)
+        values['flag_known'] = np.zeros(len(rows), np.uint8)
+        for bit, column in enumerate(flags):
+            column = np.array(column, dtype=object)
+            values['flag_values'] |= column.astype(bool).astype(np.uint8) << bit
+            values['flag_known'] |= np.not_equal(column, None).astype(np.uint8) << bit
+        return np.array(ids, np.int64), values
+
+    def _refresh(self, rows):
+        # copy the host's features and the tee time's location onto these teetime rows
+        columns = self.teetimes.columns
+        hosts = columns['golfer_id'][rows]
+        course_ids = columns['course_id'][rows]
+        for name in HOST_FEATURES:
+            columns[name][rows] = self.golfers.columns[name][hosts]
+        at_course = self.courses.present[course_ids]
+        for level in LOCATION_LEVELS:
+            columns[level][rows] = np.where(at_course, self.courses.columns[level][course_ids], self.golfers.columns[level][hosts])
+
+    def _refresh_referencing(self, column, ids):
+        rows = np.flatnonzero(np.isin(self.teetimes.view(column), ids))
+        if len(rows):
+            self._refresh(rows)
+
+    def apply(self, table, rows, deleted):
+        # rows: upserted *_COLUMNS tuples, deleted: primary keys
+        if table == 'golfer':
+            if rows:
+                ids, values = self.golfer_features(rows)
+                self.golfers.set(ids, values)
+                self._refresh_referencing('golfer_id', ids)
+            if deleted:
+                self.golfers.delete(np.array(deleted, np.int64))
+                self._refresh_referencing('golfer_id', deleted)
+        elif table == 'course':
+            if rows:
+                ids, cities, districts, countries = zip(*rows)
+                ids = np.array(ids, np.int64)
+                self.courses.set(ids, self.locations(countries, districts, cities))
+                self._refresh_referencing('course_id', ids)
+            if deleted:
+                self.courses.delete(np.array(deleted, np.int64))
+                self._refresh_referencing('course_id', deleted)
+        elif table == 'teetime':
+            if rows:
+                teetime_ids, golfer_ids, course_ids, starts = zip(*rows)
+                golfer_ids = np.array(golfer_ids, np.int64)
+                course_ids = np.array([course_id or 0 for course_id in course_ids], np.int64)
+                # referenced ids must be inside the golfer and course columns, a gather out of range would fail
+                self.golfers.reserve(int(golfer_ids.max()))
+                self.courses.reserve(int(course_ids.max()))
+                self._refresh(self.teetimes.set({
+                    'teetime_id': np.array(teetime_ids, np.int64),
+                    'golfer_id': golfer_ids,
+                    'course_id': course_ids,
+                    'starts_at': np.array([timestamp(start) for start in starts], np.float64),
+                }))
+            if deleted:
+                self.teetimes.delete(np.array(deleted, np.int64))
+
+    def scores(self, golfer):
+        # compatibility of every tee time with `golfer` (a Golfer), same order as the teetime rows
+        _, mine = self.golfer_features([tuple(getattr(golfer, column) for column in GOLFER_COLUMNS)])
+        teetimes = self.teetimes
+
+        similarity = np.clip(1 - np.abs(teetimes.view('handicap') - mine['handicap'][0]) / HANDICAP_SPREAD, 0, 1)
+        score = WEIGHTS['handicap'] * np.where(np.isnan(similarity), np.float32(0.5), similarity)
+
+        both = teetimes.view('flag_known') & mine['flag_known'][0]
+        agree = ~(teetimes.view('flag_values') ^ mine['flag_values'][0]) & both
+        score += FLAG_SCORES[agree | (~both & ALL_FLAGS).astype(np.uint16) << len(FLAGS)]
+
+        tees = teetimes.view('tees')
+        my_tees = mine['tees'][0]
+        if my_tees:
+            score += WEIGHTS['tees'] * np.where(tees == 0, np.float32(0.5), tees == my_tees)
+        else:
+            score += WEIGHTS['tees'] * 0.5
+
+        # only the closest match counts: same city beats same district beats same country
+        location = np.zeros(teetimes.count, np.float32)
+        for level in LOCATION_LEVELS:
+            code = mine[level][0]
+            if code:
+                location[teetimes.view(level) == code] = WEIGHTS[level]
+        score += location
+
+        score /= MAX_SCORE
+        # never the golfer's own tee times, or ones that already started
+        score[teetimes.view('golfer_id') == golfer.golfer_id] = -np.inf
+        score[teetimes.view('starts_at') < time.time()] = -np.inf
+        return score
+
+    def top(self, golfer, count):
+        # -> (teetime ids, compatibility) of the `count` best tee times, best first (ties by teetime_id)
+        score = self.scores(golfer)
+        teetime_ids = self.teetimes.view('teetime_id')
+        count = min(count, int(np.isfinite(score).sum()))
+        if count == 0:
+            return np.zeros(0, np.int64), np.zeros(0, np.float32)
+        # argpartition splits ties at the boundary arbitrarily, take all of them so pages follow one total order
+        threshold = score[np.argpartition(-score, count - 1)[count - 1]]
+        best = np.flatnonzero(score >= threshold)
+        best = best[np.lexsort((teetime_ids[best], -score[best]))][:count]
+        return teetime_ids[best], score[best]
+
+
+def timestamp(moment):
+    # starts_at -> unix time, sqlite hands it back without its time zone (UTC)
+    if moment is None:
+        return np.inf
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def load(connection, table, ids=None):
+    # *_COLUMNS tuples of a table's rows (only `ids` when given)
+    model = {'golfer': Golfer, 'course': Course, 'teetime': Teetime}[table]
+    select_stmt = db.select(*(getattr(model, column) for column in MODEL_COLUMNS[model]))
+    if ids is not None:
+        select_stmt = select_stmt.where(model.__mapper__.primary_key[0].in_(list(ids)))
+    return [tuple(row) for row in connection.execute(select_stmt)]
+
+
+def table_versions(connection):
+    return dict(connection.execute(versions_select(TABLES)).all())
+
+
+class RecommendationIndex:
+    def __init__(self):
+        self.data = None
+        self.versions = None # table versions the data is up to date with
+        self.own_versions = set() # (table, version) bumped by this process's commits, not yet reached
+        self.checked_at = None
+        self.lock = threading.Lock() # guards data
+        self.replay = None # changes committed while a rebuild runs, applied to the new data before the swap
+        self._building = threading.Lock()
+
+    def build(self):
+        started = time.perf_counter()
+        with self.lock:
+            self.replay = []
+        data = IndexData()
+        try:
+            with db.engine.connect() as connection:
+                # versions first: a write landing while the tables are read makes them look stale, never fresh
+                versions = table_versions(connection)
+                for table in TABLES:
+                    data.apply(table, load(connection, table), None)
+        except:
+            with self.lock:
+                self.replay = None
+            raise
+        with self.lock:
+            for change in self.replay:
+                data.apply(*change)
+            self.replay = None
+            self.data, self.versions = data, versions
+            self._follow_own_versions()
+        self.checked_at = time.monotonic()
+        app.logger.info('recommendation index built: %d golfers, %d teetimes in %.2fs',
+                        int(data.golfers.present.sum()), data.teetimes.count, time.perf_counter() - started)
+
+    def own_bump(self, versions):
+        # versions bumped by this process's commits, whose changes apply_changes applies
+        with self.lock:
+            self.own_versions.update((table, version) for table, version in versions.items() if table in TABLES)
+            self._follow_own_versions()
+
+    def _follow_own_versions(self):
+        # advance through consecutive own versions, a gap is another process's write and keeps a rebuild due
+        if self.versions is None:
+            return
+        for table in TABLES:
+            while (table, self.versions[table] + 1) in self.own_versions:
+                self.versions[table] += 1
+        self.own_versions = {(table, version) for table, version in self.own_versions if version > self.versions[table]}
+
+    def apply(self, changes):
+        with self.lock:
+            if self.replay is not None:
+                self.replay.extend(changes)
+            if self.data is not None:
+                for change in changes:
+                    self.data.apply(*change)
+
+    def ensure_fresh(self):
+        # built on first use (blocking), afterwards rebuilt in the background when another process wrote
+        if self.data is None:
+            with self._building:
+                if self.data is None:
+                    self.build()
+            return
+        interval = app.config['RECOMMENDATIONS_REFRESH_SECONDS']
+        if interval <= 0 or time.monotonic() - self.checked_at < interval or not self._building.acquire(blocking=False):
+            return
+        try:
+            self.checked_at = time.monotonic()
+            if table_versions(db.session) == self.versions:
+                self._building.release()
+                return
+        except:
+            self._building.release()
+            raise
+        threading.Thread(target=self._rebuild, daemon=True).start()
+
+    def _rebuild(self):
+        try:
+            with app.app_context():
+                self.build()
+        except exc.SQLAlchemyError:
+            app.logger.exception('could not rebuild the recommendation index')
+        finally:
+            self._building.release()
+
+    def top(self, golfer, count):
+        with self.lock:
+            return self.data.top(golfer, count)
+
+
+index = RecommendationIndex()
+on_bump(index.own_bump)
+
+
+# incremental maintenance: changed rows are collected per transaction and applied once it commits
+
+def _values(obj):
+    return tuple(getattr(obj, column) for column in MODEL_COLUMNS[type(obj)])
+
+
+def _changed(obj):
+    state = db.inspect(obj)
+    return any(state.attrs[column].history.has_changes() for column in MODEL_COLUMNS[type(obj)])
+
+
+@event.listens_for(db.session, 'after_flush')
+def collect_changes(session, flush_context):
+    changes = []
+    for obj in session.new | session.dirty:
+        if type(obj) in MODEL_COLUMNS and (obj in session.new or _changed(obj)):
+            changes.append((obj.__table__.name, [_values(obj)], None))
+    for obj in session.deleted:
+        if type(obj) in MODEL_COLUMNS:
+            changes.append((obj.__table__.name, None, [db.inspect(obj).identity[0]]))
+    if changes:
+        session.info.setdefault('recommendation_changes', []).extend(changes)
+
+
+def collect_bulk_insert(table):
+    def listener(connection, ids):
+        db.session.info.setdefault('recommendation_changes', []).append((table, load(connection, table, ids), None))
+    return listener
+
+
+def collect_bulk_delete(table):
+    def listener(connection, ids):
+        db.session.info.setdefault('recommendation_changes', []).append((table, None, list(ids)))
+    return listener
+
+
+for model in MODEL_COLUMNS:
+    on_bulk_insert(model)(collect_bulk_insert(model.__table__.name))
+    on_bulk_delete(model)(collect_bulk_delete(model.__table__.name))
+
+
+@event.listens_for(db.session, 'after_commit')
+def apply_changes(session):
+    changes = session.info.pop('recommendation_changes', None)
+    if changes:
+        index.apply(changes)
+
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def forget_changes(session, previous_transaction):
+    session.info.pop('recommendation_changes', None)
+
+
+def recommend_response(golfer):
+    # same shape as a paginated listing, the cursor is a position in the ranking
+    try:
+        fields = parse_fields(Teetime)
+        limit, cursor = parse_page_args()
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    limit = limit or app.config['DEFAULT_PAGE_SIZE']
+    position = cursor or 0
+    index.ensure_fresh()
+
+    select_stmt = db.select(Teetime).options(*projection_options(Teetime, fields), *Teetime.eager_options(fields)).where(
+        Teetime.space_remaining > 0,
+        Teetime.golfer_id != golfer.golfer_id,
+        upcoming(Teetime.starts_at),
+        ~db.select(Booking.booking_id).where(Booking.teetime_id == Teetime.teetime_id, Booking.golfer_id == golfer.golfer_id).exists(),
+    )
+    picked, compatibility = [], {}
+    count = position + limit * OVERFETCH
+    while True:
+        ranked_ids, scores = index.top(golfer, count)
+        candidates = ranked_ids[position:].tolist()
+        teetimes = {}
+        if candidates:
+            teetimes = {t.teetime_id: t for t in db.session.execute(select_stmt.where(Teetime.teetime_id.in_(candidates))).scalars()}
+        for teetime_id, score in zip(candidates, scores[position:].tolist()):
+            position += 1
+            if teetime_id in teetimes:
+                picked.append(teetimes[teetime_id])
+                compatibility[teetime_id] = round(score, 3)
+                if len(picked) == limit:
+                    break
+        if len(picked) == limit or len(ranked_ids) < count:
+            break
+        count *= 2
+
+    # ranked_ids stops at count, there may be more past it
+    more = position < len(ranked_ids) or len(ranked_ids) == count
+    next_cursor = position if len(picked) == limit and more else None
+    items, included = serialize(picked, Teetime, fields)
+    for item, teetime in zip(items, picked):
+        item['compatibility'] = compatibility[teetime.teetime_id]
+    return page_body(items, next_cursor, included, True)
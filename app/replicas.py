@@ -0,0 +1,116 @@
+import random
+import threading
+import time
+from collections import deque
+from flask import g, request, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, exc
+from sqlalchemy.sql.dml import UpdateBase
+from . import app
+
+
+# Read replica routing. Statements of GET/HEAD/OPTIONS requests go to one replica (picked per request)
+# until the request writes something; that write and everything after it in the request go to the primary,
+# so a request always reads its own writes. Everything outside of a request (CLI, migrations) uses the primary.
+#
+# Staleness guard: every REPLICA_CHECK_INTERVAL seconds the table_version counters of the primary are
+# snapshotted and compared with each replica's. A replica is only used while it has every write the primary
+# had REPLICA_MAX_LAG_SECONDS ago, a replica that falls further behind (or is unreachable) is skipped.
+
+SAFE_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, primary=False, **kwargs):
+        # bind_arguments={'primary': True} forces the primary for one statement (e.g. auth lookups)
+        if bind is None and not primary and has_request_context():
+            if self._flushing or isinstance(clause, UpdateBase):
+                g.wrote_to_primary = True
+            elif request.method in SAFE_METHODS and not g.get('wrote_to_primary'):
+                replica = request_replica(self._db)
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def route_statement_writes(orm_execute_state):
+    # ORM INSERT/UPDATE/DELETE statements pin the primary before any listener asks for session.connection()
+    if has_request_context() and (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        g.wrote_to_primary = True
+
+
+def replica_keys():
+    return [key for key in app.config['SQLALCHEMY_BINDS'] if key.startswith('replica_')]
+
+
+def request_replica(db):
+    # the replica this request reads from, picked once so all of its reads see the same state
+    if 'replica' not in g:
+        healthy = monitor.healthy(db)
+        g.replica = db.engines[random.choice(healthy)] if healthy else None
+    return g.replica
+
+
+@app.before_request
+def reset_replica_routing():
+    g.pop('replica', None)
+    g.pop('wrote_to_primary', None)
+
+
+class ReplicaMonitor:
+    def __init__(self):
+        self.snapshots = deque() # (monotonic time, {table_name: version}) of the primary, oldest first
+        self.status = {} # replica bind key -> True when fresh enough to read from
+        self.checked_at = None
+        self._lock = threading.Lock()
+
+    def healthy(self, db):
+        keys = replica_keys()
+        if not keys:
+            return []
+        now = time.monotonic()
+        # one thread refreshes at a time, the others keep using the last result meanwhile
+        if (self.checked_at is None or now - self.checked_at >= app.config['REPLICA_CHECK_INTERVAL']) and self._lock.acquire(blocking=False):
+            try:
+                self.check(db, keys, now)
+            finally:
+                self._lock.release()
+        return [key for key in keys if self.status.get(key)]
+
+    def check(self, db, keys, now):
+        try:
+            self.snapshots.append((now, versions(db.engines[None])))
+        except exc.SQLAlchemyError:
+            app.logger.exception('could not read table versions from the primary')
+            return
+        # versions only grow, so the oldest snapshot taken within the last max lag seconds is at least what the
+        # primary had max lag seconds ago (the current one when checks are further apart than that)
+        cutoff = now - app.config['REPLICA_MAX_LAG_SECONDS']
+        while self.snapshots[0][0] < cutoff:
+            self.snapshots.popleft()
+        reference = self.snapshots[0][1]
+        for key in keys:
+            try:
+                replica_versions = versions(db.engines[key])
+            except exc.SQLAlchemyError as e:
+                app.logger.warning('replica %s unreachable: %s', key, e)
+                self.status[key] = False
+                continue
+            fresh = all(replica_versions.get(table, 0) >= version for table, version in reference.items())
+            if self.status.get(key, True) != fresh:
+                app.logger.warning('replica %s is %s', key, 'back in sync' if fresh else 'lagging, reads go to the primary')
+            self.status[key] = fresh
+        self.checked_at = now
+
+    def stats(self):
+        return {key: {'healthy': self.status.get(key)} for key in replica_keys()}
+
+
+def versions(engine):
+    from .models import Table_version
+    with engine.connect() as connection:
+        return dict(connection.execute(Table_version.__table__.select()).all())
+
+
+monitor = ReplicaMonitor()
@@ -0,0 +1,201 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from . import app
+
+
+# Cache of serialized JSON responses, shared by the ETag'd read endpoints (see versions.conditional).
+# Entries are keyed by the ETag (URL + versions of the tables the response is built from) and tagged with
+# those tables; committing a write to a table deletes every entry tagged with it.
+#
+# Backends: "memory" is a per process LRU bounded by bytes, "sqlite" is a file every gunicorn worker on the
+# machine shares, "none" turns caching off.
+
+class MemoryBackend:
+    name = 'memory'
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.size = 0
+        self._entries = OrderedDict() # key -> (value, tags)
+        self._keys = {} # tag -> keys of the entries tagged with it, so invalidating only touches those
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, tags):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(key)
+            tags = frozenset(tags)
+            self._entries[key] = (value, tags)
+            for tag in tags:
+                self._keys.setdefault(tag, set()).add(key)
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, tags):
+        with self._lock:
+            for tag in tags:
+                for key in self._keys.pop(tag, ()):
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys.clear()
+            self.size = 0
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[0])
+            for tag in entry[1]:
+                keys = self._keys.get(tag)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._keys[tag]
+
+    def stats(self):
+        with self._lock:
+            return _stats(self, len(self._entries), self.size)
+
+
+class SQLiteBackend:
+    name = 'sqlite'
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS cache_entry (key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, created REAL NOT NULL);
+                CREATE INDEX IF NOT EXISTS ix_cache_entry_created ON cache_entry (created);
+                CREATE TABLE IF NOT EXISTS cache_tag (tag TEXT NOT NULL, key TEXT NOT NULL, PRIMARY KEY (tag, key));
+            """)
+
+    def _connection(self):
+        # one connection per thread (and per process, gunicorn forks after import)
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def get(self, key):
+        row = self._connection().execute('SELECT value FROM cache_entry WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def set(self, key, value, tags):
+        if len(value) > self.max_bytes:
+            return
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute('INSERT OR REPLACE INTO cache_entry (key, value, size, created) VALUES (?, ?, ?, ?)', (key, value, len(value), time.time()))
+            connection.executemany('INSERT OR IGNORE INTO cache_tag (tag, key) VALUES (?, ?)', [(tag, key) for tag in tags])
+            # oldest entries go first once the file holds more than max_bytes of responses
+            total = connection.execute('SELECT coalesce(sum(size), 0) FROM cache_entry').fetchone()[0]
+            if total > self.max_bytes:
+                for old_key, size in connection.execute('SELECT key, size FROM cache_entry ORDER BY created').fetchall():
+                    self._delete(connection, [old_key])
+                    total -= size
+                    if total <= self.max_bytes:
+                        break
+
+    def invalidate(self, tags):
+        tags = list(tags)
+        if not tags:
+            return
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            placeholders = ', '.join('?' for _ in tags)
+            keys = [row[0] for row in connection.execute(f'SELECT DISTINCT key FROM cache_tag WHERE tag IN ({placeholders})', tags)]
+            self._delete(connection, keys)
+
+    def _delete(self, connection, keys):
+        connection.executemany('DELETE FROM cache_entry WHERE key = ?', [(key,) for key in keys])
+        connection.executemany('DELETE FROM cache_tag WHERE key = ?', [(key,) for key in keys])
+
+    def clear(self):
+        connection = self._connection()
+        with connection:
+            connection.execute('DELETE FROM cache_entry')
+            connection.execute('DELETE FROM cache_tag')
+
+    def stats(self):
+        entries, size = self._connection().execute('SELECT count(*), coalesce(sum(size), 0) FROM cache_entry').fetchone()
+        return _stats(self, entries, size)
+
+
+class NullBackend:
+    name = 'none'
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, tags):
+        pass
+
+    def invalidate(self, tags):
+        pass
+
+    def clear(self):
+        pass
+
+    def stats(self):
+        return {'backend': self.name}
+
+
+def _stats(backend, entries, size):
+    # hits and misses are counted per process, entries and bytes are the backend's
+    lookups = backend.hits + backend.misses
+    return {
+        'backend': backend.name,
+        'hits': backend.hits,
+        'misses': backend.misses,
+        'hit_ratio': backend.hits / lookups if lookups else 0.0,
+        'entries': entries,
+        'bytes': size,
+        'max_bytes': backend.max_bytes,
+    }
+
+
+def create_backend(config):
+    backend = config['RESPONSE_CACHE_BACKEND']
+    if backend == 'memory':
+        return MemoryBackend(config['RESPONSE_CACHE_MAX_BYTES'])
+    if backend == 'sqlite':
+        return SQLiteBackend(config['RESPONSE_CACHE_PATH'], config['RESPONSE_CACHE_MAX_BYTES'])
+    if backend == 'none':
+        return NullBackend()
+    raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND {backend!r}, use memory, sqlite or none")
+
+
+response_cache = create_backend(app.config)
@@ -1,7 +1,18 @@
 from flask import request, render_template
-from . import app, db
-from .models import Golfer, Course, Teetime, Golfer_comment
+from . import app, db, token_cache
+from .models import Golfer, Course, Teetime, Golfer_comment, Booking, Teetime_summary, Teetime_archive, Golfer_comment_archive
 from .auth import basic_auth, token_auth
+from .pagination import list_response, merged_list_response, wants_archived
+from .search import search_response
+from .discovery import discover_response
+from .recommendations import recommend_response
+from .versions import conditional
+from .response_cache import response_cache
+from .instrumentation import metrics
+from .engine import pool_stats
+from .replicas import monitor as replica_monitor
+from .rate_limit import limit, stats as rate_limit_stats
+from .schedule import time_conditions, clock
 
 # define route
 @app.route('/')
@@ -12,6 +23,7 @@ def index():
 
 # create new golfer
 @app.route('/golfers', methods=['POST'])
+@limit('auth')
 def create_golfer():
     if not request.is_json:
         return {'error': 'You content-type must be application/json'}, 400
@@ -50,6 +62,7 @@ def create_golfer():
 
 # get token
 @app.route('/token')
+@limit('auth')
 @basic_auth.login_required
 def get_token():
     golfer = basic_auth.current_user()
@@ -82,6 +95,7 @@ def delete_me():
 
 # golfer login
 @app.route('/login', methods=['GET'])
+@limit('auth')
 @basic_auth.login_required
 def login():
     golfer = basic_auth.current_user()
@@ -91,32 +105,78 @@ def login():
 
 # teetime enpoints
 @app.route('/teetimes')
+@conditional('teetime', 'course', 'golfer', 'golfer_comment', 'teetime_archive', 'golfer_comment_archive', vary=clock)
 def get_teetimes():
-    select_stmt = db.select(Teetime)
     search = request.args.get('search')
     if search:
-        select_stmt = select_stmt.where(Teetime.course_name.ilike(f"%{search}%"))
-    # Get the teetimes from the database
-    teetimes = db.session.execute(select_stmt).scalars().all()
-    return [t.to_dict() for t in teetimes]  #list comprehension calling to_dict and looping thru all teetimes to get them
+        # ranked full text search over course name, city, district, designer and date
+        return search_response(search)
+    try:
+        # upcoming tee times only (?include_past=1 for all), starting in ?from=&to= when given (see schedule.py)
+        conditions = time_conditions(Teetime.starts_at)
+        archived_conditions = time_conditions(Teetime_archive.starts_at)
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    select_stmt = db.select(Teetime).where(*conditions)
+    if wants_archived():
+        # history: the archived tee times too, in one teetime_id order (see archive.py)
+        return merged_list_response([(select_stmt, Teetime), (db.select(Teetime_archive).where(*archived_conditions), Teetime_archive)])
+    # Get the teetimes from the database (eager loaded, paginated with ?limit=&cursor=, projected with ?fields=)
+    return list_response(select_stmt, Teetime)
+
+
+# one flat row per teetime from the teetime_summary read model (course location, host, comment count, open spots),
+# paginated with ?limit=&cursor=, projected with ?fields= and limited to ?from=&to=&include_past= like /teetimes
+@app.route('/teetimes/summary')
+@conditional('teetime', 'course', 'golfer', 'golfer_comment', vary=clock)
+def get_teetime_summaries():
+    try:
+        conditions = time_conditions(Teetime_summary.starts_at)
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    return list_response(db.select(Teetime_summary).where(*conditions), Teetime_summary)
+
+
+# find open tee times with server side filters (location, dates, time window, price, spots, course attributes)
+@app.route('/teetimes/discover')
+@conditional('teetime', 'course', vary=clock)
+def discover_teetimes():
+    return discover_response()
 
 
 @app.route('/teetimes/me')
 @token_auth.login_required
 def get_myteetimes():
     current_golfer = token_auth.current_user()
-    select_stmt = db.select(Teetime).where(Teetime.golfer_id == current_golfer.golfer_id)
+    try:
+        conditions = time_conditions(Teetime.starts_at)
+        archived_conditions = time_conditions(Teetime_archive.starts_at)
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    select_stmt = db.select(Teetime).where(Teetime.golfer_id == current_golfer.golfer_id, *conditions)
+    if wants_archived():
+        archived = db.select(Teetime_archive).where(Teetime_archive.golfer_id == current_golfer.golfer_id, *archived_conditions)
+        return merged_list_response([(select_stmt, Teetime), (archived, Teetime_archive)])
     # Get the teetimes from the database
-    teetimes = db.session.execute(select_stmt).scalars().all()
-    return [t.to_dict() for t in teetimes]
+    return list_response(select_stmt, Teetime)
+
+
+# open tee times ranked by how well their host matches the logged in golfer (not cached, differs per golfer)
+@app.route('/teetimes/recommended')
+@token_auth.login_required
+def recommended_teetimes():
+    return recommend_response(token_auth.current_user())
 
 
 
 #get a single teetime by ID
 @app.route('/teetimes/<int:teetime_id>')
+@conditional('teetime', 'course', 'golfer', 'golfer_comment', 'teetime_archive', 'golfer_comment_archive')
 def get_teetime(teetime_id):
     # Get the teetime from the database by ID
-    teetime = db.session.get(Teetime, teetime_id)
+    teetime = db.session.get(Teetime, teetime_id, options=Teetime.eager_options())
+    if teetime is None and wants_archived():
+        teetime = db.session.get(Teetime_archive, teetime_id, options=Teetime_archive.eager_options())
     if teetime:
         return teetime.to_dict()
     else:
@@ -208,12 +268,17 @@ def delete_teetime(teetime_id):
 
 
 
-@app.route('/teetimes<int:teetime_id>/golfer_comments')
-def get_comments():
-    select_stmt = db.select(Golfer_comment)
-    comments = db.session.get(select_stmt).scalars().all()
-    # .get or .execute ?
-    return [c.to_dict() for c in comments]
+# every comment of a teetime, oldest first (a teetime itself only embeds its latest few), paginated with
+# ?limit=&cursor= on golfer_comment_id over the teetime_id index and projected with ?fields=
+@app.route('/teetimes/<int:teetime_id>/golfer_comments')
+@conditional('teetime', 'golfer', 'golfer_comment', 'teetime_archive', 'golfer_comment_archive')
+def get_comments(teetime_id):
+    model = Golfer_comment
+    if db.session.scalar(db.select(Teetime.teetime_id).where(Teetime.teetime_id == teetime_id)) is None:
+        if not wants_archived() or db.session.scalar(db.select(Teetime_archive.teetime_id).where(Teetime_archive.teetime_id == teetime_id)) is None:
+            return {'error': f"Teetime with ID {teetime_id} does not exist"}, 404
+        model = Golfer_comment_archive
+    return list_response(db.select(model).where(model.teetime_id == teetime_id), model)
 
 
 
@@ -276,6 +341,45 @@ def delete_comment(teetime_id, golfer_comment_id):
     return {'success': "Comment has been successfully deleted"}, 200 
 
 
+# Join a teetime (book one or more of its open spots)
+@app.route('/teetimes/<int:teetime_id>/bookings', methods=['POST'])
+@token_auth.login_required
+def create_booking(teetime_id):
+    data = request.get_json(silent=True) or {}
+    spots = data.get('spots', 1)
+    if not isinstance(spots, int) or isinstance(spots, bool) or spots < 1:
+        return {'error': 'spots must be a whole number of at least 1'}, 400
+
+    # take the spots atomically, the booking is committed in the same transaction
+    if not Teetime.reserve(teetime_id, spots):
+        db.session.rollback()
+        teetime = db.session.get(Teetime, teetime_id)
+        if teetime is None:
+            return {'error': f"Teetime with ID {teetime_id} does not exist"}, 404
+        return {'error': f"Only {teetime.space_remaining} spot(s) remaining on this Tee Time"}, 409
+
+    current_golfer = token_auth.current_user()
+    new_booking = Booking(spots=spots, golfer_id=current_golfer.golfer_id, teetime_id=teetime_id)
+    return new_booking.to_dict(), 201
+
+# Leave a teetime (cancel a booking and give its spots back)
+@app.route('/teetimes/<int:teetime_id>/bookings/<int:booking_id>', methods=['DELETE'])
+@token_auth.login_required
+def delete_booking(teetime_id, booking_id):
+    booking = db.session.get(Booking, booking_id)
+    if booking is None or booking.teetime_id != teetime_id:
+        return {'error': f"Booking {booking_id} does not exist for teetime #{teetime_id}"}, 404
+
+    current_golfer = token_auth.current_user()
+    if booking.golfer_id != current_golfer.golfer_id:
+        return {'error': 'You do not have permission to cancel this booking'}, 403
+
+    # delete first, the spots only go back when this request was the one that deleted it
+    if not Booking.cancel(booking_id):
+        return {'error': f"Booking {booking_id} does not exist for teetime #{teetime_id}"}, 404
+    return {'success': "Booking has been successfully cancelled"}, 200
+
+
 
 
 
@@ -326,8 +430,49 @@ def create_course():
 
 
 @app.route('/courses')
+@conditional('course')
 def get_courses():
     select_stmt = db.select(Course)
-    # Get the teetimes from the database
-    courses = db.session.execute(select_stmt).scalars().all()
-    return [c.to_dict() for c in courses]
\ No newline at end of file
+    # Get the courses from the database
+    return list_response(select_stmt, Course)
+
+
+# cache hit/miss counters and sizes
+@app.route('/cache/stats')
+@limit(None)
+def cache_stats():
+    return {'responses': response_cache.stats(), 'tokens': token_cache.stats()}
+
+
+# database connection pool usage, replica health and rate limiting of this worker process
+@app.route('/pool/stats')
+@limit(None)
+def get_pool_stats():
+    return {**pool_stats(), 'replicas': replica_monitor.stats(), 'rate_limit': rate_limit_stats()}
+
+
+# Prometheus text format metrics for this worker process
+@app.route('/metrics')
+@limit(None)
+def get_metrics():
+    responses = response_cache.stats()
+    tokens = token_cache.stats()
+    pool = pool_stats()
+    limits = rate_limit_stats()
+    gauges = [
+        ('response_cache_hits', 'Response cache hits.', responses.get('hits', 0)),
+        ('response_cache_misses', 'Response cache misses.', responses.get('misses', 0)),
+        ('response_cache_bytes', 'Bytes of cached responses.', responses.get('bytes', 0)),
+        ('token_cache_hits', 'Token auth cache hits.', tokens['hits']),
+        ('token_cache_misses', 'Token auth cache misses.', tokens['misses']),
+        ('db_pool_checked_out', 'Database connections in use.', pool.get('checked_out', 0)),
+        ('db_pool_overflow', 'Database connections open beyond the pool size.', pool.get('overflow', 0)),
+        ('db_pool_size', 'Database connection pool size.', pool.get('size', 0)),
+        ('db_pool_connections_opened', 'Database connections opened since start.', pool['connections_opened']),
+        ('db_pool_checkouts', 'Database connection checkouts since start.', pool['checkouts']),
+        ('db_pool_timeouts', 'Requests that timed out waiting for a database connection.', pool['timeouts']),
+        ('rate_limited_requests', 'Requests refused with a 429 by the rate limits.', limits['rate_limited']),
+        ('admission_rejected_requests', 'Requests refused with a 503 by the admission gate.', limits['admission_rejected']),
+        ('requests_in_flight', 'Requests being handled right now.', limits['in_flight']),
+    ]
+    return metrics.render(gauges), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
@@ -0,0 +1,113 @@
+import re
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+from flask import request
+from sqlalchemy import or_
+from . import app
+from .pagination import wants_archived
+
+
+# When tee times start. teetime_date and teetime_time stay free form strings (they are what clients send and
+# get back), Teetime.starts_at is the same moment as a real timestamp in UTC, parsed from them on every write
+# (local times in TEETIME_TIMEZONE) and indexed, so ranges like "next Saturday morning" are answered by the
+# database. Teetime.start_minute is its local time of day, for time of day windows (sqlite can not convert time
+# zones in SQL). Strings that do not parse leave both null: those tee times are never hidden as past and never
+# match a range.
+#
+# Listings hide tee times that already started (?include_past=1 or ?include_archived=1 shows them) and take
+# ?from=&to= ranges. "Now" moves a minute at a time and is part of their ETags, so a cached listing is never
+# more than a minute behind.
+
+DATE_FORMATS = ('%Y-%m-%d', '%Y/%m/%d', '%m/%d/%Y', '%m/%d/%y', '%d.%m.%Y', '%B %d %Y', '%b %d %Y', '%A %B %d %Y', '%a %b %d %Y')
+TIME_FORMATS = ('%H:%M', '%H:%M:%S', '%I:%M %p', '%I:%M:%S %p', '%I %p', '%H%M')
+
+
+def zone():
+    return ZoneInfo(app.config['TEETIME_TIMEZONE'])
+
+
+def _parse(value, formats):
+    for fmt in formats:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_start(teetime_date, teetime_time):
+    # "2026-10-24", "8:30 AM" -> aware datetime in UTC, None when either does not parse
+    if not teetime_date or not teetime_time:
+        return None
+    day = _parse(re.sub(r'[\s,]+', ' ', str(teetime_date)).strip(), DATE_FORMATS)
+    moment = parse_time(teetime_time)
+    if day is None or moment is None:
+        return None
+    return datetime.combine(day.date(), moment, zone()).astimezone(timezone.utc)
+
+
+def parse_time(value):
+    # "8:30am", "8.30 p.m.", "0830" -> time, None when it does not parse
+    clock = re.sub(r'\s*([ap])\.?\s*m\.?$', r' \1m', str(value).strip().lower()).replace('.', ':').upper()
+    moment = _parse(clock, TIME_FORMATS)
+    return None if moment is None else moment.time()
+
+
+def start_minute(starts_at):
+    # local time of day of a starts_at (TEETIME_TIMEZONE) in minutes after midnight, None when unknown
+    if starts_at is None:
+        return None
+    local = starts_at.astimezone(zone())
+    return local.hour * 60 + local.minute
+
+
+def day_start(day):
+    # local midnight (TEETIME_TIMEZONE) at the start of a date -> UTC
+    return datetime.combine(day, datetime.min.time(), zone()).astimezone(timezone.utc)
+
+
+def now():
+    # the current minute in UTC
+    return datetime.now(timezone.utc).replace(second=0, microsecond=0)
+
+
+def parse_moment(name, end=False):
+    # ?from= / ?to= as an ISO date or date and time (local time in TEETIME_TIMEZONE unless it has an offset) -> UTC,
+    # a plain date given as `to` means the end of that day
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO 8601 date or date and time (e.g. 2026-10-24 or 2026-10-24T06:00)")
+    if end and re.fullmatch(r'\d{4}-\d{2}-\d{2}', value):
+        moment += timedelta(days=1)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=zone())
+    return moment.astimezone(timezone.utc)
+
+
+def time_conditions(column):
+    # conditions on a starts_at column for ?from=&to=&include_past= of the current request
+    start = parse_moment('from')
+    end = parse_moment('to', end=True)
+    if start is not None and end is not None and end <= start:
+        raise ValueError('to must be after from')
+    conditions = []
+    if start is not None:
+        conditions.append(column >= start)
+    if end is not None:
+        conditions.append(column < end)
+    if request.args.get('include_past') not in ('1', 'true') and not wants_archived():
+        conditions.append(upcoming(column))
+    return conditions
+
+
+def upcoming(column):
+    return or_(column.is_(None), column >= now())
+
+
+def clock():
+    # for conditional(vary=...): what hides past tee times changes once a minute
+    return now().isoformat()
@@ -0,0 +1,198 @@
+import re
+import click
+from sqlalchemy import event, text, bindparam
+from . import app, db
+from .models import Teetime, Course
+from .pagination import parse_fields, parse_page_args, projection_options, serialize, page_body
+from .unit_of_work import on_bulk_insert, on_bulk_delete
+
+
+# Full text search over teetimes (course name, city, district, designer, date).
+# sqlite uses an FTS5 virtual table keyed by rowid = teetime_id, postgres a table with a generated
+# tsvector (GIN) plus a pg_trgm index on course_name for typo tolerant matches. Both are kept in
+# sync from the session's after_flush so every write path (save, update, delete, bulk) is covered.
+
+SEARCH_DDL = {
+    'sqlite': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS teetime_search USING fts5(course_name, city, district, designer, teetime_date)",
+    ],
+    'postgresql': [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        """CREATE TABLE IF NOT EXISTS teetime_search (
+            teetime_id INTEGER PRIMARY KEY REFERENCES teetime (teetime_id) ON DELETE CASCADE,
+            course_name TEXT,
+            city TEXT,
+            district TEXT,
+            designer TEXT,
+            teetime_date TEXT,
+            document tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('simple', coalesce(course_name, '')), 'A') ||
+                setweight(to_tsvector('simple', coalesce(city, '') || ' ' || coalesce(district, '')), 'B') ||
+                setweight(to_tsvector('simple', coalesce(designer, '') || ' ' || coalesce(teetime_date, '')), 'C')
+            ) STORED
+        )""",
+        "CREATE INDEX IF NOT EXISTS ix_teetime_search_document ON teetime_search USING gin (document)",
+        "CREATE INDEX IF NOT EXISTS ix_teetime_search_course_name_trgm ON teetime_search USING gin (course_name gin_trgm_ops)",
+    ],
+}
+
+# the column holding the teetime id in each dialect's search table
+SEARCH_KEY = {'sqlite': 'rowid', 'postgresql': 'teetime_id'}
+
+# course and teetime columns that feed the search document
+COURSE_SEARCH_COLUMNS = ('course_name', 'city', 'district', 'designer')
+TEETIME_SEARCH_COLUMNS = ('course_name', 'teetime_date', 'course_id')
+
+
+def search_supported(connection):
+    return connection.dialect.name in SEARCH_DDL
+
+
+def create_search_table(connection):
+    for statement in SEARCH_DDL.get(connection.dialect.name, []):
+        connection.execute(text(statement))
+
+
+def reindex(connection, where, ids=None):
+    # replace the search rows of the teetimes matched by `where` (a condition on teetime t)
+    key = SEARCH_KEY[connection.dialect.name]
+    params = {} if ids is None else {'ids': list(ids)}
+    delete = text(f"DELETE FROM teetime_search WHERE {key} IN (SELECT t.teetime_id FROM teetime t WHERE {where})")
+    insert = text(f"""INSERT INTO teetime_search ({key}, course_name, city, district, designer, teetime_date)
+        SELECT t.teetime_id, coalesce(c.course_name, t.course_name), c.city, c.district, c.designer, t.teetime_date
+        FROM teetime t LEFT JOIN course c ON c.course_id = t.course_id
+        WHERE {where}""")
+    if ids is not None:
+        delete = delete.bindparams(bindparam('ids', expanding=True))
+        insert = insert.bindparams(bindparam('ids', expanding=True))
+    connection.execute(delete, params)
+    connection.execute(insert, params)
+
+
+def remove(connection, teetime_ids):
+    key = SEARCH_KEY[connection.dialect.name]
+    statement = text(f"DELETE FROM teetime_search WHERE {key} IN :ids").bindparams(bindparam('ids', expanding=True))
+    connection.execute(statement, {'ids': list(teetime_ids)})
+
+
+def _changed(obj, columns):
+    state = db.inspect(obj)
+    return any(state.attrs[column].history.has_changes() for column in columns)
+
+
+@event.listens_for(db.session, 'after_flush')
+def sync_search(session, flush_context):
+    teetime_ids, course_ids, deleted_ids = set(), set(), set()
+    for obj in session.new:
+        if isinstance(obj, Teetime):
+            teetime_ids.add(obj.teetime_id)
+    for obj in session.dirty:
+        if isinstance(obj, Teetime) and _changed(obj, TEETIME_SEARCH_COLUMNS):
+            teetime_ids.add(obj.teetime_id)
+        elif isinstance(obj, Course) and _changed(obj, COURSE_SEARCH_COLUMNS):
+            course_ids.add(obj.course_id)
+    for obj in session.deleted:
+        if isinstance(obj, Teetime):
+            deleted_ids.add(obj.teetime_id)
+    if not (teetime_ids or course_ids or deleted_ids):
+        return
+    connection = session.connection()
+    if not search_supported(connection):
+        return
+    if teetime_ids:
+        reindex(connection, 't.teetime_id IN :ids', teetime_ids)
+    if course_ids:
+        reindex(connection, 't.course_id IN :ids', course_ids)
+    if deleted_ids:
+        remove(connection, deleted_ids)
+
+
+@on_bulk_insert(Teetime)
+def sync_search_bulk(connection, teetime_ids):
+    if search_supported(connection):
+        reindex(connection, 't.teetime_id IN :ids', teetime_ids)
+
+
+@on_bulk_delete(Teetime)
+def sync_search_bulk_delete(connection, teetime_ids):
+    if search_supported(connection):
+        remove(connection, teetime_ids)
+
+
+# db.create_all() / drop_all() manage the search table alongside the model tables
+@event.listens_for(db.metadata, 'after_create')
+def create_search_table_with_metadata(target, connection, **kw):
+    create_search_table(connection)
+
+
+@event.listens_for(db.metadata, 'before_drop')
+def drop_search_table_with_metadata(target, connection, **kw):
+    if search_supported(connection):
+        connection.execute(text("DROP TABLE IF EXISTS teetime_search"))
+
+
+def search_teetime_ids(query, limit=None, offset=0):
+    # returns teetime ids best match first
+    terms = re.findall(r'\w+', query.lower())
+    if not terms:
+        return []
+    connection = db.session.connection()
+    dialect = connection.dialect.name
+    page = ''
+    params = {'offset': offset}
+    if limit is not None:
+        page = 'LIMIT :limit'
+        params['limit'] = limit
+    elif dialect == 'sqlite':
+        page = 'LIMIT -1'
+    if dialect == 'sqlite':
+        # every term as a prefix match, course name weighted highest
+        params['match'] = ' '.join(f'"{term}"*' for term in terms)
+        statement = f"""SELECT rowid FROM teetime_search WHERE teetime_search MATCH :match
+            ORDER BY bm25(teetime_search, 10.0, 4.0, 4.0, 2.0, 1.0), rowid {page} OFFSET :offset"""
+    elif dialect == 'postgresql':
+        params['tsquery'] = ' & '.join(f'{term}:*' for term in terms)
+        params['query'] = query
+        statement = f"""SELECT teetime_id FROM teetime_search
+            WHERE document @@ to_tsquery('simple', :tsquery) OR course_name % :query
+            ORDER BY ts_rank(document, to_tsquery('simple', :tsquery)) + similarity(course_name, :query) DESC, teetime_id
+            {page} OFFSET :offset"""
+    else:
+        select_stmt = db.select(Teetime.teetime_id).where(Teetime.course_name.ilike(f"%{query}%")).order_by(Teetime.teetime_id).offset(offset)
+        if limit is not None:
+            select_stmt = select_stmt.limit(limit)
+        return db.session.execute(select_stmt).scalars().all()
+    return [row[0] for row in connection.execute(text(statement), params)]
+
+
+def search_response(query):
+    # same shape as pagination.list_response, except the cursor is an offset into the ranking
+    try:
+        fields = parse_fields(Teetime)
+        limit, cursor = parse_page_args()
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    offset = cursor or 0
+    ids = search_teetime_ids(query, None if limit is None else limit + 1, offset)
+    next_cursor = None
+    if limit is not None and len(ids) > limit:
+        ids = ids[:limit]
+        next_cursor = offset + limit
+    select_stmt = db.select(Teetime).options(*projection_options(Teetime, fields), *Teetime.eager_options(fields)).where(Teetime.teetime_id.in_(ids))
+    teetimes = {t.teetime_id: t for t in db.session.execute(select_stmt).scalars()}
+    items, included = serialize([teetimes[teetime_id] for teetime_id in ids if teetime_id in teetimes], Teetime, fields)
+    return page_body(items, next_cursor, included, limit is not None)
+
+
+@app.cli.command('reindex-search')
+def reindex_search():
+    """Create the teetime search table if needed and rebuild it from scratch."""
+    with db.engine.begin() as connection:
+        if not search_supported(connection):
+            click.echo(f"Full text search is not supported on {connection.dialect.name}, searches fall back to LIKE")
+            return
+        create_search_table(connection)
+        connection.execute(text("DELETE FROM teetime_search"))
+        reindex(connection, '1 = 1')
+        count = connection.execute(text("SELECT count(*) FROM teetime_search")).scalar()
+    click.echo(f"Indexed {count} teetimes")
@@ -0,0 +1,92 @@
+from functools import lru_cache
+from operator import attrgetter
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError: # optional, pip install orjson
+    orjson = None
+
+
+# Response encoding. JSON_ENCODER picks the backend of app.json: orjson (several times faster, written
+# straight to bytes) or the standard library. Both give the same documents: sorted keys and datetimes as
+# HTTP dates through Flask's default hook. Models build their dicts with serializers compiled once from
+# dict_columns, and nested objects (a teetime's course, golfer and comment authors) go through Included,
+# so an object that shows up many times in one response is only turned into a dict once.
+
+JSON_ENCODERS = ('auto', 'orjson', 'json')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    def __init__(self, app):
+        super().__init__(app)
+        encoder = app.config['JSON_ENCODER']
+        if encoder not in JSON_ENCODERS:
+            raise ValueError(f"Unknown JSON_ENCODER {encoder!r}, use {', '.join(JSON_ENCODERS)}")
+        if encoder == 'orjson' and orjson is None:
+            raise RuntimeError('JSON_ENCODER is orjson but orjson is not installed')
+        self.use_orjson = orjson is not None and encoder != 'json'
+
+    def _options(self, indent):
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        # other json.dumps arguments than indent/separators are only understood by the standard library
+        if not self.use_orjson or set(kwargs) - {'indent', 'separators'}:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._options(kwargs.get('indent'))).decode()
+
+    def response(self, *args, **kwargs):
+        if not self.use_orjson:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=self.default, option=self._options(indent) | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+@lru_cache(maxsize=None)
+def column_serializer(model, fields=None):
+    # obj -> {to_dict key: column value} for the model's dict_columns (only `fields`, a frozenset, when given)
+    items = [(key, column) for key, column in model.dict_columns.items() if fields is None or key in fields]
+    for key, column in items:
+        if column not in model.__mapper__.column_attrs:
+            raise AttributeError(f"{model.__name__}.dict_columns[{key!r}] is not a column: {column}")
+    keys = tuple(key for key, _ in items)
+    if len(items) == 0:
+        return lambda obj: {}
+    getter = attrgetter(*(column for _, column in items))
+    if len(items) == 1:
+        return lambda obj: {keys[0]: getter(obj)}
+    return lambda obj: dict(zip(keys, getter(obj)))
+
+
+def columns_dict(obj, fields=None):
+    return column_serializer(type(obj), None if fields is None else frozenset(fields))(obj)
+
+
+class Included:
+    # nested objects of one response, keyed by section and primary key. Each is serialized once and then
+    # either embedded again wherever it appears, or (side_load) replaced by its id and listed once under
+    # the response's "included" section
+    def __init__(self, side_load=False):
+        self.side_load = side_load
+        self.objects = {} # section -> {id: dict}
+
+    def nested(self, section, obj):
+        if obj is None:
+            return None
+        key = obj.__mapper__.primary_key_from_instance(obj)[0]
+        objects = self.objects.setdefault(section, {})
+        data = objects.get(key)
+        if data is None:
+            data = objects[key] = obj.to_dict(included=self) if hasattr(obj, 'dict_relationships') else obj.to_dict()
+        return key if self.side_load else data
+
+    def sections(self):
+        return {section: {str(key): data for key, data in objects.items()} for section, objects in self.objects.items()}
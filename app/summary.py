@@ -0,0 +1,200 @@
+import sys
+import click
+from sqlalchemy import event, func
+from . import app, db
+from .models import Golfer, Course, Teetime, Golfer_comment, Teetime_summary
+from .unit_of_work import on_bulk_insert, on_bulk_delete
+
+
+# The teetime_summary read model (models.Teetime_summary): a teetime with its course's location and rating,
+# its host's display fields, its open spots and its comment count in one row, so listings like
+# /teetimes/discover are a scan of one table and its indexes instead of a join over four.
+#
+# It is kept in sync incrementally from the mapper events of teetimes, courses, golfers and comments, with
+# SQL on the flush's connection so the summary commits or rolls back with the write it mirrors:
+#   teetime insert/delete    -> its summary row is inserted/deleted
+#   teetime update           -> its own columns are copied (a new course or host re-reads the row)
+#   course/golfer update     -> the copied fields of every summary row of that course/host
+#   comment insert/delete    -> comment_count +1/-1
+# Rows added by bulk_insert and removed by bulk_delete go through on_bulk_insert/on_bulk_delete,
+# Teetime.reserve/release update the summary themselves.
+# Other UPDATE/DELETE statements on these tables skip the mapper events: run `flask check-summary --fix`
+# (or `flask rebuild-summary`) after them.
+
+summary_table = Teetime_summary.__table__
+
+# summary column -> the source column it is copied from, for each source
+TEETIME_COLUMNS = {name: name for name in ('course_name', 'price', 'teetime_date', 'teetime_time', 'starts_at', 'start_minute', 'space_remaining')}
+COURSE_COLUMNS = {name: name for name in ('city', 'district', 'country', 'par', 'rating', 'strict_dress')}
+HOST_COLUMNS = {'host_username': 'username', 'host_first_name': 'first_name', 'host_last_name': 'last_name', 'host_handicap': 'handicap'}
+
+
+def summary_select(*conditions):
+    # the summary rows of the teetimes matching `conditions`, computed from the source tables
+    comment_count = db.select(func.count()).where(Golfer_comment.teetime_id == Teetime.teetime_id).scalar_subquery()
+    return (
+        db.select(
+            Teetime.teetime_id,
+            Teetime.course_id,
+            Teetime.golfer_id,
+            *(getattr(Teetime, column).label(name) for name, column in TEETIME_COLUMNS.items()),
+            *(getattr(Course, column).label(name) for name, column in COURSE_COLUMNS.items()),
+            *(getattr(Golfer, column).label(name) for name, column in HOST_COLUMNS.items()),
+            comment_count.label('comment_count'),
+        )
+        .select_from(Teetime)
+        .outerjoin(Course, Course.course_id == Teetime.course_id)
+        .outerjoin(Golfer, Golfer.golfer_id == Teetime.golfer_id)
+        .where(*conditions)
+    )
+
+
+def insert_summaries(connection, *conditions):
+    select_stmt = summary_select(*conditions)
+    connection.execute(summary_table.insert().from_select([column.name for column in select_stmt.selected_columns], select_stmt))
+
+
+def refresh(connection, *conditions):
+    # recompute the summary rows of the teetimes matching `conditions` (conditions on Teetime)
+    teetime_ids = db.select(Teetime.teetime_id).where(*conditions)
+    connection.execute(summary_table.delete().where(summary_table.c.teetime_id.in_(teetime_ids)))
+    insert_summaries(connection, *conditions)
+
+
+def _changes(target, columns):
+    # -> {summary column: new value} of the copied source columns this flush changed
+    state = db.inspect(target)
+    return {name: getattr(target, column) for name, column in columns.items() if state.attrs[column].history.has_changes()}
+
+
+def _update(connection, condition, values):
+    if values:
+        connection.execute(summary_table.update().where(condition).values(**values))
+
+
+@event.listens_for(Teetime, 'after_insert')
+def insert_teetime(mapper, connection, target):
+    insert_summaries(connection, Teetime.teetime_id == target.teetime_id)
+
+
+@event.listens_for(Teetime, 'after_update')
+def update_teetime(mapper, connection, target):
+    state = db.inspect(target)
+    if state.attrs.course_id.history.has_changes() or state.attrs.golfer_id.history.has_changes():
+        refresh(connection, Teetime.teetime_id == target.teetime_id)
+    else:
+        _update(connection, summary_table.c.teetime_id == target.teetime_id, _changes(target, TEETIME_COLUMNS))
+
+
+@event.listens_for(Teetime, 'after_delete')
+def delete_teetime(mapper, connection, target):
+    connection.execute(summary_table.delete().where(summary_table.c.teetime_id == target.teetime_id))
+
+
+@event.listens_for(Course, 'after_update')
+def update_course(mapper, connection, target):
+    _update(connection, summary_table.c.course_id == target.course_id, _changes(target, COURSE_COLUMNS))
+
+
+@event.listens_for(Course, 'after_delete')
+def delete_course(mapper, connection, target):
+    _update(connection, summary_table.c.course_id == target.course_id, {name: None for name in COURSE_COLUMNS})
+
+
+@event.listens_for(Golfer, 'after_update')
+def update_golfer(mapper, connection, target):
+    _update(connection, summary_table.c.golfer_id == target.golfer_id, _changes(target, HOST_COLUMNS))
+
+
+@event.listens_for(Golfer, 'after_delete')
+def delete_golfer(mapper, connection, target):
+    _update(connection, summary_table.c.golfer_id == target.golfer_id, {name: None for name in HOST_COLUMNS})
+
+
+def _add_comments(connection, teetime_id, count):
+    _update(connection, summary_table.c.teetime_id == teetime_id, {'comment_count': summary_table.c.comment_count + count})
+
+
+@event.listens_for(Golfer_comment, 'after_insert')
+def insert_comment(mapper, connection, target):
+    _add_comments(connection, target.teetime_id, 1)
+
+
+@event.listens_for(Golfer_comment, 'after_update')
+def update_comment(mapper, connection, target):
+    history = db.inspect(target).attrs.teetime_id.history
+    if history.has_changes():
+        for teetime_id in history.deleted:
+            _add_comments(connection, teetime_id, -1)
+        _add_comments(connection, target.teetime_id, 1)
+
+
+@event.listens_for(Golfer_comment, 'after_delete')
+def delete_comment(mapper, connection, target):
+    _add_comments(connection, target.teetime_id, -1)
+
+
+@on_bulk_insert(Teetime)
+def insert_teetimes(connection, teetime_ids):
+    insert_summaries(connection, Teetime.teetime_id.in_(teetime_ids))
+
+
+@on_bulk_insert(Golfer_comment)
+def insert_comments(connection, golfer_comment_ids):
+    # recount the teetimes the new comments are on
+    teetime_ids = db.select(Golfer_comment.teetime_id).where(Golfer_comment.golfer_comment_id.in_(golfer_comment_ids))
+    comment_count = db.select(func.count()).where(Golfer_comment.teetime_id == summary_table.c.teetime_id).scalar_subquery()
+    connection.execute(summary_table.update().where(summary_table.c.teetime_id.in_(teetime_ids)).values(comment_count=comment_count))
+
+
+@on_bulk_delete(Teetime)
+def delete_teetimes(connection, teetime_ids):
+    connection.execute(summary_table.delete().where(summary_table.c.teetime_id.in_(teetime_ids)))
+
+
+@on_bulk_delete(Golfer_comment)
+def delete_comments(connection, golfer_comment_ids):
+    # recount the teetimes of the comments about to be deleted, without them
+    teetime_ids = db.select(Golfer_comment.teetime_id).where(Golfer_comment.golfer_comment_id.in_(golfer_comment_ids))
+    comment_count = db.select(func.count()).where(
+        Golfer_comment.teetime_id == summary_table.c.teetime_id, Golfer_comment.golfer_comment_id.not_in(golfer_comment_ids)
+    ).scalar_subquery()
+    connection.execute(summary_table.update().where(summary_table.c.teetime_id.in_(teetime_ids)).values(comment_count=comment_count))
+
+
+def inconsistent_ids(connection):
+    # teetime ids whose summary row is missing, out of date or left over from a deleted teetime
+    expected = summary_select()
+    actual = db.select(*(summary_table.c[column.name] for column in expected.selected_columns))
+    ids = {row.teetime_id for row in connection.execute(expected.except_(actual))}
+    ids.update(row.teetime_id for row in connection.execute(actual.except_(expected)))
+    return sorted(ids)
+
+
+@app.cli.command('rebuild-summary')
+def rebuild_summary():
+    """Rebuild the teetime_summary read model from scratch."""
+    with db.engine.begin() as connection:
+        connection.execute(summary_table.delete())
+        insert_summaries(connection)
+        count = connection.execute(db.select(func.count()).select_from(summary_table)).scalar()
+        # fresh statistics, without them sqlite may pick the location index for a single city and sort the matches
+        connection.execute(db.text('ANALYZE teetime_summary'))
+    click.echo(f"Summarized {count} teetimes")
+
+
+@app.cli.command('check-summary')
+@click.option('--fix', is_flag=True, help='Recompute the rows that differ.')
+def check_summary(fix):
+    """Compare the teetime_summary read model with the source tables, exits 1 when they differ (unless --fix)."""
+    with db.engine.begin() as connection:
+        ids = inconsistent_ids(connection)
+        if not ids:
+            click.echo("teetime_summary is consistent")
+            return
+        click.echo(f"{len(ids)} teetime(s) with a missing, stale or orphaned summary row: {', '.join(map(str, ids[:20]))}{' ...' if len(ids) > 20 else ''}")
+        if not fix:
+            sys.exit(1)
+        connection.execute(summary_table.delete().where(summary_table.c.teetime_id.in_(ids)))
+        refresh(connection, Teetime.teetime_id.in_(ids))
+    click.echo(f"Fixed {len(ids)} teetime(s)")
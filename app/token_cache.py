@@ -0,0 +1,64 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+
+class TokenCache:
+    """Bounded LRU cache of token -> golfer column values so token auth skips the database.
+
+    Entries are keyed by a hash of the token (the raw token is never kept), live for at most
+    `ttl` seconds and never past the token's own expiration. The cache is per process, so the
+    ttl is also the longest another gunicorn worker can serve a stale entry after an invalidate.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict() # token hash -> (monotonic deadline, token expiration, values)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token):
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                deadline, expires, values = entry
+                if deadline > time.monotonic() and expires > datetime.now(timezone.utc):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return values
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, token, expires, values):
+        if self.maxsize <= 0:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, expires, values)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, token):
+        if not token:
+            return
+        with self._lock:
+            self._entries.pop(self._key(token), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries), 'maxsize': self.maxsize}
@@ -0,0 +1,111 @@
+from contextlib import contextmanager
+from itertools import groupby
+from flask import g
+from . import app, db
+
+
+# Models commit in their save/update/delete methods. Inside a unit of work those commits are deferred:
+# the changes are only flushed (so ids are assigned) and everything is committed once at the end.
+
+BULK_CHUNK_SIZE = 1000
+
+# model -> functions called with the primary keys of rows added by bulk_insert (which skips ORM events)
+bulk_insert_listeners = {}
+# model -> functions called with the primary keys of rows bulk_delete is about to delete (same)
+bulk_delete_listeners = {}
+
+
+def commit():
+    # commit now unless a unit of work is collecting the changes
+    if db.session.info.get('deferred_commits'):
+        db.session.flush()
+    else:
+        db.session.commit()
+
+
+@contextmanager
+def unit_of_work():
+    # nested units of work join the outer one
+    if db.session.info.get('deferred_commits'):
+        yield db.session
+        return
+    db.session.info['deferred_commits'] = True
+    try:
+        yield db.session
+        db.session.commit()
+    except:
+        db.session.rollback()
+        raise
+    finally:
+        db.session.info.pop('deferred_commits', None)
+
+
+def on_bulk_insert(model):
+    def register(listener):
+        bulk_insert_listeners.setdefault(model, []).append(listener)
+        return listener
+    return register
+
+
+def on_bulk_delete(model):
+    def register(listener):
+        bulk_delete_listeners.setdefault(model, []).append(listener)
+        return listener
+    return register
+
+
+def bulk_insert(model, rows):
+    # multi row INSERTs in chunks instead of one object (and one commit) per row, returns the new primary keys
+    key = model.__mapper__.primary_key[0]
+    ids = []
+    rows = list(rows)
+    for start in range(0, len(rows), BULK_CHUNK_SIZE):
+        # an executemany needs the same columns in every row, so runs of rows with other columns go separately
+        for _, run in groupby(rows[start:start + BULK_CHUNK_SIZE], key=lambda row: sorted(row)):
+            insert = db.insert(model.__table__).returning(key, sort_by_parameter_order=True)
+            run_ids = db.session.execute(insert, list(run)).scalars().all()
+            for listener in bulk_insert_listeners.get(model, []):
+                listener(db.session.connection(), run_ids)
+            ids.extend(run_ids)
+    commit()
+    return ids
+
+
+def bulk_delete(model, ids):
+    # DELETE ... WHERE key IN (chunk) instead of loading and deleting objects, the listeners of a chunk run right
+    # before it is deleted, so they can still read its rows
+    key = model.__mapper__.primary_key[0]
+    ids = list(ids)
+    for start in range(0, len(ids), BULK_CHUNK_SIZE):
+        chunk = ids[start:start + BULK_CHUNK_SIZE]
+        for listener in bulk_delete_listeners.get(model, []):
+            listener(db.session.connection(), chunk)
+        db.session.execute(db.delete(model.__table__).where(key.in_(chunk)))
+    commit()
+
+
+# UNIT_OF_WORK_PER_REQUEST turns every request into one unit of work: one commit when it succeeds, rollback otherwise
+@app.before_request
+def begin_request_unit_of_work():
+    if app.config['UNIT_OF_WORK_PER_REQUEST']:
+        db.session.info['deferred_commits'] = True
+        g.unit_of_work = True
+
+
+@app.after_request
+def commit_request_unit_of_work(response):
+    if g.pop('unit_of_work', False):
+        db.session.info.pop('deferred_commits', None)
+        if response.status_code < 400:
+            db.session.commit()
+        else:
+            db.session.rollback()
+    return response
+
+
+@app.teardown_request
+def rollback_request_unit_of_work(exc):
+    # only still set when the view raised before after_request ran
+    if g.pop('unit_of_work', False):
+        db.session.info.pop('deferred_commits', None)
+        db.session.rollback()
@@ -0,0 +1,157 @@
+import hashlib
+from functools import wraps
+from flask import request, make_response
+from sqlalchemy import event, exc
+from . import app, db
+from .models import Table_version
+from .response_cache import response_cache
+
+
+# Per table version counters for conditional GETs. Every flush, ORM UPDATE/DELETE and bulk INSERT records
+# the tables it writes, and once the transaction commits their versions are bumped in a short transaction of
+# their own (a version row locked until the writer commits would queue every writer of that table behind the
+# others). Readers that see the new rows before the bump only store them under the old ETag, which stops
+# being handed out as soon as the bump lands. A read endpoint's ETag is a hash of its
+# URL and the versions of the tables its response is built from, so a matching If-None-Match is answered
+# with a 304 after one small SELECT and without running the view or serializing anything. The ETag is also
+# the key of the shared response cache, so other clients asking for the same thing skip the view as well.
+# Responses that also depend on something besides the tables (e.g. the clock, for listings that hide past
+# tee times) pass a `vary` function whose value is mixed into the ETag.
+
+# columns that never show up in a response, changing only these (e.g. a login rotating the token) keeps the ETags
+IGNORED_COLUMNS = {
+    'golfer': {'password', 'token', 'tokenExp'},
+}
+
+# tables with a version row, seeded by the migrations (and by create_all below)
+TRACKED_TABLES = ('golfer', 'course', 'teetime', 'golfer_comment', 'booking', 'teetime_summary',
+                  'teetime_archive', 'golfer_comment_archive', 'booking_archive')
+
+version_table = Table_version.__table__
+
+# listeners called with {table name: new version} after each bump of this process
+bump_listeners = []
+
+
+def on_bump(listener):
+    bump_listeners.append(listener)
+    return listener
+
+
+@event.listens_for(version_table, 'after_create')
+def seed_versions(target, connection, **kw):
+    connection.execute(version_table.insert(), [{'table_name': table_name, 'version': 0} for table_name in TRACKED_TABLES])
+
+
+def bump(tables):
+    # one UPDATE in its own transaction, -> {table name: new version}
+    with db.engine.begin() as connection:
+        versions = dict(connection.execute(
+            version_table.update().where(version_table.c.table_name.in_(sorted(tables)))
+            .values(version=version_table.c.version + 1)
+            .returning(version_table.c.table_name, version_table.c.version)
+        ).all())
+    for listener in bump_listeners:
+        listener(versions)
+    return versions
+
+
+def _changed(obj):
+    state = db.inspect(obj)
+    ignored = IGNORED_COLUMNS.get(state.mapper.local_table.name, set())
+    return any(attr.history.has_changes() for attr in state.attrs if attr.key not in ignored)
+
+
+@event.listens_for(db.session, 'after_flush')
+def bump_flushed_tables(session, flush_context):
+    tables = set()
+    for obj in session.new | session.deleted:
+        tables.add(db.inspect(obj).mapper.local_table.name)
+    for obj in session.dirty:
+        if _changed(obj):
+            tables.add(db.inspect(obj).mapper.local_table.name)
+    tables.discard(version_table.name)
+    if tables:
+        session.info.setdefault('written_tables', set()).update(tables)
+
+
+@event.listens_for(db.session, 'do_orm_execute')
+def bump_statement_table(orm_execute_state):
+    # statements that skip the flush: Teetime.reserve/release style UPDATEs, bulk_insert, bulk DELETEs
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = orm_execute_state.statement.table
+        if table.name != version_table.name:
+            orm_execute_state.session.info.setdefault('written_tables', set()).add(table.name)
+
+
+@event.listens_for(db.session, 'after_commit')
+def bump_written_tables(session):
+    # new versions for the tables this transaction wrote, then drop the cached responses built from them
+    tables = session.info.pop('written_tables', None)
+    if not tables:
+        return
+    try:
+        bump(tables)
+    except exc.SQLAlchemyError:
+        # the write is committed either way, its tables keep serving the old ETags until their next bump
+        app.logger.exception('could not bump the versions of %s', ', '.join(sorted(tables)))
+    response_cache.invalidate(tables)
+
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def forget_written_tables(session, previous_transaction):
+    session.info.pop('written_tables', None)
+
+
+def versions_select(tables):
+    return db.select(Table_version.table_name, Table_version.version).where(Table_version.table_name.in_(tables))
+
+
+def etag_for(versions, vary=None):
+    key = f"{request.full_path}|{request.accept_mimetypes}|{sorted(versions)}|{vary() if vary else ''}"
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def current_etag(tables, vary=None):
+    return etag_for(db.session.execute(versions_select(tables)).all(), vary)
+
+
+# the steps of conditional(), shared with the async views of asgi.py
+
+def cached_response(etag):
+    # a 304 when the client has this version, the cached body when another client asked for it, else None
+    if request.if_none_match.contains(etag):
+        return make_response('', 304)
+    cached = response_cache.get(etag)
+    if cached is not None:
+        return app.response_class(cached, mimetype='application/json')
+    return None
+
+
+def store_response(etag, tables, response):
+    if not response.is_streamed and response.mimetype == 'application/json':
+        response_cache.set(etag, response.get_data(), tables)
+
+
+def add_cache_headers(response, etag):
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f"public, max-age={app.config['HTTP_CACHE_MAX_AGE']}, must-revalidate"
+    response.vary.add('Accept')
+    return response
+
+
+def conditional(*tables, vary=None):
+    # decorator for read only views whose response only depends on the URL, the given tables and vary()
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = current_etag(tables, vary)
+            response = cached_response(etag)
+            if response is None:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                store_response(etag, tables, response)
+            return add_cache_headers(response, etag)
+        return wrapper
+    return decorator
@@ -0,0 +1,14 @@
+# Load tests for the API: python -m benchmarks run|compare (see __main__.py)
+#
+# A synthetic dataset of configurable size is seeded into a throw away sqlite database, then every scenario
+# in scenarios.py is driven either through the Flask test client (in process, no network) or through a local
+# gunicorn (WSGI) or uvicorn (the ASGI mode of app/asgi.py). Latency percentiles, requests/sec and SQL statements per request (read from the Server-Timing
+# header) are written as JSON that can be compared against a stored baseline.
+#
+# The app's own environment variables apply as usual, e.g. RESPONSE_CACHE_BACKEND=none to measure the views
+# instead of response cache hits. Typical use:
+#
+#   python -m benchmarks run -o benchmarks/baseline.json                  # on the main branch
+#   python -m benchmarks run --baseline benchmarks/baseline.json          # on a change, exits 1 on a regression
+#   python -m benchmarks run --target gunicorn --workers 4 --concurrency 8
+#   python -m benchmarks run --target uvicorn --workers 4 --concurrency 64     # the ASGI mode, same numbers to compare
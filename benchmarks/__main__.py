@@ -0,0 +1,177 @@
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+import click
+from .dataset import seed
+from .report import summarize, format_table, compare
+from .runners import ROOT, ClientRunner, GunicornRunner, UvicornRunner
+from .scenarios import SCENARIOS, Scenario, State
+
+# app config recorded with the results, they change what is being measured
+CONFIG_KEYS = ['RATE_LIMIT_BACKEND', 'ADMISSION_MAX_CONCURRENT', 'RESPONSE_CACHE_BACKEND', 'UNIT_OF_WORK_PER_REQUEST', 'PASSWORD_HASH_METHOD', 'PASSWORD_HASH_WORKERS', 'TOKEN_CACHE_SIZE', 'DEFAULT_PAGE_SIZE']
+
+
+@click.group()
+def cli():
+    """Load tests for the API (python -m benchmarks run --help)."""
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_scenario(runner, scenario, state, rng, warmup, requests):
+    def send(request):
+        start = time.perf_counter()
+        status, data, statements, rows = runner.request(*request)
+        latency = time.perf_counter() - start
+        if scenario.record and status in scenario.expect and data:
+            scenario.record(state, data)
+        return status, latency, statements, rows
+
+    # requests are built up front (in order, from the seeded rng) and then sent by the runner
+    runner.run([r for r in (scenario.build(state, rng) for _ in range(warmup)) if r], send)
+    batch = [r for r in (scenario.build(state, rng) for _ in range(requests)) if r]
+    start = time.perf_counter()
+    results = runner.run(batch, send)
+    return summarize(scenario, results, time.perf_counter() - start)
+
+
+def drop(db, indexes):
+    # e.g. python -m benchmarks run --drop-index ix_golfer_token -o before.json, then a run without it and
+    # python -m benchmarks compare before.json results.json
+    known = {index.name for table in db.metadata.tables.values() for index in table.indexes}
+    unknown = set(indexes) - known
+    if unknown:
+        raise click.BadParameter(f"{', '.join(sorted(unknown))} (known: {', '.join(sorted(known))})", param_hint='--drop-index')
+    with db.engine.begin() as connection:
+        for name in indexes:
+            connection.execute(db.text(f'DROP INDEX {name}'))
+
+
+def report(results, baseline, tolerance):
+    click.echo(format_table(results))
+    if baseline:
+        with open(baseline) as f:
+            lines, regressions = compare(json.load(f), results, tolerance)
+        click.echo('\n'.join(lines))
+        if regressions:
+            click.echo(f"{len(regressions)} regression(s) against {baseline}", err=True)
+            sys.exit(1)
+
+
+@cli.command()
+@click.option('--target', type=click.Choice(['client', 'gunicorn', 'uvicorn']), default='client', show_default=True, help='Flask test client in process, or a local gunicorn (WSGI) / uvicorn (ASGI, app/asgi.py) over HTTP.')
+@click.option('--golfers', type=click.IntRange(min=1), default=1000, show_default=True)
+@click.option('--courses', type=click.IntRange(min=1), default=200, show_default=True)
+@click.option('--teetimes', type=click.IntRange(min=1), default=10000, show_default=True)
+@click.option('--comments', type=click.IntRange(min=0), default=20000, show_default=True)
+@click.option('--seed', 'random_seed', default=0, show_default=True, help='Seed of the dataset and of the request mix.')
+@click.option('--requests', type=click.IntRange(min=1), default=200, show_default=True, help='Measured requests per scenario.')
+@click.option('--warmup', type=click.IntRange(min=0), default=10, show_default=True, help='Unmeasured requests per scenario first.')
+@click.option('--concurrency', type=click.IntRange(min=1), default=4, show_default=True, help='Client threads (gunicorn and uvicorn targets).')
+@click.option('--workers', type=click.IntRange(min=1), default=2, show_default=True, help='gunicorn/uvicorn worker processes.')
+@click.option('--threads', type=click.IntRange(min=1), default=1, show_default=True, help='Threads per gunicorn worker.')
+@click.option('--drop-index', 'drop_indexes', multiple=True, help='Drop this index after seeding (repeatable), to measure what it buys against a run with it.')
+@click.option('--only', multiple=True, type=click.Choice([scenario.name for scenario in SCENARIOS]), help='Run only these scenarios (repeatable).')
+@click.option('--output', '-o', default=os.path.join('benchmarks', 'results.json'), show_default=True, help='Where the JSON results are written.')
+@click.option('--baseline', type=click.Path(exists=True, dir_okay=False), help='Results file to compare against, exits 1 on a regression.')
+@click.option('--tolerance', default=0.15, show_default=True, help='Allowed latency/throughput change against the baseline (fraction).')
+def run(target, golfers, courses, teetimes, comments, random_seed, requests, warmup, concurrency, workers, threads, drop_indexes, only, output, baseline, tolerance):
+    """Seed a synthetic dataset into a temporary database and benchmark every endpoint against it."""
+    workdir = tempfile.mkdtemp(prefix='benchmark-')
+    # the app reads its config on import, point it (and gunicorn, which inherits the environment) at the temporary files
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'benchmark.db')
+    os.environ['RESPONSE_CACHE_PATH'] = os.path.join(workdir, 'response_cache.db')
+    os.environ['RATE_LIMIT_PATH'] = os.path.join(workdir, 'rate_limit.db')
+    # every request comes from one address and a handful of golfers, measure the endpoints rather than the limits
+    os.environ.setdefault('RATE_LIMIT_BACKEND', 'none')
+    os.environ.setdefault('ADMISSION_MAX_CONCURRENT', '0')
+    sys.path.insert(0, ROOT)
+    from app import app, db
+
+    runner = None
+    try:
+        started = time.perf_counter()
+        with app.app_context():
+            dataset = seed(golfers, courses, teetimes, comments, random_seed)
+            drop(db, drop_indexes)
+            db.session.remove()
+            db.engine.dispose()
+        click.echo(f"seeded {golfers} golfers, {courses} courses, {teetimes} teetimes, {comments} comments in {time.perf_counter() - started:.1f}s", err=True)
+
+        if target == 'client':
+            runner = ClientRunner(app)
+        elif target == 'gunicorn':
+            runner = GunicornRunner(workers, threads, concurrency, os.path.join(workdir, 'gunicorn.log'))
+        else:
+            runner = UvicornRunner(workers, concurrency, os.path.join(workdir, 'uvicorn.log'))
+
+        rng = random.Random(random_seed)
+        state = State(dataset, run_id=f'{random_seed}-{int(time.time())}')
+        status, data, _, _ = runner.request(*Scenario('login', 'GET', lambda s, r: '/token', auth='basic').build(state, rng))
+        if status != 200:
+            raise click.ClickException(f"could not get a token for {state['username']} ({status})")
+        state['token'] = data['token']
+
+        scenarios = {}
+        for scenario in SCENARIOS:
+            if only and scenario.name not in only:
+                continue
+            scenarios[scenario.name] = run_scenario(runner, scenario, state, rng, warmup, requests)
+            click.echo(f"{scenario.name}: done", err=True)
+    finally:
+        if runner is not None:
+            runner.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    meta = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'target': target,
+        'concurrency': runner.concurrency,
+        'requests': requests,
+        'warmup': warmup,
+        'dataset': dataset,
+        'config': {key: app.config[key] for key in CONFIG_KEYS},
+        'dropped_indexes': sorted(drop_indexes),
+    }
+    if target == 'gunicorn':
+        meta['gunicorn'] = {'workers': workers, 'threads': threads}
+    if target == 'uvicorn':
+        meta['uvicorn'] = {'workers': workers}
+    results = {'meta': meta, 'scenarios': scenarios}
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+        f.write('\n')
+    click.echo(f"results written to {output}", err=True)
+    report(results, baseline, tolerance)
+
+
+@cli.command('compare')
+@click.argument('baseline', type=click.Path(exists=True, dir_okay=False))
+@click.argument('results', type=click.Path(exists=True, dir_okay=False))
+@click.option('--tolerance', default=0.15, show_default=True, help='Allowed latency/throughput change (fraction).')
+def compare_command(baseline, results, tolerance):
+    """Compare a RESULTS file against a BASELINE file, exits 1 on a regression."""
+    with open(results) as f:
+        report(json.load(f), baseline, tolerance)
+
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,97 @@
+import random
+from datetime import date, timedelta
+
+
+# Deterministic synthetic data: the same sizes and seed give the same rows (dates are relative to today so
+# the tee times stay in the future). Everything goes in through bulk_insert (tee times through
+# Teetime.bulk_create, which adds starts_at), a few thousand rows per INSERT.
+
+PASSWORD = 'benchmark'
+
+CITIES = [
+    ('Austin', 'TX', 'US'), ('Dallas', 'TX', 'US'), ('Phoenix', 'AZ', 'US'), ('Orlando', 'FL', 'US'),
+    ('Denver', 'CO', 'US'), ('Seattle', 'WA', 'US'), ('Toronto', 'ON', 'CA'), ('Edinburgh', 'Scotland', 'GB'),
+]
+DESIGNERS = ['Fazio', 'Nicklaus', 'Dye', 'Jones', 'Coore', 'Doak', None]
+NAMES = ['Pines', 'Oaks', 'Links', 'Creek', 'Ridge', 'Valley', 'Dunes', 'Lakes', 'Canyon', 'Meadows']
+COMMENTS = ['Count me in', 'Walking or riding?', 'Running 10 minutes late', 'Anyone want to split a cart?', 'See you at the range']
+
+
+def seed(golfers, courses, teetimes, comments, random_seed=0):
+    # needs an app context; returns the dataset description stored with the results
+    from app import db
+    from app.hashing import hash_password
+    from app.models import Golfer, Course, Teetime, Golfer_comment
+    from app.unit_of_work import bulk_insert
+
+    rng = random.Random(random_seed)
+    db.create_all()
+
+    # one hash shared by every golfer, hashing thousands of passwords would dominate seeding
+    pw_hash = hash_password(PASSWORD)
+    golfer_rows = []
+    for i in range(golfers):
+        city, district, country = rng.choice(CITIES)
+        golfer_rows.append({
+            'first_name': f'First{i}',
+            'last_name': f'Last{i}',
+            'email': f'golfer{i}@example.com',
+            'username': f'golfer{i}',
+            'password': pw_hash,
+            'golfer_age': rng.randint(18, 80),
+            'handicap': round(rng.uniform(0, 36), 1),
+            'city': city,
+            'district': district,
+            'country': country,
+        })
+    golfer_ids = bulk_insert(Golfer, golfer_rows)
+
+    course_rows = []
+    for i in range(courses):
+        city, district, country = rng.choice(CITIES)
+        course_rows.append({
+            'course_name': f'{city} {rng.choice(NAMES)} {i}',
+            'address': f'{i} Fairway Dr',
+            'city': city,
+            'district': district,
+            'country': country,
+            'weekday_price': rng.randint(30, 150),
+            'weekend_price': rng.randint(50, 250),
+            'strict_dress': rng.random() < 0.3,
+            'rating': round(rng.uniform(67, 76), 1),
+            'slope': rng.randint(110, 150),
+            'course_length': rng.randint(5800, 7600),
+            'par': rng.choice([70, 71, 72]),
+            'designer': rng.choice(DESIGNERS),
+        })
+    course_ids = bulk_insert(Course, course_rows)
+
+    today = date.today()
+    teetime_rows = []
+    for i in range(teetimes):
+        course = rng.randrange(courses)
+        teetime_rows.append({
+            'course_name': course_rows[course]['course_name'],
+            'course_id': course_ids[course],
+            'price': rng.randint(30, 250),
+            'teetime_date': (today + timedelta(days=rng.randint(1, 60))).isoformat(),
+            'teetime_time': f'{rng.randint(6, 17):02d}:{rng.choice([0, 10, 20, 30, 40, 50]):02d}',
+            'space_remaining': rng.randint(1, 4),
+            'golfer_id': rng.choice(golfer_ids),
+        })
+    teetime_ids = Teetime.bulk_create(teetime_rows)
+
+    bulk_insert(Golfer_comment, [{
+        'body': rng.choice(COMMENTS),
+        'golfer_id': rng.choice(golfer_ids),
+        'teetime_id': rng.choice(teetime_ids),
+    } for _ in range(comments)])
+
+    return {
+        'golfers': golfers,
+        'courses': courses,
+        'teetimes': teetimes,
+        'comments': comments,
+        'seed': random_seed,
+        'cities': [city for city, _, _ in CITIES],
+    }
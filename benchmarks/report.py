@@ -0,0 +1,98 @@
+import statistics
+from collections import Counter
+
+
+# Per scenario numbers, the table printed after a run and the comparison against a baseline.
+
+# statements are deterministic for a given dataset, so any real growth (not noise) is a regression
+STATEMENT_TOLERANCE = 0.5
+
+
+def percentile(cut_points, p):
+    return cut_points[p - 1] if cut_points else None
+
+
+def summarize(scenario, results, seconds):
+    # results are (status, latency seconds, statements, rows) of every measured request
+    if not results:
+        return {'requests': 0}
+    latencies = sorted(latency * 1000 for _, latency, _, _ in results)
+    cut_points = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+    statements = [statements for _, _, statements, _ in results if statements is not None]
+    rows = [rows for _, _, _, rows in results if rows is not None]
+    statuses = Counter(status for status, _, _, _ in results)
+    return {
+        'requests': len(results),
+        'errors': sum(count for status, count in statuses.items() if status not in scenario.expect),
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'p50_ms': round(percentile(cut_points, 50), 3),
+        'p95_ms': round(percentile(cut_points, 95), 3),
+        'p99_ms': round(percentile(cut_points, 99), 3),
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'requests_per_second': round(len(results) / seconds, 1) if seconds else None,
+        'sql_statements': round(statistics.fmean(statements), 2) if statements else None,
+        'rows_loaded': round(statistics.fmean(rows), 2) if rows else None,
+    }
+
+
+def format_table(results):
+    lines = [f"{'scenario':<20} {'reqs':>6} {'err':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9} {'sql':>6} {'rows':>7}"]
+    for name, numbers in results['scenarios'].items():
+        if not numbers['requests']:
+            lines.append(f"{name:<20} {0:>6}")
+            continue
+        lines.append(
+            f"{name:<20} {numbers['requests']:>6} {numbers['errors']:>4} {numbers['p50_ms']:>9.2f} {numbers['p95_ms']:>9.2f} "
+            f"{numbers['p99_ms']:>9.2f} {numbers['requests_per_second'] or 0:>9.1f} {_number(numbers['sql_statements']):>6} {_number(numbers['rows_loaded']):>7}"
+        )
+    logins = logins_per_core(results)
+    if logins is not None:
+        lines.append(f"login: {logins:.1f} logins/s per core ({results['meta']['cpu_count']} cores)")
+    return '\n'.join(lines)
+
+
+def logins_per_core(results):
+    # successful logins (not the 429s) per second of the login scenario, over the cores of the machine
+    numbers = results['scenarios'].get('login')
+    cores = results['meta'].get('cpu_count')
+    if not numbers or not numbers['requests'] or not numbers['requests_per_second'] or not cores:
+        return None
+    succeeded = numbers['statuses'].get('200', 0) / numbers['requests']
+    return numbers['requests_per_second'] * succeeded / cores
+
+
+def _number(value):
+    return '-' if value is None else f'{value:g}'
+
+
+def compare(baseline, results, tolerance):
+    # returns (report lines, regressions); latency and throughput may move by `tolerance` (a fraction) before they count
+    lines = []
+    regressions = []
+    for key in ('target', 'dataset'):
+        if baseline['meta'].get(key) != results['meta'].get(key):
+            lines.append(f"warning: {key} differs from the baseline, numbers are not directly comparable")
+    for name, numbers in results['scenarios'].items():
+        base = baseline['scenarios'].get(name)
+        if not base or not base.get('requests') or not numbers.get('requests'):
+            continue
+        checks = [
+            ('p95_ms', numbers['p95_ms'] > base['p95_ms'] * (1 + tolerance)),
+            ('p99_ms', numbers['p99_ms'] > base['p99_ms'] * (1 + tolerance)),
+            ('requests_per_second', (numbers['requests_per_second'] or 0) < (base['requests_per_second'] or 0) * (1 - tolerance)),
+            ('sql_statements', base['sql_statements'] is not None and numbers['sql_statements'] is not None
+                and numbers['sql_statements'] > base['sql_statements'] + STATEMENT_TOLERANCE),
+            ('errors', numbers['errors'] > base['errors']),
+        ]
+        for metric, regressed in checks:
+            change = _change(base[metric], numbers[metric])
+            if regressed:
+                regressions.append((name, metric))
+            lines.append(f"{'REGRESSION' if regressed else 'ok':<10} {name:<20} {metric:<20} {_number(base[metric]):>10} -> {_number(numbers[metric]):<10} {change}")
+    return lines, regressions
+
+
+def _change(before, after):
+    if before is None or after is None or before == 0:
+        return ''
+    return f'({(after - before) / before:+.1%})'
@@ -0,0 +1,150 @@
+import http.client
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Runners send one request and return (status, json body or None, SQL statements, rows loaded). The SQL
+# numbers come from the Server-Timing header (see app/instrumentation.py), so they work out of process too.
+
+SERVER_TIMING = re.compile(r'(\d+) statements, (\d+) rows')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_body(content_type, data):
+    if content_type and content_type.startswith('application/json') and data:
+        return json.loads(data)
+    return None
+
+
+def parse_server_timing(header):
+    match = SERVER_TIMING.search(header or '')
+    if match is None:
+        return None, None
+    return int(match.group(1)), int(match.group(2))
+
+
+class ClientRunner:
+    # in process through the Flask test client: no network or WSGI server, measures the app alone
+    name = 'client'
+    concurrency = 1
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, headers, body):
+        response = self.client.open(path, method=method, headers=headers, json=body)
+        return (response.status_code, parse_body(response.content_type, response.data),
+                *parse_server_timing(response.headers.get('Server-Timing')))
+
+    def run(self, requests, send):
+        return [send(request) for request in requests]
+
+    def close(self):
+        pass
+
+
+class ServerRunner:
+    # a local server serving the same database, requests come from `concurrency` threads with one connection each
+    name = None
+
+    def __init__(self, concurrency, log_path):
+        self.concurrency = concurrency
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            self.port = sock.getsockname()[1]
+        self.log = open(log_path, 'wb')
+        self.process = subprocess.Popen(self.command(), cwd=ROOT, stdout=self.log, stderr=subprocess.STDOUT)
+        self._local = threading.local()
+        self._wait_until_ready(log_path)
+
+    def command(self):
+        raise NotImplementedError
+
+    def _wait_until_ready(self, log_path, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                break
+            try:
+                if self.request('GET', '/', {}, None)[0] == 200:
+                    return
+            except OSError:
+                time.sleep(0.1)
+        self.close()
+        with open(log_path, errors='replace') as log:
+            raise RuntimeError(f'{self.name} did not start:\n{log.read()[-2000:]}')
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+        return connection
+
+    def request(self, method, path, headers, body):
+        connection = self._connection()
+        headers = dict(headers)
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+        try:
+            connection.request(method, path, body=data, headers=headers)
+            response = connection.getresponse()
+            content = response.read()
+        except (http.client.HTTPException, OSError):
+            # sync workers close the connection after each response, reconnect once and retry
+            connection.close()
+            connection.request(method, path, body=data, headers=headers)
+            response = connection.getresponse()
+            content = response.read()
+        if response.will_close:
+            connection.close()
+        return (response.status, parse_body(response.getheader('Content-Type'), content),
+                *parse_server_timing(response.getheader('Server-Timing')))
+
+    def run(self, requests, send):
+        with ThreadPoolExecutor(self.concurrency) as executor:
+            return list(executor.map(send, requests))
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.log.close()
+
+
+class GunicornRunner(ServerRunner):
+    # the WSGI app under gunicorn's sync workers (threaded with threads > 1)
+    name = 'gunicorn'
+
+    def __init__(self, workers, threads, concurrency, log_path):
+        self.workers = workers
+        self.threads = threads
+        super().__init__(concurrency, log_path)
+
+    def command(self):
+        return [sys.executable, '-m', 'gunicorn', '--workers', str(self.workers), '--threads', str(self.threads),
+                '--bind', f'127.0.0.1:{self.port}', 'app:app']
+
+
+class UvicornRunner(ServerRunner):
+    # the ASGI mode (app/asgi.py) under uvicorn, needs requirements-asgi.txt
+    name = 'uvicorn'
+
+    def __init__(self, workers, concurrency, log_path):
+        self.workers = workers
+        super().__init__(concurrency, log_path)
+
+    def command(self):
+        return [sys.executable, '-m', 'uvicorn', '--workers', str(self.workers), '--host', '127.0.0.1',
+                '--port', str(self.port), '--no-access-log', 'app.asgi:application']
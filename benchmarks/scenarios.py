@@ -0,0 +1,123 @@
+import base64
+import itertools
+from .dataset import PASSWORD
+
+
+# One scenario per endpoint, run in this order. Write scenarios record what they create so the update and
+# delete scenarios after them have something to work on, which also leaves the dataset as it was.
+
+class Scenario:
+    def __init__(self, name, method, path, body=None, auth=None, expect=(200,), record=None):
+        self.name = name
+        self.method = method
+        self.path = path # (state, rng) -> url, or None to skip the request
+        self.body = body # (state, rng) -> json body
+        self.auth = auth # None, 'token', 'basic' or 'login' (basic as a random seeded golfer)
+        self.expect = expect # statuses that count as a success
+        self.record = record # (state, response json) -> None, keeps created ids around
+
+    def build(self, state, rng):
+        # (method, url, headers, body) of the next request, None when there is nothing left to do
+        path = self.path(state, rng)
+        if path is None:
+            return None
+        headers = {}
+        if self.auth == 'token':
+            headers['Authorization'] = f"Bearer {state['token']}"
+        elif self.auth in ('basic', 'login'):
+            username = state['username'] if self.auth == 'basic' else f"golfer{rng.randrange(state['golfers'])}"
+            credentials = base64.b64encode(f"{username}:{PASSWORD}".encode()).decode()
+            headers['Authorization'] = f'Basic {credentials}'
+        body = self.body(state, rng) if self.body else None
+        return self.method, path, headers, body
+
+
+class State(dict):
+    # shared by all scenarios of a run: credentials, dataset sizes and ids created along the way
+    def __init__(self, dataset, run_id):
+        super().__init__(
+            username='golfer0',
+            token=None,
+            golfers=dataset['golfers'],
+            teetimes=dataset['teetimes'],
+            cities=dataset['cities'],
+            run_id=run_id,
+            counter=itertools.count(),
+            created_teetimes=[],
+            created_comments=[],
+            created_bookings=[],
+        )
+
+    def unique(self, prefix):
+        return f"{prefix}-{self['run_id']}-{next(self['counter'])}"
+
+
+def random_teetime(state, rng):
+    return rng.randint(1, state['teetimes'])
+
+
+def pick(key, url):
+    # formats the url with one of the recorded id tuples (for updates)
+    def path(state, rng):
+        return url.format(*rng.choice(state[key])) if state[key] else None
+    return path
+
+
+def pop(key, url):
+    # formats the url with a recorded id tuple and forgets it (for deletes)
+    def path(state, rng):
+        return url.format(*state[key].pop()) if state[key] else None
+    return path
+
+
+def new_golfer(state, rng):
+    username = state.unique('bench')
+    return {
+        'first_name': 'Bench', 'last_name': 'Mark', 'email': f'{username}@example.com', 'username': username,
+        'password': PASSWORD, 'golfer_age': 40, 'city': 'Austin', 'district': 'TX', 'country': 'US',
+    }
+
+
+def new_course(state, rng):
+    name = state.unique('Benchmark Course')
+    return {'course_name': name, 'address': f'{name} Rd', 'city': 'Austin', 'district': 'TX', 'country': 'US', 'par': 72}
+
+
+def new_teetime(state, rng):
+    return {
+        'course_name': 'Benchmark Course', 'course_id': 1, 'price': rng.randint(30, 250),
+        'teetime_date': '2099-01-01', 'teetime_time': '08:00', 'space_remaining': 4,
+    }
+
+
+SCENARIOS = [
+    Scenario('index', 'GET', lambda s, r: '/'),
+    Scenario('teetimes', 'GET', lambda s, r: '/teetimes?limit=25'),
+    Scenario('teetimes_fields', 'GET', lambda s, r: '/teetimes?limit=100&fields=teetime_id,course_name,teetime_date,teetime_time,price'),
+    Scenario('teetimes_search', 'GET', lambda s, r: f"/teetimes?search={r.choice(s['cities'])}&limit=25"),
+    Scenario('teetimes_summary', 'GET', lambda s, r: '/teetimes/summary?limit=25'),
+    Scenario('teetimes_discover', 'GET', lambda s, r: f"/teetimes/discover?city={r.choice(s['cities'])}&min_spots=2&limit=25"),
+    Scenario('teetime', 'GET', lambda s, r: f'/teetimes/{random_teetime(s, r)}'),
+    Scenario('teetime_comments', 'GET', lambda s, r: f'/teetimes/{random_teetime(s, r)}/golfer_comments?limit=25'),
+    Scenario('teetimes_me', 'GET', lambda s, r: '/teetimes/me?limit=25', auth='token'),
+    Scenario('courses', 'GET', lambda s, r: '/courses?limit=25'),
+    Scenario('golfer_me', 'GET', lambda s, r: '/golfers/me', auth='token'),
+    Scenario('token', 'GET', lambda s, r: '/token', auth='basic'),
+    # password checks spread over the golfers, reported as logins per second per core; a 429 is the hashing
+    # queue (PASSWORD_HASH_QUEUE_LIMIT) turning a request away, the expected answer to more logins than it holds
+    Scenario('login', 'GET', lambda s, r: '/token', auth='login', expect=(200, 429)),
+    Scenario('golfer_create', 'POST', lambda s, r: '/golfers', body=new_golfer, expect=(201,)),
+    Scenario('golfer_update', 'PUT', lambda s, r: '/golfers/me', body=lambda s, r: {'handicap': r.randint(0, 36)}, auth='token'),
+    Scenario('course_create', 'POST', lambda s, r: '/courses', body=new_course, expect=(201,)),
+    Scenario('teetime_create', 'POST', lambda s, r: '/teetimes', body=new_teetime, auth='token', expect=(201,),
+             record=lambda s, data: s['created_teetimes'].append((data['teetime_id'],))),
+    Scenario('teetime_update', 'PUT', pick('created_teetimes', '/teetimes/{}'), body=lambda s, r: {'price': r.randint(30, 250)}, auth='token'),
+    Scenario('comment_create', 'POST', lambda s, r: f'/teetimes/{random_teetime(s, r)}/golfer_comments', body=lambda s, r: {'body': 'benchmark'},
+             auth='token', expect=(201,), record=lambda s, data: s['created_comments'].append((data['teetime_id'], data['id']))),
+    Scenario('comment_delete', 'DELETE', pop('created_comments', '/teetimes/{}/golfer_comments/{}'), auth='token'),
+    # a teetime that is full answers 409, which is a normal outcome under load
+    Scenario('booking_create', 'POST', lambda s, r: f'/teetimes/{random_teetime(s, r)}/bookings', body=lambda s, r: {'spots': 1},
+             auth='token', expect=(201, 409), record=lambda s, data: 'booking_id' in data and s['created_bookings'].append((data['teetime_id'], data['booking_id']))),
+    Scenario('booking_delete', 'DELETE', pop('created_bookings', '/teetimes/{}/bookings/{}'), auth='token'),
+    Scenario('teetime_delete', 'DELETE', pop('created_teetimes', '/teetimes/{}'), auth='token'),
+]
@@ -3,5 +3,108 @@ import os
 #get the base directory of this folder -- basedir for this page would be the path thru my comp to get here///
 basedir = os.path.abspath(os.path.dirname(__file__))
 
+def engine_options(uri):
+    # SQLALCHEMY_ENGINE_OPTIONS for the database in use (every gunicorn worker gets its own pool of this size)
+    sqlite = uri.startswith('sqlite')
+    if sqlite and (uri in ('sqlite://', 'sqlite:///') or ':memory:' in uri):
+        return {} # in memory databases keep flask-sqlalchemy's single connection pool
+    options = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)), # seconds to wait for a connection before a 503
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)), # reconnect before server/proxy idle timeouts drop connections
+        # a cheap ping on checkout replaces connections the server closed, on by default except for sqlite
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', 'false' if sqlite else 'true').lower() in ('1', 'true', 'yes'),
+    }
+    statement_timeout = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 0))
+    if statement_timeout and uri.startswith('postgres'):
+        options['connect_args'] = {'options': f'-c statement_timeout={statement_timeout}'}
+    return options
+
+
 class Config:
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///' + os.path.join(basedir, 'app.db')
\ No newline at end of file
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///' + os.path.join(basedir, 'app.db')
+    # connection pool (DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING) and
+    # DB_STATEMENT_TIMEOUT_MS (postgres, 0 = no limit), see engine_options above
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 0))
+    # read replicas (comma separated database URLs) for GET requests, used while they are at most
+    # REPLICA_MAX_LAG_SECONDS behind the primary, checked every REPLICA_CHECK_INTERVAL seconds (see app/replicas.py)
+    REPLICA_DATABASE_URLS = [url.strip() for url in os.environ.get('REPLICA_DATABASE_URLS', '').split(',') if url.strip()]
+    SQLALCHEMY_BINDS = {f'replica_{i}': {'url': url, **engine_options(url)} for i, url in enumerate(REPLICA_DATABASE_URLS)}
+    REPLICA_MAX_LAG_SECONDS = float(os.environ.get('REPLICA_MAX_LAG_SECONDS', 5))
+    REPLICA_CHECK_INTERVAL = float(os.environ.get('REPLICA_CHECK_INTERVAL', 1))
+    # sqlite connections are opened in WAL mode with these settings (see app/engine.py)
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+
+    # keyset pagination for the listing endpoints (?limit=&cursor=)
+    DEFAULT_PAGE_SIZE = int(os.environ.get('DEFAULT_PAGE_SIZE', 25))
+    MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', 100))
+
+    # time zone of the teetime_date/teetime_time strings (IANA name), see app/schedule.py
+    TEETIME_TIMEZONE = os.environ.get('TEETIME_TIMEZONE', 'UTC')
+
+    # comments embedded in each teetime (the newest ones, the rest are paged by GET /teetimes/<id>/golfer_comments)
+    TEETIME_LATEST_COMMENTS = int(os.environ.get('TEETIME_LATEST_COMMENTS', 3))
+
+    # rows fetched per round trip when streaming a listing as NDJSON (?stream=1)
+    STREAM_CHUNK_SIZE = int(os.environ.get('STREAM_CHUNK_SIZE', 500))
+
+    # in process token auth cache (entries per worker, seconds an entry may live)
+    TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 4096))
+    TOKEN_CACHE_TTL = int(os.environ.get('TOKEN_CACHE_TTL', 60))
+
+    # defer model commits to one commit at the end of each request (see app/unit_of_work.py)
+    UNIT_OF_WORK_PER_REQUEST = os.environ.get('UNIT_OF_WORK_PER_REQUEST', '').lower() in ('1', 'true', 'yes')
+
+    # password hashing: werkzeug method string (e.g. "scrypt:32768:8:1" or "pbkdf2:sha256:600000"), changing it
+    # rehashes each golfer's password on their next login. Hashes run in a pool of PASSWORD_HASH_WORKERS processes
+    # (0 = inline on the request thread), the queue limit is how many may be running or waiting per worker process
+    # before a 429. By default one pool process per core and two queued hashes per core
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+    PASSWORD_HASH_QUEUE_LIMIT = int(os.environ.get('PASSWORD_HASH_QUEUE_LIMIT', 2 * (os.cpu_count() or 1)))
+
+    # max-age of the Cache-Control header on ETag'd read endpoints (0 = clients revalidate every time, which is a cheap 304)
+    HTTP_CACHE_MAX_AGE = int(os.environ.get('HTTP_CACHE_MAX_AGE', 0))
+
+    # cache of serialized read responses: "memory" (per worker LRU), "sqlite" (file shared by all workers) or "none"
+    RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'memory')
+    RESPONSE_CACHE_PATH = os.environ.get('RESPONSE_CACHE_PATH') or os.path.join(basedir, 'response_cache.db')
+    RESPONSE_CACHE_MAX_BYTES = int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+    # JSON encoder of the responses: "orjson" (pip install orjson), "json" (standard library) or "auto" (orjson when installed)
+    JSON_ENCODER = os.environ.get('JSON_ENCODER', 'auto')
+
+    # token bucket rate limits per client as "requests/seconds" (bursts of up to `requests`, refilled over `seconds`,
+    # "0" = no limit): "default" for every route, "auth" for login, token and sign up, per username and per IP.
+    # The buckets live per worker ("memory", at most RATE_LIMIT_MAX_KEYS clients), in a file shared by all workers
+    # ("sqlite") or nowhere ("none", no rate limiting), see app/rate_limit.py
+    RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+    RATE_LIMIT_PATH = os.environ.get('RATE_LIMIT_PATH') or os.path.join(basedir, 'rate_limit.db')
+    RATE_LIMIT_MAX_KEYS = int(os.environ.get('RATE_LIMIT_MAX_KEYS', 100_000))
+    RATE_LIMITS = {
+        'default': os.environ.get('RATE_LIMIT_DEFAULT', '600/60'),
+        'auth': os.environ.get('RATE_LIMIT_AUTH', '10/60'),
+    }
+    # requests a worker process handles at once before answering 503 (default: DB_POOL_SIZE + DB_MAX_OVERFLOW, 0 = no limit)
+    ADMISSION_MAX_CONCURRENT = int(os.environ['ADMISSION_MAX_CONCURRENT']) if os.environ.get('ADMISSION_MAX_CONCURRENT') else None
+
+    # seconds between checks whether other worker processes changed golfers, courses or teetimes, which then rebuilds
+    # this worker's /teetimes/recommended index in the background (0 = only this worker's own writes are picked up)
+    RECOMMENDATIONS_REFRESH_SECONDS = float(os.environ.get('RECOMMENDATIONS_REFRESH_SECONDS', 60))
+
+    # tee times that started more than ARCHIVE_AFTER_DAYS ago move to the archive tables with their comments and
+    # bookings, ARCHIVE_BATCH_SIZE tee times per transaction, by `flask archive` or every ARCHIVE_INTERVAL_SECONDS
+    # by whichever worker takes the archive lease first (0 = only by the command), see app/archive.py. A run
+    # holds the lease for ARCHIVE_LEASE_SECONDS past each batch, so a crashed runner blocks the others that long
+    ARCHIVE_AFTER_DAYS = float(os.environ.get('ARCHIVE_AFTER_DAYS', 30))
+    ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE', 1000))
+    ARCHIVE_INTERVAL_SECONDS = float(os.environ.get('ARCHIVE_INTERVAL_SECONDS', 0))
+    ARCHIVE_LEASE_SECONDS = float(os.environ.get('ARCHIVE_LEASE_SECONDS', 300))
+
+    # statements and requests slower than these (milliseconds) are logged as warnings, statements with their parameters
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 100))
+    SLOW_REQUEST_MS = float(os.environ.get('SLOW_REQUEST_MS', 1000))
@@ -0,0 +1,32 @@
+"""table_version rows for the summary and archive tables
+
+Revision ID: 242a1fb5649c
+Revises: e72217950dfb
+Create Date: 2026-10-18 10:12:40.518302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '242a1fb5649c'
+down_revision = 'e72217950dfb'
+branch_labels = None
+depends_on = None
+
+# tables written since f49199772c2b seeded the first rows (their versions used to be inserted on first write)
+TABLES = ('teetime_summary', 'teetime_archive', 'golfer_comment_archive', 'booking_archive')
+
+
+def upgrade():
+    table_version = sa.table('table_version', sa.column('table_name', sa.String), sa.column('version', sa.Integer))
+    connection = op.get_bind()
+    existing = set(connection.execute(sa.select(table_version.c.table_name)).scalars())
+    missing = [{'table_name': table_name, 'version': 0} for table_name in TABLES if table_name not in existing]
+    if missing:
+        op.bulk_insert(table_version, missing)
+
+
+def downgrade():
+    pass
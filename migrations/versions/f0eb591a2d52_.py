@@ -0,0 +1,52 @@
+"""full text search table for teetimes
+
+Revision ID: f0eb591a2d52
+Revises: ccfb0f09f122
+Create Date: 2026-10-17 19:12:44.518302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f0eb591a2d52'
+down_revision = 'ccfb0f09f122'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("CREATE VIRTUAL TABLE teetime_search USING fts5(course_name, city, district, designer, teetime_date)")
+        key = 'rowid'
+    elif dialect == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute("""CREATE TABLE teetime_search (
+            teetime_id INTEGER PRIMARY KEY REFERENCES teetime (teetime_id) ON DELETE CASCADE,
+            course_name TEXT,
+            city TEXT,
+            district TEXT,
+            designer TEXT,
+            teetime_date TEXT,
+            document tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('simple', coalesce(course_name, '')), 'A') ||
+                setweight(to_tsvector('simple', coalesce(city, '') || ' ' || coalesce(district, '')), 'B') ||
+                setweight(to_tsvector('simple', coalesce(designer, '') || ' ' || coalesce(teetime_date, '')), 'C')
+            ) STORED
+        )""")
+        op.execute("CREATE INDEX ix_teetime_search_document ON teetime_search USING gin (document)")
+        op.execute("CREATE INDEX ix_teetime_search_course_name_trgm ON teetime_search USING gin (course_name gin_trgm_ops)")
+        key = 'teetime_id'
+    else:
+        # other databases fall back to LIKE searches
+        return
+    op.execute(f"""INSERT INTO teetime_search ({key}, course_name, city, district, designer, teetime_date)
+        SELECT t.teetime_id, coalesce(c.course_name, t.course_name), c.city, c.district, c.designer, t.teetime_date
+        FROM teetime t LEFT JOIN course c ON c.course_id = t.course_id""")
+
+
+def downgrade():
+    if op.get_bind().dialect.name in ('sqlite', 'postgresql'):
+        op.execute("DROP TABLE IF EXISTS teetime_search")
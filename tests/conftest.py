@@ -0,0 +1,67 @@
+import os
+import tempfile
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+
+# config.py reads the environment when the app is imported: a throwaway sqlite file (or the database in
+# TEST_DATABASE_URL, e.g. an empty postgres one), fast password hashes made inline and nothing cached or rate limited between requests
+if os.environ.get('TEST_DATABASE_URL'):
+    os.environ['DATABASE_URL'] = os.environ['TEST_DATABASE_URL']
+else:
+    _fd, DATABASE_PATH = tempfile.mkstemp(suffix='.db')
+    os.close(_fd)
+    os.environ['DATABASE_URL'] = 'sqlite:///' + DATABASE_PATH
+os.environ['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+os.environ['PASSWORD_HASH_WORKERS'] = '0'
+os.environ['RATE_LIMIT_BACKEND'] = 'none'
+os.environ['RESPONSE_CACHE_BACKEND'] = 'none'
+
+from app import app as flask_app, db
+from app.models import Golfer, Course, Teetime
+
+
+@pytest.fixture
+def app():
+    with flask_app.app_context():
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def make_golfer(i):
+    return Golfer(first_name='First', last_name='Last', email=f'golfer{i}@example.com', username=f'golfer{i}',
+                  password='secret', golfer_age=30, city='Austin', district='TX', country='US')
+
+
+def make_course(i):
+    return Course(course_name=f'Course {i}', address=f'{i} Fairway Dr', city='Austin', district='TX', country='US', par=72)
+
+
+def make_teetime(golfer, course, space_remaining=3, teetime_date='2030-10-24'):
+    return Teetime(course_name=course.course_name, price=50, teetime_date=teetime_date, teetime_time='08:00',
+                   space_remaining=space_remaining, golfer_id=golfer.golfer_id, course_id=course.course_id)
+
+
+def bearer(golfer):
+    return {'Authorization': 'Bearer ' + golfer.get_token()['token']}
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
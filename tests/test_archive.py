@@ -0,0 +1,61 @@
+import threading
+from datetime import datetime, timezone, timedelta
+from app import db
+from app.archive import archive, horizon, lease_table, LEASE
+from app.models import Teetime, Teetime_archive
+from conftest import make_golfer, make_course, make_teetime
+
+
+def add_past_teetimes(n):
+    golfer, course = make_golfer(0), make_course(0)
+    for _ in range(n):
+        make_teetime(golfer, course, teetime_date='2020-10-24')
+
+
+def set_lease(holder, expires_at):
+    with db.engine.begin() as connection:
+        connection.execute(lease_table.update().where(lease_table.c.name == LEASE).values(holder=holder, expires_at=expires_at))
+
+
+def lease():
+    with db.engine.connect() as connection:
+        return connection.execute(db.select(lease_table.c.holder, lease_table.c.expires_at).where(lease_table.c.name == LEASE)).one()
+
+
+def count(model):
+    return db.session.scalar(db.select(db.func.count()).select_from(model))
+
+
+def test_archive_skips_while_another_run_holds_the_lease(app):
+    add_past_teetimes(3)
+    set_lease('other-host:1:1', datetime.now(timezone.utc) + timedelta(minutes=5))
+    assert archive(horizon(), 2) is None
+    assert count(Teetime_archive) == 0
+
+    # the holder died: once its lease expires the next run takes over, and lets go when it is done
+    set_lease('other-host:1:1', datetime.now(timezone.utc) - timedelta(seconds=1))
+    assert archive(horizon(), 2) == 3
+    assert count(Teetime_archive) == 3 and count(Teetime) == 0
+    assert tuple(lease()) == (None, None)
+
+
+def test_concurrent_archive_runs_move_each_teetime_once(app):
+    add_past_teetimes(20)
+    results, errors = [], []
+
+    def run():
+        try:
+            with app.app_context():
+                results.append(archive(horizon(), 3))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert sum(moved or 0 for moved in results) == 20
+    assert count(Teetime_archive) == 20 and count(Teetime) == 0
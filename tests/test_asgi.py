@@ -0,0 +1,61 @@
+import asyncio
+import threading
+import time
+import pytest
+from conftest import make_golfer, make_course, make_teetime, bearer
+
+httpx = pytest.importorskip('httpx') # requirements-asgi.txt
+asgi = pytest.importorskip('app.asgi')
+
+
+def asgi_requests(requests):
+    # sends (method, url, headers) requests to the ASGI app at once, from a thread of its own like a server would
+    # (not inside the test's app context) -> responses
+    async def send_all():
+        transport = httpx.ASGITransport(app=asgi.application)
+        async with httpx.AsyncClient(transport=transport, base_url='http://testserver') as client:
+            return await asyncio.gather(*(client.request(method, url, headers=headers) for method, url, headers in requests))
+
+    responses = []
+    thread = threading.Thread(target=lambda: responses.extend(asyncio.run(send_all())))
+    thread.start()
+    thread.join()
+    return responses
+
+
+def test_asgi_reads_match_the_flask_views(client):
+    golfer, course = make_golfer(0), make_course(0)
+    teetime_id = make_teetime(golfer, course).teetime_id
+    for url in ('/teetimes?limit=10', f'/teetimes/{teetime_id}', f'/teetimes/{teetime_id}/golfer_comments', '/courses', '/teetimes/404'):
+        flask_response = client.get(url, headers={'Accept': '*/*'}) # what httpx sends, the ETag varies on it
+        [response] = asgi_requests([('GET', url, {})])
+        assert response.status_code == flask_response.status_code
+        assert response.json() == flask_response.json
+        assert response.headers.get('ETag') == flask_response.headers.get('ETag')
+
+    etag = client.get('/courses', headers={'Accept': '*/*'}).headers['ETag']
+    [response] = asgi_requests([('GET', '/courses', {'If-None-Match': etag})])
+    assert response.status_code == 304
+
+    # everything else is served by the Flask app
+    [response] = asgi_requests([('GET', '/golfers/me', bearer(golfer))])
+    assert response.status_code == 200 and response.json()['username'] == 'golfer0'
+
+
+def test_asgi_request_hooks_run_on_several_threads(app):
+    threads = set()
+
+    def slow_hook():
+        threads.add(threading.get_ident())
+        time.sleep(0.05)
+
+    app.before_request_funcs.setdefault(None, []).append(slow_hook)
+    try:
+        started = time.perf_counter()
+        responses = asgi_requests([('GET', '/courses', {})] * 4)
+        elapsed = time.perf_counter() - started
+    finally:
+        app.before_request_funcs[None].remove(slow_hook)
+    assert [response.status_code for response in responses] == [200] * 4
+    assert len(threads) > 1
+    assert elapsed < 4 * 0.05
@@ -0,0 +1,95 @@
+import threading
+from app import db
+from app.models import Teetime, Booking
+from conftest import make_golfer, make_course, make_teetime, bearer
+
+CAPACITY = 3
+JOINERS = 6
+ROUNDS = 10
+
+
+def test_concurrent_bookings_and_cancels_stay_within_capacity(app):
+    golfers = [make_golfer(i) for i in range(JOINERS + 1)]
+    teetime = make_teetime(golfers[0], make_course(0), space_remaining=CAPACITY)
+    teetime_id = teetime.teetime_id
+    headers = [bearer(golfer) for golfer in golfers[1:]]
+
+    errors = []
+    done = threading.Event()
+
+    def watch():
+        # space_remaining as other transactions see it, read while the joiners run
+        with app.app_context():
+            while not done.is_set():
+                spots = db.session.scalar(db.select(Teetime.space_remaining).where(Teetime.teetime_id == teetime_id))
+                db.session.rollback()
+                if not 0 <= spots <= CAPACITY:
+                    errors.append(f'space_remaining {spots}')
+
+    def cancel(client, auth, booking_id, codes):
+        codes.append(client.delete(f'/teetimes/{teetime_id}/bookings/{booking_id}', headers=auth).status_code)
+
+    def join(auth):
+        client = app.test_client()
+        for _ in range(ROUNDS):
+            response = client.post(f'/teetimes/{teetime_id}/bookings', json={'spots': 1}, headers=auth)
+            if response.status_code == 409:
+                continue
+            if response.status_code != 201:
+                errors.append(f'book {response.status_code}')
+                continue
+            # the same booking cancelled twice at once: exactly one of them gives the spot back
+            codes = []
+            cancels = [threading.Thread(target=cancel, args=(app.test_client(), auth, response.json['booking_id'], codes)) for _ in range(2)]
+            for thread in cancels:
+                thread.start()
+            for thread in cancels:
+                thread.join()
+            if sorted(codes) != [200, 404]:
+                errors.append(f'cancel {sorted(codes)}')
+
+    watcher = threading.Thread(target=watch)
+    watcher.start()
+    joiners = [threading.Thread(target=join, args=(auth,)) for auth in headers]
+    for thread in joiners:
+        thread.start()
+    for thread in joiners:
+        thread.join()
+    done.set()
+    watcher.join()
+
+    assert errors == []
+    db.session.expire_all()
+    assert db.session.get(Teetime, teetime_id).space_remaining == CAPACITY
+    assert db.session.scalar(db.select(db.func.count()).select_from(Booking)) == 0
+
+
+def test_full_teetime_is_not_overbooked(app):
+    golfers = [make_golfer(i) for i in range(JOINERS + 1)]
+    teetime_id = make_teetime(golfers[0], make_course(0), space_remaining=CAPACITY).teetime_id
+    headers = [bearer(golfer) for golfer in golfers[1:]]
+
+    codes = []
+
+    def book(auth):
+        codes.append(app.test_client().post(f'/teetimes/{teetime_id}/bookings', json={'spots': 1}, headers=auth).status_code)
+
+    threads = [threading.Thread(target=book, args=(auth,)) for auth in headers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(codes) == [201] * CAPACITY + [409] * (JOINERS - CAPACITY)
+    db.session.expire_all()
+    assert db.session.get(Teetime, teetime_id).space_remaining == 0
+
+
+def test_deleting_a_booked_teetime_deletes_its_bookings(client):
+    host, joiner = make_golfer(0), make_golfer(1)
+    teetime_id = make_teetime(host, make_course(0)).teetime_id
+    assert client.post(f'/teetimes/{teetime_id}/bookings', json={'spots': 2}, headers=bearer(joiner)).status_code == 201
+
+    assert client.delete(f'/teetimes/{teetime_id}', headers=bearer(host)).status_code == 200
+    assert db.session.get(Teetime, teetime_id) is None
+    assert db.session.scalar(db.select(db.func.count()).select_from(Booking)) == 0
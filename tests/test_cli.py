@@ -0,0 +1,80 @@
+import json
+from app import db
+from app.models import Course, Teetime, Teetime_summary
+from conftest import make_golfer, make_course, make_teetime
+
+
+def invoke(app, *args):
+    return app.test_cli_runner().invoke(args=list(args))
+
+
+def test_course_import_skips_duplicates_and_reports_invalid_rows(app, tmp_path):
+    make_course(0)
+    path = tmp_path / 'courses.csv'
+    path.write_text(
+        'course_name,address,city,district,country,par\n'
+        'Pebble Beach,1 Ocean Rd,Monterey,CA,US,72\n'
+        'Pebble Beach,2 Other Rd,Monterey,CA,US,72\n' # same name as the row before
+        'Course 0,3 Elsewhere,Austin,TX,US,70\n' # already in the database
+        'No Par,4 Nowhere,Austin,TX,US,\n'
+        'Bad Par,5 Nowhere,Austin,TX,US,seventy\n'
+        'Austin Country Club,6 Club Dr,Austin,TX,US,71\n'
+    )
+    result = invoke(app, 'courses', 'import', str(path), '--chunk-size', '2')
+    assert result.exit_code == 0, result.output
+    assert 'row 4: par must be present' in result.output
+    assert 'row 5: ' in result.output
+    assert result.output.strip().splitlines()[-1] == 'course: 2 imported, 2 duplicates skipped, 2 invalid'
+    assert db.session.scalars(db.select(Course.course_name).order_by(Course.course_id)).all() == ['Course 0', 'Pebble Beach', 'Austin Country Club']
+
+
+def test_teetime_export_import_round_trip(app, tmp_path):
+    golfer, course = make_golfer(0), make_course(0)
+    make_teetime(golfer, course)
+    make_teetime(golfer, course, teetime_date='2030-10-25', space_remaining=1)
+    columns = [column.key for column in Teetime.__table__.columns if column.key != 'teetime_id']
+
+    def rows():
+        return [tuple(row) for row in db.session.execute(db.select(*(Teetime.__table__.c[key] for key in columns)).order_by(Teetime.teetime_id))]
+
+    before = rows()
+    for fmt in ('csv', 'ndjson'):
+        path = str(tmp_path / f'teetimes.{fmt}')
+        result = invoke(app, 'teetimes', 'export', path)
+        assert result.exit_code == 0, result.output
+        if fmt == 'ndjson':
+            assert [json.loads(line)['teetime_date'] for line in open(path)] == ['2030-10-24', '2030-10-25']
+
+        # importing into the same table only finds duplicates
+        result = invoke(app, 'teetimes', 'import', path)
+        assert result.output.strip().splitlines()[-1] == 'teetime: 0 imported, 2 duplicates skipped, 0 invalid'
+
+        db.session.execute(db.delete(Teetime_summary))
+        db.session.execute(db.delete(Teetime))
+        db.session.commit()
+        result = invoke(app, 'teetimes', 'import', path)
+        assert result.exit_code == 0, result.output
+        assert rows() == before
+
+
+def test_check_summary_finds_and_fixes_stale_rows(app):
+    golfer, course = make_golfer(0), make_course(0)
+    teetime_id = make_teetime(golfer, course).teetime_id
+    make_teetime(golfer, course)
+
+    result = invoke(app, 'check-summary')
+    assert result.exit_code == 0
+    assert 'teetime_summary is consistent' in result.output
+
+    # an UPDATE the mapper events never see
+    db.session.execute(db.update(Teetime).where(Teetime.teetime_id == teetime_id).values(price=99).execution_options(synchronize_session=False))
+    db.session.commit()
+    result = invoke(app, 'check-summary')
+    assert result.exit_code == 1
+    assert f'1 teetime(s) with a missing, stale or orphaned summary row: {teetime_id}' in result.output
+
+    result = invoke(app, 'check-summary', '--fix')
+    assert result.exit_code == 0
+    assert 'Fixed 1 teetime(s)' in result.output
+    assert db.session.get(Teetime_summary, teetime_id).price == 99
+    assert invoke(app, 'check-summary').exit_code == 0
@@ -0,0 +1,45 @@
+from app.models import Golfer_comment
+from conftest import make_golfer, make_course, make_teetime
+
+
+def add_comments(golfer, teetime_id, n):
+    return [Golfer_comment(body=f'Comment {i}', golfer_id=golfer.golfer_id, teetime_id=teetime_id).golfer_comment_id for i in range(n)]
+
+
+def test_comments_are_paged_oldest_first(client):
+    golfer, course = make_golfer(0), make_course(0)
+    teetime_id = make_teetime(golfer, course).teetime_id
+    other_id = make_teetime(golfer, course).teetime_id
+    ids = add_comments(golfer, teetime_id, 5)
+    add_comments(golfer, other_id, 2)
+
+    seen = []
+    url = f'/teetimes/{teetime_id}/golfer_comments?limit=2'
+    while url:
+        page = client.get(url).json
+        seen.extend(comment['id'] for comment in page['items'])
+        assert all(comment['teetime_id'] == teetime_id and comment['golfer']['username'] == 'golfer0' for comment in page['items'])
+        url = page['next_cursor'] and f"/teetimes/{teetime_id}/golfer_comments?limit=2&cursor={page['next_cursor']}"
+    assert seen == ids
+
+    assert client.get(f'/teetimes/{other_id}/golfer_comments?fields=body').json == [{'body': 'Comment 0'}, {'body': 'Comment 1'}]
+    assert client.get('/teetimes/404/golfer_comments').status_code == 404
+
+
+def test_teetimes_embed_their_comment_count_and_latest_comments(client):
+    golfer, course = make_golfer(0), make_course(0)
+    busy_id = make_teetime(golfer, course).teetime_id
+    quiet_id = make_teetime(golfer, course).teetime_id
+    empty_id = make_teetime(golfer, course).teetime_id
+    busy = add_comments(golfer, busy_id, 5)
+    quiet = add_comments(golfer, quiet_id, 1)
+
+    teetime = client.get(f'/teetimes/{busy_id}').json
+    assert teetime['comment_count'] == 5
+    # the TEETIME_LATEST_COMMENTS (3) newest, newest first
+    assert [comment['id'] for comment in teetime['golfer_comments']] == busy[:-4:-1]
+
+    # the limit is per teetime in a listing, not over the whole page
+    listing = {item['teetime_id']: item for item in client.get('/teetimes').json}
+    assert [(listing[i]['comment_count'], len(listing[i]['golfer_comments'])) for i in (busy_id, quiet_id, empty_id)] == [(5, 3), (1, 1), (0, 0)]
+    assert [comment['id'] for comment in listing[quiet_id]['golfer_comments']] == quiet
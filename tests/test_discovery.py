@@ -0,0 +1,55 @@
+from conftest import make_golfer, make_course, make_teetime
+
+
+def test_discover_filters_on_starts_at_whatever_the_date_format(client):
+    golfer, course = make_golfer(0), make_course(0)
+    upcoming = make_teetime(golfer, course, teetime_date='10/24/2030').teetime_id
+    past = make_teetime(golfer, course, teetime_date='10/24/2020').teetime_id
+    iso = make_teetime(golfer, course, teetime_date='2030-10-25').teetime_id
+
+    def ids(url):
+        return {item['teetime_id'] for item in client.get(url).json['items']}
+
+    assert ids('/teetimes/discover') == {upcoming, iso}
+    assert ids('/teetimes/discover?include_past=1') == {upcoming, past, iso}
+    assert ids('/teetimes/discover?include_archived=1') == {upcoming, past, iso}
+    assert ids('/teetimes/discover?from=2030-10-25') == {iso}
+
+
+def test_discover_pages_in_start_order_whatever_the_date_format(client):
+    golfer, course = make_golfer(0), make_course(0)
+    # inserted out of order, one with commas in its date
+    late = make_teetime(golfer, course, teetime_date='2030-10-26').teetime_id
+    comma = make_teetime(golfer, course, teetime_date='October 24, 2030').teetime_id
+    slash = make_teetime(golfer, course, teetime_date='10/25/2030').teetime_id
+
+    pages, url = [], '/teetimes/discover?limit=1'
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        pages.append([item['teetime_id'] for item in response.json['items']])
+        cursor = response.json['next_cursor']
+        url = f'/teetimes/discover?limit=1&cursor={cursor}' if cursor else None
+    assert pages == [[comma], [slash], [late]]
+
+    assert client.get('/teetimes/discover?cursor=October 24, 2030,08:00,1').status_code == 400
+
+
+def test_discover_date_and_time_filters_use_the_parsed_start(client):
+    golfer, course = make_golfer(0), make_course(0)
+    morning = make_teetime(golfer, course, teetime_date='10/24/2030').teetime_id # 08:00
+    evening = make_teetime(golfer, course, teetime_date='October 24, 2030')
+    evening.update(teetime_time='6:30 PM')
+    next_day = make_teetime(golfer, course, teetime_date='2030-10-25').teetime_id
+
+    def ids(query):
+        response = client.get('/teetimes/discover?' + query)
+        assert response.status_code == 200, response.json
+        return [item['teetime_id'] for item in response.json['items']]
+
+    assert ids('date_from=2030-10-24&date_to=2030-10-24') == [morning, evening.teetime_id]
+    assert ids('date_from=2030-10-25') == [next_day]
+    assert ids('time_from=18:00') == [evening.teetime_id]
+    assert ids('time_to=9:00 AM') == [morning, next_day]
+    assert client.get('/teetimes/discover?time_from=noonish').status_code == 400
+    assert client.get('/teetimes/discover?date_to=24/10/2030').status_code == 400
@@ -0,0 +1,34 @@
+import base64
+import threading
+from app import hashing
+from conftest import make_golfer
+
+
+def basic(username, password):
+    return {'Authorization': 'Basic ' + base64.b64encode(f'{username}:{password}'.encode()).decode()}
+
+
+def test_login_gets_429_when_the_hashing_queue_is_full(client, monkeypatch):
+    make_golfer(0)
+    full = threading.BoundedSemaphore(1)
+    full.acquire()
+    monkeypatch.setattr(hashing, '_slots', full)
+    response = client.get('/token', headers=basic('golfer0', 'secret'))
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '1'
+
+    full.release()
+    assert client.get('/token', headers=basic('golfer0', 'secret')).status_code == 200
+
+
+def test_hashes_on_the_pool(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'PASSWORD_HASH_WORKERS', 1)
+    monkeypatch.setattr(hashing, '_pool', None)
+    try:
+        pw_hash = hashing.hash_password('secret')
+        assert hashing.verify_password(pw_hash, 'secret')
+        assert not hashing.verify_password(pw_hash, 'wrong')
+        assert [hashing.verify_password(h, p) for h, p in zip(hashing.hash_passwords(['a', 'b']), ['a', 'b'])] == [True, True]
+        assert not hashing.needs_rehash(pw_hash)
+    finally:
+        hashing._pool.shutdown()
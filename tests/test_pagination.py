@@ -0,0 +1,50 @@
+from conftest import make_golfer, make_course, make_teetime, count_queries
+
+
+def get(client, url):
+    response = client.get(url)
+    assert response.status_code == 200, response.json
+    return response.json
+
+
+def test_pages_follow_the_cursor_within_the_size_bounds(client, app, monkeypatch):
+    monkeypatch.setitem(app.config, 'DEFAULT_PAGE_SIZE', 2)
+    monkeypatch.setitem(app.config, 'MAX_PAGE_SIZE', 3)
+    ids = [make_course(i).course_id for i in range(5)]
+
+    # no limit or cursor is the whole list, unpaged
+    assert [course['course_id'] for course in get(client, '/courses')] == ids
+
+    page = get(client, '/courses?limit=100') # capped at MAX_PAGE_SIZE
+    assert [course['course_id'] for course in page['items']] == ids[:3]
+    assert page['next_cursor'] == ids[2]
+    page = get(client, f"/courses?cursor={page['next_cursor']}") # DEFAULT_PAGE_SIZE
+    assert [course['course_id'] for course in page['items']] == ids[3:]
+    assert page['next_cursor'] is None
+    assert get(client, f'/courses?limit=1&cursor={ids[-1]}') == {'items': [], 'next_cursor': None}
+
+    for args in ('limit=0', 'limit=-1', 'limit=ten', 'cursor=x'):
+        response = client.get(f'/courses?{args}')
+        assert response.status_code == 400
+        assert 'error' in response.json
+
+
+def test_fields_projects_the_response_and_the_select(client):
+    golfer, course = make_golfer(0), make_course(0)
+    make_teetime(golfer, course)
+
+    with count_queries() as statements:
+        courses = get(client, '/courses?fields=course_id,course_name')
+    assert courses == [{'course_id': course.course_id, 'course_name': 'Course 0'}]
+    assert not any('address' in statement for statement in statements)
+
+    [teetime] = get(client, '/teetimes?fields=price,golfer')
+    assert set(teetime) == {'price', 'golfer'}
+    assert teetime['golfer']['username'] == 'golfer0'
+
+
+def test_unknown_fields_are_a_400(client):
+    response = client.get('/courses?fields=course_name,nope,password')
+    assert response.status_code == 400
+    assert response.json == {'error': 'Unknown field(s): nope, password'}
+    assert client.get('/teetimes?fields=golfer.password').status_code == 400
@@ -0,0 +1,73 @@
+import pytest
+from app import rate_limit
+from app.rate_limit import MemoryBackend, SQLiteBackend
+from conftest import make_golfer, bearer
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    # bursts of 2 for default and auth, refilled over a minute, in a fresh in memory backend
+    monkeypatch.setattr(rate_limit, 'backend', MemoryBackend(max_keys=100))
+    monkeypatch.setattr(rate_limit, 'policies', {'default': (2, 2 / 60), 'auth': (2, 2 / 60)})
+    return rate_limit
+
+
+def from_ip(ip):
+    return {'REMOTE_ADDR': ip}
+
+
+def test_ip_gets_429_with_retry_after_once_its_bucket_is_empty(client, limits):
+    assert client.get('/courses', environ_base=from_ip('10.0.0.1')).status_code == 200
+    assert client.get('/courses', environ_base=from_ip('10.0.0.1')).status_code == 200
+    response = client.get('/courses', environ_base=from_ip('10.0.0.1'))
+    assert response.status_code == 429
+    assert 29 <= int(response.headers['Retry-After']) <= 30
+    # another address has a bucket of its own
+    assert client.get('/courses', environ_base=from_ip('10.0.0.2')).status_code == 200
+
+
+def test_golfer_is_charged_across_addresses_once_authenticated(client, limits):
+    headers = bearer(make_golfer(0))
+    assert client.get('/golfers/me', headers=headers, environ_base=from_ip('10.0.0.1')).status_code == 200
+    assert client.get('/golfers/me', headers=headers, environ_base=from_ip('10.0.0.2')).status_code == 200
+    assert client.get('/golfers/me', headers=headers, environ_base=from_ip('10.0.0.3')).status_code == 429
+    # the address itself still had a token left
+    assert client.get('/courses', environ_base=from_ip('10.0.0.3')).status_code == 200
+
+
+def test_made_up_tokens_do_not_buy_fresh_buckets(client, limits):
+    for i in range(2):
+        response = client.get('/golfers/me', headers={'Authorization': f'Bearer made-up-{i}'}, environ_base=from_ip('10.0.0.1'))
+        assert response.status_code == 401
+    response = client.get('/golfers/me', headers={'Authorization': 'Bearer made-up-2'}, environ_base=from_ip('10.0.0.1'))
+    assert response.status_code == 429
+    assert list(limits.backend._buckets) == ['default:ip:10.0.0.1']
+
+
+def test_logins_are_limited_per_claimed_username(client, limits):
+    make_golfer(0)
+    for ip in ('10.0.0.1', '10.0.0.2'):
+        response = client.get('/token', auth=('golfer0', 'wrong'), environ_base=from_ip(ip))
+        assert response.status_code == 401
+    assert client.get('/token', auth=('golfer0', 'secret'), environ_base=from_ip('10.0.0.3')).status_code == 429
+
+
+def test_sqlite_backend_buckets_are_shared_between_instances(tmp_path):
+    path = str(tmp_path / 'rate_limit.db')
+    first, second = SQLiteBackend(path), SQLiteBackend(path) # e.g. two gunicorn workers
+    assert first.take('default:ip:10.0.0.1', 2, 2 / 60) == 0
+    assert second.take('default:ip:10.0.0.1', 2, 2 / 60) == 0
+    assert 29 < first.take('default:ip:10.0.0.1', 2, 2 / 60) <= 30
+    assert second.take('default:ip:10.0.0.2', 2, 2 / 60) == 0
+    assert second.stats() == {'backend': 'sqlite', 'keys': 2}
+    first.clear()
+    assert second.take('default:ip:10.0.0.1', 2, 2 / 60) == 0
+
+
+def test_sqlite_backend_limits_requests(client, limits, monkeypatch, tmp_path):
+    monkeypatch.setattr(rate_limit, 'backend', SQLiteBackend(str(tmp_path / 'rate_limit.db')))
+    assert client.get('/courses').status_code == 200
+    assert client.get('/courses').status_code == 200
+    response = client.get('/courses')
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '30'
@@ -0,0 +1,77 @@
+import pytest
+from app import db, recommendations
+from app.models import Golfer, Golfer_comment
+from conftest import make_golfer, make_course, make_teetime, bearer
+
+
+@pytest.fixture(autouse=True)
+def fresh_index(app, monkeypatch):
+    # the index is per process, built again for each test's tables; no background rebuilds, only this
+    # process's own writes can reach it
+    monkeypatch.setitem(app.config, 'RECOMMENDATIONS_REFRESH_SECONDS', 0)
+    index = recommendations.index
+    index.data, index.versions, index.own_versions = None, None, set()
+    yield
+    index.data, index.versions, index.own_versions = None, None, set()
+
+
+def place(obj, city, district, country, **values):
+    obj.city, obj.district, obj.country = city, district, country
+    for key, value in values.items():
+        setattr(obj, key, value)
+    db.session.commit()
+    return obj
+
+
+def recommended(client, headers, **args):
+    response = client.get('/teetimes/recommended', headers=headers, query_string=args)
+    assert response.status_code == 200
+    return response.json
+
+
+@pytest.fixture
+def teetimes():
+    # -> (headers of the golfer asking, teetime ids from the best match to the worst)
+    me = place(make_golfer(0), 'Austin', 'TX', 'US', handicap=10, smoker=False)
+    host = place(make_golfer(1), 'Austin', 'TX', 'US', handicap=10, smoker=False)
+    stranger = place(make_golfer(2), 'Toronto', 'ON', 'CA', handicap=30, smoker=True)
+    austin = make_course(0)
+    dallas = place(make_course(1), 'Dallas', 'TX', 'US')
+    toronto = place(make_course(2), 'Toronto', 'ON', 'CA')
+    ids = [make_teetime(host, austin).teetime_id, make_teetime(host, dallas).teetime_id, make_teetime(stranger, toronto).teetime_id]
+    make_teetime(me, austin) # never their own
+    return bearer(me), ids
+
+
+def test_recommendations_are_ranked_and_paged(client, teetimes):
+    headers, ids = teetimes
+    first = recommended(client, headers, limit=2)
+    assert [item['teetime_id'] for item in first['items']] == ids[:2]
+    assert first['items'][0]['compatibility'] > first['items'][1]['compatibility']
+    second = recommended(client, headers, limit=2, cursor=first['next_cursor'])
+    assert [item['teetime_id'] for item in second['items']] == ids[2:]
+    assert second['next_cursor'] is None
+    assert second['items'][0]['compatibility'] < first['items'][1]['compatibility']
+
+    response = client.get('/teetimes/recommended', headers=headers, query_string={'fields': 'nope'})
+    assert response.status_code == 400
+
+
+def test_recommendations_follow_writes_without_a_rebuild(client, teetimes):
+    headers, ids = teetimes
+    recommended(client, headers) # builds the index
+    index = recommendations.index
+    data = index.data
+
+    # a booked tee time is no longer recommended to the golfer who booked it
+    assert client.post(f'/teetimes/{ids[0]}/bookings', headers=headers, json={'spots': 1}).status_code == 201
+    assert [item['teetime_id'] for item in recommended(client, headers)['items']] == ids[1:]
+
+    # a new tee time and a comment are applied to the index as they are committed
+    host = db.session.get(Golfer, 2)
+    new = make_teetime(host, make_course(3)).teetime_id # in Austin, as good a match as the booked one
+    Golfer_comment(body='See you there', golfer_id=1, teetime_id=ids[1])
+    assert [item['teetime_id'] for item in recommended(client, headers)['items']] == [new, *ids[1:]]
+
+    assert index.data is data
+    assert index.versions == recommendations.table_versions(db.session)
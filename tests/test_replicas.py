@@ -0,0 +1,75 @@
+import pytest
+from sqlalchemy import create_engine
+from app import db, replicas
+from app.models import Course, Table_version
+from conftest import make_course
+
+
+@pytest.fixture
+def replica(app, monkeypatch, tmp_path):
+    # a second sqlite database standing in for a replica, checked before every request and stale as soon as it
+    # is behind the primary at all
+    engine = create_engine('sqlite:///' + str(tmp_path / 'replica.db'))
+    db.metadata.create_all(engine)
+    monkeypatch.setitem(app.config['SQLALCHEMY_BINDS'], 'replica_0', {'url': str(engine.url)})
+    monkeypatch.setitem(db.engines, 'replica_0', engine)
+    monkeypatch.setitem(app.config, 'REPLICA_CHECK_INTERVAL', 0)
+    monkeypatch.setitem(app.config, 'REPLICA_MAX_LAG_SECONDS', 0)
+    monkeypatch.setattr(replicas, 'monitor', replicas.ReplicaMonitor())
+    yield engine
+    engine.dispose()
+
+
+def catch_up(engine):
+    # the replica gets the primary's table versions (not its rows, so reads show where they came from)
+    with engine.begin() as connection:
+        for table_name, version in replicas.versions(db.engine).items():
+            connection.execute(db.update(Table_version).where(Table_version.table_name == table_name).values(version=version))
+
+
+def course_names(client):
+    response = client.get('/courses')
+    assert response.status_code == 200
+    return [course['course_name'] for course in response.json]
+
+
+def test_reads_go_to_a_fresh_replica_and_writes_to_the_primary(client, replica):
+    make_course(0)
+    with replica.begin() as connection:
+        connection.execute(db.insert(Course).values(course_name='Replica Course', address='1 Copy Ln', city='Austin',
+                                                    district='TX', country='US', par=72))
+    catch_up(replica)
+    assert course_names(client) == ['Replica Course']
+
+    response = client.post('/courses', json={'course_name': 'New Course', 'address': '2 Fairway Dr', 'city': 'Austin',
+                                             'district': 'TX', 'country': 'US', 'par': 72})
+    assert response.status_code == 201
+    assert db.session.scalars(db.select(Course.course_name).order_by(Course.course_id)).all() == ['Course 0', 'New Course']
+    with replica.connect() as connection:
+        assert connection.scalars(db.select(Course.course_name)).all() == ['Replica Course']
+
+
+def test_lagging_replica_falls_back_to_the_primary(client, replica):
+    make_course(0)
+    assert course_names(client) == ['Course 0'] # the replica never saw the course
+    assert replicas.monitor.stats() == {'replica_0': {'healthy': False}}
+
+    catch_up(replica)
+    assert course_names(client) == []
+    make_course(1)
+    assert course_names(client) == ['Course 0', 'Course 1']
+
+
+def test_a_request_reads_its_own_writes_and_forced_statements_use_the_primary(app, replica):
+    make_course(0)
+    catch_up(replica)
+    assert db.session.scalars(db.select(Course.course_name)).all() == ['Course 0']
+    with app.test_request_context('/courses'):
+        assert db.session.scalars(db.select(Course.course_name)).all() == []
+        assert db.session.scalars(db.select(Course.course_name), bind_arguments={'primary': True}).all() == ['Course 0']
+
+    # once a request wrote, the rest of it reads from the primary
+    with app.test_request_context('/courses'):
+        assert db.session.scalars(db.select(Course.course_name)).all() == []
+        make_course(1)
+        assert db.session.scalars(db.select(Course.course_name)).all() == ['Course 0', 'Course 1']
@@ -0,0 +1,26 @@
+from app.response_cache import MemoryBackend
+
+
+def test_memory_backend_invalidates_only_tagged_entries():
+    cache = MemoryBackend(max_bytes=1000)
+    cache.set('teetimes', b'[1]', ['teetime', 'course'])
+    cache.set('courses', b'[2]', ['course'])
+    cache.set('golfers', b'[3]', ['golfer'])
+
+    cache.invalidate(['teetime'])
+    assert cache.get('teetimes') is None
+    assert cache.get('courses') == b'[2]' and cache.get('golfers') == b'[3]'
+
+    cache.invalidate(['course', 'teetime'])
+    assert cache.get('courses') is None and cache.get('golfers') == b'[3]'
+    assert cache._keys == {'golfer': {'golfers'}}
+
+
+def test_memory_backend_evicted_entries_leave_the_tag_index():
+    cache = MemoryBackend(max_bytes=10)
+    cache.set('first', b'12345', ['teetime'])
+    cache.set('second', b'12345', ['course'])
+    cache.set('third', b'12345', ['course']) # evicts first
+    assert cache.get('first') is None
+    assert cache._keys == {'course': {'second', 'third'}}
+    assert cache.size == 10
@@ -0,0 +1,58 @@
+import pytest
+from app import db
+from app.models import Teetime
+from app.unit_of_work import unit_of_work, bulk_delete
+from conftest import make_golfer, make_course, make_teetime
+
+# runs on the sqlite FTS5 table by default and on the postgres tsvector/pg_trgm table with TEST_DATABASE_URL=postgresql://...
+
+
+def search(client, query):
+    response = client.get('/teetimes', query_string={'search': query})
+    assert response.status_code == 200
+    return [item['teetime_id'] for item in response.json]
+
+
+def test_search_follows_writes_and_ranks_course_names_first(client):
+    golfer = make_golfer(0)
+    pebble, austin = make_course(0), make_course(1)
+    pebble.course_name, pebble.city = 'Pebble Beach', 'Monterey'
+    austin.course_name, austin.designer = 'Austin Country Club', 'Pete Dye'
+    db.session.commit()
+    on_pebble = make_teetime(golfer, pebble).teetime_id
+    on_austin = make_teetime(golfer, austin).teetime_id
+
+    assert search(client, 'pebble') == [on_pebble]
+    assert search(client, 'monter') == [on_pebble] # prefix of the city
+    assert search(client, 'dye') == [on_austin]
+
+    # a course edit reindexes its teetimes, a name match outranks a designer match
+    pebble.designer = 'Jack Neville'
+    austin.designer = 'Jack Nicklaus'
+    db.session.commit()
+    assert search(client, 'dye') == []
+    austin.course_name = 'Jack Nicklaus Golf Club'
+    db.session.commit()
+    assert search(client, 'jack') == [on_austin, on_pebble]
+
+    db.session.delete(db.session.get(Teetime, on_pebble))
+    db.session.commit()
+    assert search(client, 'pebble') == []
+
+    # bulk imports and archival go around the session
+    imported = Teetime.bulk_create([dict(course_name=pebble.course_name, price=50, teetime_date='2030-10-25', teetime_time='09:00',
+                                         space_remaining=4, golfer_id=golfer.golfer_id, course_id=pebble.course_id)])
+    assert search(client, 'pebble') == imported
+    with unit_of_work():
+        bulk_delete(Teetime, imported)
+    assert search(client, 'pebble') == []
+
+
+def test_postgres_search_tolerates_typos(client):
+    if db.engine.dialect.name != 'postgresql':
+        pytest.skip('trigram matching is only on the postgres search table')
+    golfer, course = make_golfer(0), make_course(0)
+    course.course_name = 'Pebble Beach'
+    db.session.commit()
+    teetime_id = make_teetime(golfer, course).teetime_id
+    assert search(client, 'Pebbel Beach') == [teetime_id]
@@ -0,0 +1,19 @@
+from app import db
+from app.models import Golfer_comment, Teetime_summary
+from conftest import make_golfer, make_course, make_teetime
+
+
+def comment_counts(*teetime_ids):
+    return [db.session.get(Teetime_summary, teetime_id, populate_existing=True).comment_count for teetime_id in teetime_ids]
+
+
+def test_moving_an_expired_comment_moves_its_count(app):
+    golfer, course = make_golfer(0), make_course(0)
+    first, second = make_teetime(golfer, course).teetime_id, make_teetime(golfer, course).teetime_id
+    comment = Golfer_comment(body='Moved', golfer_id=golfer.golfer_id, teetime_id=first)
+    assert comment_counts(first, second) == [1, 0]
+
+    db.session.expire(comment) # the teetime it moves away from is not loaded when it is set
+    comment.teetime_id = second
+    db.session.commit()
+    assert comment_counts(first, second) == [0, 1]
@@ -0,0 +1,49 @@
+import json
+from app import db
+from app.models import Golfer_comment
+from conftest import make_golfer, make_course, make_teetime, count_queries
+
+
+def add_teetimes(start, n):
+    # a host, a course and a commenter per teetime so any lazy load would show up once per row
+    for i in range(start, start + n):
+        host, commenter, course = make_golfer(2 * i), make_golfer(2 * i + 1), make_course(i)
+        teetime = make_teetime(host, course)
+        Golfer_comment(body='See you there', golfer_id=commenter.golfer_id, teetime_id=teetime.teetime_id)
+
+
+def test_teetime_listing_query_count_does_not_grow_with_rows(client):
+    add_teetimes(0, 1)
+    client.get('/teetimes') # warm up one-off statements (mapper setup)
+
+    counts = {}
+    total = 1
+    for n in (2, 20):
+        add_teetimes(total, n - total)
+        total = n
+        for url in ('/teetimes?limit=100', '/teetimes?limit=100&fields=teetime_id,golfer,course_details'):
+            db.session.expunge_all() # nothing served from the identity map
+            with count_queries() as statements:
+                response = client.get(url)
+            assert response.status_code == 200
+            assert len(response.json['items']) == n
+            counts[n, url] = len(statements)
+
+    for url in ('/teetimes?limit=100', '/teetimes?limit=100&fields=teetime_id,golfer,course_details'):
+        assert counts[2, url] == counts[20, url]
+
+
+def test_teetime_listing_streams_in_chunks(client, app, monkeypatch):
+    monkeypatch.setitem(app.config, 'STREAM_CHUNK_SIZE', 2)
+    add_teetimes(0, 5)
+
+    response = client.get('/teetimes?stream=1')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    items = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [item['teetime_id'] for item in items] == sorted(item['teetime_id'] for item in items)
+    assert len(items) == 5
+    assert all(item['golfer']['username'] and item['course_details']['course_name'] for item in items)
+
+    response = client.get(f"/teetimes?stream=1&limit=3&cursor={items[0]['teetime_id']}")
+    assert [json.loads(line)['teetime_id'] for line in response.get_data(as_text=True).splitlines()] == [item['teetime_id'] for item in items[1:4]]
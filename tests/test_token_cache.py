@@ -0,0 +1,49 @@
+from datetime import datetime, timezone, timedelta
+import pytest
+from app import db, token_cache
+from app.models import Golfer
+from conftest import make_golfer, bearer, count_queries
+
+
+@pytest.fixture(autouse=True)
+def empty_token_cache():
+    token_cache.clear()
+    yield
+    token_cache.clear()
+
+
+def test_repeat_token_auth_skips_the_database(client):
+    headers = bearer(make_golfer(0))
+    assert client.get('/golfers/me', headers=headers).status_code == 200 # fills the cache
+    db.session.expunge_all()
+    with count_queries() as statements:
+        response = client.get('/golfers/me', headers=headers)
+    assert response.status_code == 200
+    assert response.json['username'] == 'golfer0'
+    assert statements == []
+
+
+def test_updating_a_golfer_refreshes_its_cached_values(client):
+    headers = bearer(make_golfer(0))
+    client.get('/golfers/me', headers=headers)
+    assert client.put('/golfers/me', headers=headers, json={'handicap': 7}).status_code == 200
+    assert client.get('/golfers/me', headers=headers).json['handicap'] == 7
+
+
+def test_rotating_a_token_invalidates_the_old_one(client):
+    golfer = make_golfer(0)
+    old = bearer(golfer)
+    assert client.get('/golfers/me', headers=old).status_code == 200
+    # about to expire, so the next login issues a new token (behind the cache's back, which still has the old one)
+    db.session.execute(db.update(Golfer).values(tokenExp=datetime.now(timezone.utc) + timedelta(seconds=30)))
+    db.session.commit()
+    new = client.get('/token', auth=('golfer0', 'secret')).json['token']
+    assert client.get('/golfers/me', headers=old).status_code == 401
+    assert client.get('/golfers/me', headers={'Authorization': 'Bearer ' + new}).status_code == 200
+
+
+def test_deleting_a_golfer_invalidates_its_token(client):
+    headers = bearer(make_golfer(0))
+    assert client.get('/golfers/me', headers=headers).status_code == 200
+    assert client.delete('/golfers/me', headers=headers).status_code == 200
+    assert client.get('/golfers/me', headers=headers).status_code == 401
@@ -0,0 +1,68 @@
+import pytest
+from app import db, versions
+from app.models import Golfer, Course, Teetime, Teetime_summary
+from app.response_cache import MemoryBackend
+from app.unit_of_work import unit_of_work, bulk_insert
+from conftest import make_golfer, make_course, make_teetime
+
+
+@pytest.fixture
+def after_commit(monkeypatch):
+    # -> the version bumps seen, with a real response cache holding one entry per table to watch invalidations
+    bumps = []
+    monkeypatch.setattr(versions, 'bump_listeners', [*versions.bump_listeners, bumps.append])
+    cache = MemoryBackend(max_bytes=1000)
+    monkeypatch.setattr(versions, 'response_cache', cache)
+    for table in ('golfer', 'course', 'teetime'):
+        cache.set(table, b'[]', [table])
+    return bumps, cache
+
+
+def count(model):
+    return db.session.scalar(db.select(db.func.count()).select_from(model))
+
+
+def test_a_failure_rolls_back_every_write_and_fires_no_hooks(app, after_commit):
+    bumps, cache = after_commit
+    with pytest.raises(RuntimeError):
+        with unit_of_work():
+            golfer, course = make_golfer(0), make_course(0)
+            make_teetime(golfer, course)
+            bulk_insert(Course, [{'course_name': 'Bulk', 'address': '1 Bulk Rd', 'city': 'Austin', 'district': 'TX', 'country': 'US', 'par': 72}])
+            with unit_of_work(): # joins the outer one
+                golfer.update(handicap=5)
+            assert golfer.golfer_id is not None # flushed, not committed
+            raise RuntimeError('boom')
+
+    assert [count(model) for model in (Golfer, Course, Teetime, Teetime_summary)] == [0, 0, 0, 0]
+    assert bumps == []
+    assert all(cache.get(table) == b'[]' for table in ('golfer', 'course', 'teetime'))
+
+
+def test_one_commit_at_the_end_fires_the_hooks_once(app, after_commit):
+    bumps, cache = after_commit
+    with unit_of_work():
+        golfer, course = make_golfer(0), make_course(0)
+        make_teetime(golfer, course)
+        assert bumps == []
+    assert [count(model) for model in (Golfer, Course, Teetime, Teetime_summary)] == [1, 1, 1, 1]
+    assert len(bumps) == 1
+    assert set(bumps[0]) == {'golfer', 'course', 'teetime'}
+    assert all(cache.get(table) is None for table in ('golfer', 'course', 'teetime'))
+
+
+def test_request_unit_of_work_commits_successes_and_rolls_back_errors(client, app, after_commit, monkeypatch):
+    bumps, cache = after_commit
+    monkeypatch.setitem(app.config, 'UNIT_OF_WORK_PER_REQUEST', True)
+    course = {'course_name': 'New Course', 'address': '2 Fairway Dr', 'city': 'Austin', 'district': 'TX', 'country': 'US', 'par': 72}
+    assert client.post('/courses', json=course).status_code == 201
+    assert count(Course) == 1 and len(bumps) == 1 and cache.get('course') is None
+
+    # a golfer is written, then the view fails
+    cache.set('golfer', b'[]', ['golfer'])
+    monkeypatch.setattr(Golfer, 'to_dict', lambda self, *args: 1 / 0)
+    golfer = {'first_name': 'First', 'last_name': 'Last', 'email': 'new@example.com', 'username': 'new', 'password': 'secret',
+              'golfer_age': 30, 'city': 'Austin', 'district': 'TX', 'country': 'US'}
+    response = client.post('/golfers', json=golfer)
+    assert response.status_code == 500
+    assert count(Golfer) == 0 and len(bumps) == 1 and cache.get('golfer') == b'[]'
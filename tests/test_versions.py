@@ -0,0 +1,40 @@
+from app import db
+from conftest import make_golfer, make_course, make_teetime, bearer, count_queries
+
+
+def test_matching_if_none_match_gets_a_304_without_running_the_view(client):
+    golfer, course = make_golfer(0), make_course(0)
+    url = f'/teetimes/{make_teetime(golfer, course).teetime_id}'
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+
+    db.session.expunge_all()
+    with count_queries() as statements:
+        response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+    assert response.data == b''
+    assert len(statements) == 1 # the table versions
+
+
+def test_writes_change_the_etags_of_what_they_touch(client):
+    golfer, course = make_golfer(0), make_course(0)
+    headers = bearer(golfer)
+    url = f'/teetimes/{make_teetime(golfer, course).teetime_id}'
+    etag = client.get(url).headers['ETag']
+    courses_etag = client.get('/courses').headers['ETag']
+
+    assert client.put(url, headers=headers, json={'price': 75}).status_code == 200
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.json['price'] == 75
+    assert response.headers['ETag'] != etag
+    # /courses is not built from teetimes
+    assert client.get('/courses', headers={'If-None-Match': courses_etag}).status_code == 304
+
+    # a login rotating the token only changes columns no response shows
+    etag = response.headers['ETag']
+    golfer.token = None
+    golfer.get_token()
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304